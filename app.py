@@ -6,9 +6,172 @@ import plotly.express as px
 import io
 
 # Import refactored modules
-from models import mortgage_balance_schedule, scenario1_cashflow, scenario2_cashflow
-from utils import apply_stress_and_macro, score_scenarios
-from utils import apply_rebalancing, apply_drawdown, apply_tax_change
+from inputs import get_sidebar_inputs
+from models import (
+    amortization_schedule,
+    annual_rollup,
+    growth_schedule,
+    resolve_rate_schedule,
+    yearly_amortization_batch,
+)
+from rates import MIN_RATE_HISTORY, load_rate_history
+from sampling import sobol_available
+from utils import SCORE_OBJECTIVES, canonical_key
+import pipeline
+from pipeline import MATRIX_INPUTS, PROJECTION_INPUTS, SCENARIO_INPUTS
+from optimizer import optimize_scenario, pareto_frontier
+from charts import monte_carlo_fan_chart, monte_carlo_paths_frame, pareto_frontier_chart, sample_path_indices
+from simulation import (
+    MONTE_CARLO_INPUTS,
+    adaptive_monte_carlo,
+    monte_carlo_estimates,
+    monte_carlo_simulation,
+    sensitivity_analysis,
+)
+
+# --- Cached model entry points ---
+# Each takes a canonical hash of only the inputs it depends on as its cache key; arguments prefixed
+# with "_" are skipped by Streamlit's hashing. Changing an unrelated widget reuses the cached result.
+HELOC_INPUTS = ("pr_price", "down_pr2", "amort_years", "rate_schedule", "cashflow_resolution", "payment_frequency")
+AMORTIZATION_INPUTS = (
+    "pr_price",
+    "down_pr1",
+    "rental_price",
+    "amort_years",
+    "rate_schedule",
+    "pr_prop_tax_base",
+    "pr_prop_tax_yoy_increase",
+    "pr_insurance_base",
+    "pr_insurance_yoy_increase",
+    "pr_maintenance_base",
+    "pr_maintenance_yoy_increase",
+    "rental_prop_tax_base",
+    "rental_prop_tax_yoy_increase",
+    "rental_insurance_base",
+    "rental_insurance_yoy_increase",
+    "rental_maintenance_base",
+    "rental_maintenance_yoy_increase",
+)
+ADAPTIVE_MAX_SIMULATIONS = 200_000
+# Paths of an adaptive run kept for the charts, as many as the fixed-count slider allows; the estimates
+# use every path
+ADAPTIVE_CHART_PATHS = 5_000
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def run_heloc_balances(key, _inputs):
+    # HELOC grows as the scenario 2 PR principal is paid down
+    amort_years = _inputs["amort_years"]
+    pr_loan = _inputs["pr_price"] * (1 - _inputs["down_pr2"])
+    if _inputs["cashflow_resolution"] == "monthly":
+        # Every monthly principal payment is re-borrowed, so the HELOC is the principal repaid so far
+        balances, _, principal_paid = amortization_schedule(
+            pr_loan, amort_years, _inputs["rate_schedule"], _inputs["payment_frequency"]
+        )
+        return annual_rollup(np.cumsum(principal_paid), "last").tolist(), annual_rollup(balances, "last").tolist()
+    monthly_balances, _, principal_paid, _ = yearly_amortization_batch(
+        [pr_loan], resolve_rate_schedule(_inputs["rate_schedule"], amort_years)
+    )
+    # Each year's principal is re-borrowed at the year end; the mortgage balance is read a year ahead
+    year_ends = np.minimum(np.arange(1, amort_years + 1) * 12, amort_years * 12 - 1)
+    return np.cumsum(principal_paid[0]).tolist(), monthly_balances[0, year_ends].tolist()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def run_amortization_tables(key, _inputs):
+    # Both scenario 1 loans amortized in one batch call. The tables price interest and the payment at
+    # the final year's rate, and the rental loan at the same rate as the PR for simplicity.
+    amort_years = _inputs["amort_years"]
+    annual_rates = resolve_rate_schedule(_inputs["rate_schedule"], amort_years)
+    pr_loan = _inputs["pr_price"] * (1 - _inputs["down_pr1"])
+    rental_loan = _inputs["rental_price"] - _inputs["rental_price"] * 0.2
+    loans = np.array([pr_loan, rental_loan])
+    monthly_rate = annual_rates[-1] / 12
+    monthly_balances, eoy_balances, principal_paid, interest_paid = yearly_amortization_batch(
+        loans, annual_rates, np.full(amort_years, annual_rates[-1])
+    )
+    annual_payments = loans * monthly_rate / (1 - (1 + monthly_rate) ** -(amort_years * 12)) * 12
+    expenses = {
+        owner: sum(
+            growth_schedule(_inputs[f"{owner}_{item}_base"], _inputs[f"{owner}_{item}_yoy_increase"], amort_years)
+            for item in ("prop_tax", "insurance", "maintenance")
+        )
+        for owner in ("pr", "rental")
+    }
+    tables = [
+        pd.DataFrame(
+            {
+                "Year": np.arange(1, amort_years + 1),
+                "End-of-Year Balance": eoy_balances[i],
+                "Principal Paid": principal_paid[i],
+                "Interest Paid": interest_paid[i],
+                "Total Payment": np.full(amort_years, annual_payments[i]),
+                "Expenses": expenses[owner],
+            }
+        )
+        for i, owner in enumerate(("pr", "rental"))
+    ]
+    # PR principal repaid by each year end covers up to an even share of the rental loan; rent covers the rest
+    total_rental_payment = rental_loan / amort_years
+    pr_contribution = np.minimum(pr_loan - monthly_balances[0, 11::12], total_rental_payment)
+    tables[1]["Re-advanceable PR Principal"] = pr_contribution
+    tables[1]["Rent Contribution"] = total_rental_payment - pr_contribution
+    return tables[0], tables[1]
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def run_sensitivity(key, _inputs, grid_size):
+    sm_range = np.linspace(0.04, 0.08, grid_size)
+    rental_range = np.linspace(0, 0.1, grid_size)
+    sensitivity = sensitivity_analysis(_inputs, {"rental_app": rental_range, "sm_return": sm_range})
+    return sm_range, rental_range, sensitivity["diff"]
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def run_optimizer(key, _inputs, scenario, optimize_for):
+    return optimize_scenario(_inputs, scenario, optimize_for)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def run_frontier(key, _inputs, scenario, num_plans):
+    return pareto_frontier(_inputs, scenario, num_plans, seed=0)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def run_stress_matrix(key, _inputs):
+    return pipeline.stress_matrix(_inputs)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def run_adaptive_monte_carlo(key, _inputs, _mc_params, target_half_width, time_budget, seed, sampler, antithetic, control_variate):
+    # Only the first ADAPTIVE_CHART_PATHS paths are kept, so a cache entry stays a few MB
+    return adaptive_monte_carlo(
+        _inputs,
+        _mc_params,
+        target_half_width,
+        time_budget,
+        max_simulations=ADAPTIVE_MAX_SIMULATIONS,
+        seed=seed,
+        sampler=sampler,
+        antithetic=antithetic,
+        control_variate=control_variate,
+        keep_paths=True,
+        max_kept_paths=ADAPTIVE_CHART_PATHS,
+    )
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def run_monte_carlo(key, _inputs, _mc_params, num_simulations, seed, sampler, antithetic, control_variate):
+    return monte_carlo_simulation(
+        _inputs,
+        _mc_params,
+        num_simulations,
+        seed,
+        sampler=sampler,
+        antithetic=antithetic,
+        control_variate=control_variate,
+    )
+
 
 ## --- Streamlit UI ---
 st.set_page_config(page_title="Scenario Analysis", page_icon="💰", 
@@ -95,179 +258,27 @@ You can adjust key variables to see how each scenario performs, helping you comp
 )
 
 st.title("Investment Scenario Analysis")
-sidebar = st.sidebar
-sidebar.header("Input Variables")
-pr_price = sidebar.number_input("Principal Residence Price", 500_000, 2_000_000, 1_300_000, step=50_000)
-rental_price = sidebar.number_input("Rental Property Price", 500_000, 1_000_000, 800_000, step=50_000)
-down_pr1 = sidebar.slider("PR Down Payment Scenario 1 (%)", 0, 50, 10) / 100
-down_pr2 = sidebar.slider("PR Down Payment Scenario 2 (%)", 0, 50, 20) / 100
-amort_years = sidebar.slider("Amortization (amort_years)", 10, 30, 30)
-pr_app = sidebar.slider("Principal Residence Appreciation (%)", 0, 10, 3) / 100
-rental_app = sidebar.slider("Rental Property Appreciation (%)", 0, 10, 5) / 100
-# income_start = sidebar.number_input("Starting Income", 50_000, 1_000_000, 250_000, step=10_000)
-# income_growth = sidebar.slider("Income Growth (%)", 0, 10, 3) / 100
-income_start, income_growth = 250_000, 0.03
-heloc_loan = sidebar.number_input("HELOC Loan for Rental Mortgage ($)", 0, 1_000_000, 250_000, step=10_000)
-# heloc_rate = sidebar.slider("HELOC Interest Rate (%)", 0.0, 10.0, 6.0) / 100
-heloc_delta = sidebar.slider("HELOC Rate Delta (%)", 0.0, 5.0, 1.0, step=0.1) / 100
-sm_principal = sidebar.number_input("SM Initial Principal ($)", 0, 1_000_000, 250_000, step=10_000)
-marginal_tax_rate = sidebar.slider("Marginal Tax Rate (%)", 0, 100, 50) / 100
-
-# Principal Residence Maintenance Variables
-sidebar.subheader("Principal Residence Expenses")
-pr_prop_tax_base = sidebar.number_input("PR Base Property Tax ($)", 0, 50_000, 4_000, step=500)
-pr_prop_tax_yoy_increase = sidebar.slider("PR Property Tax YoY Increase (%)", 0, 10, 2, step=1) / 100
-pr_insurance_base = sidebar.number_input("PR Base Annual Insurance ($)", 0, 10_000, 1_200, step=500)
-pr_insurance_yoy_increase = sidebar.slider("PR Insurance YoY Increase (%)", 0, 10, 2, step=1) / 100
-pr_maintenance_base = sidebar.number_input("PR Annual Maintenance ($)", 0, 12_000, 2_000, step=500)
-pr_maintenance_yoy_increase = sidebar.slider("PR Maintenance YoY Increase (%)", 0, 10, 2, step=1) / 100
-
-# Rental / Operating Expenses Inputs
-sidebar.subheader("Rental Property Expenses")
-rental_rent_monthly = sidebar.number_input("Monthly Rent", 0, 20_000, 4_000, step=100)
-rental_vacancy = sidebar.slider("Vacancy Rate (%)", 0, 20, 5, step=1) / 100
-rental_prop_tax_base = sidebar.number_input("Rental Base Property Tax ($)", 0, 50_000, 5_000, step=500)
-rental_prop_tax_yoy_increase = sidebar.slider("Rental Property Tax YoY Increase (%)", 0, 10, 2, step=1) / 100
-rental_insurance_base = sidebar.number_input("Rental Base Annual Insurance ($)", 0, 50_000, 1_500, step=500)
-rental_insurance_yoy_increase = sidebar.slider("Rental Insurance YoY Increase (%)", 0, 10, 2, step=1) / 100
-rental_maintenance_base = sidebar.number_input("Rental Base Maintenance ($)", 0, 50_000, 2_000, step=500)
-rental_maintenance_yoy_increase = sidebar.slider("Rental Maintenance YoY Increase (%)", 0, 10, 2, step=1) / 100
-
-# Rental Purchase Timing
-sidebar.subheader("Rental Purchase Timing")
-rental_purchase_year = sidebar.slider("Year of Rental Purchase", 0, 30, 0)
-
-# Rate schedule input
-sidebar.markdown("### Mortgage Rate Schedule (Year: Rate %)")
-rate_input = sidebar.text_area("Example: 1:3.95,3:3.45,5:3.25", "1:3.95,3:3.45,5:3.25")
-rate_schedule = {}
-try:
-    for item in rate_input.split(","):
-        if ":" not in item:
-            continue
-        yr, r = item.split(":")
-        yr = int(yr.strip())
-        r = float(r.strip()) / 100
-        if yr > 0 and 0 < r < 1:
-            rate_schedule[yr] = r
-except Exception as e:
-    sidebar.warning(f"Rate schedule input invalid, using default 3.95%. Error: {e}")
-    rate_schedule = {1: 0.0395}
-if not rate_schedule:
-    rate_schedule = {1: 0.0395}
-
-# SM Return range for heatmap
-sm_return = sidebar.slider("Smith Manoeuvre Return (%)", 0, 10, 5) / 100
-
-
-# --- Future-Proofing & Stress Testing ---
-sidebar.header("Future-Proofing & Stress Testing")
-
-# 1. Stress Testing
-stress_test = sidebar.selectbox(
-    "Stress Test Scenario",
-    ["None", "Interest Rate Spike", "Market Crash", "Rent Drop", "High Vacancy", "Combined Shock"],
-)
-
-# 2. Scenario Narratives
-macro_scenario = sidebar.selectbox(
-    "Macroeconomic Scenario", ["Base Case", "Recession", "Inflation", "Housing Boom", "Housing Bust"]
-)
-
-# 3. Dynamic Rebalancing
-rebalancing_action = sidebar.selectbox(
-    "Mid-Course Correction", ["None", "Sell Rental Property", "Refinance PR", "Increase Investment", "Reduce Debt"]
-)
-
-# 4. Drawdown Analysis
-drawdown_amount = sidebar.number_input("Annual Drawdown ($, for emergencies/retirement)", 0, 500_000, 0, step=10_000)
-
-# 5. Tax Law Change Simulation
-future_tax_change = sidebar.selectbox(
-    "Future Tax Law Change",
-    ["None", "Increase Capital Gains Tax", "Increase Property Tax", "Remove Mortgage Interest Deductibility"],
-)
-
-# 6. Multi-Objective Optimization
-optimize_for = sidebar.multiselect(
-    "Optimize For", ["Net Worth", "Risk", "Liquidity", "Stress Resilience", "Lifestyle"], default=["Net Worth"]
-)
-
-# 7. Decision Tree Visualization (scaffold)
-# Will be implemented as a chart in the main pane
-
-# 8. Behavioral Factors
-risk_tolerance = sidebar.slider("Risk Tolerance (1=Low, 10=High)", 1, 10, 5)
-discipline = sidebar.slider("Investment Discipline (1=Low, 10=High)", 1, 10, 7)
-
-
-# --- Apply Stress Test & Macro Scenario Adjustments ---
-
-
-# --- Monte Carlo with Correlations (scaffold) ---
-# For simplicity, not implemented in main simulation yet
-
-
-# --- Calculate Cash Flows ---
-# Calculate maintenance and property tax for each year
-pr_maintenance_list = [pr_maintenance_base * ((1 + pr_maintenance_yoy_increase) ** i) for i in range(amort_years)]
-rental_maintenance_list = [
-    rental_maintenance_base * ((1 + rental_maintenance_yoy_increase) ** i) for i in range(amort_years)
-]
-pr_prop_tax_list = [pr_prop_tax_base * ((1 + pr_prop_tax_yoy_increase) ** i) for i in range(amort_years)]
-rental_prop_tax_list = [rental_prop_tax_base * ((1 + rental_prop_tax_yoy_increase) ** i) for i in range(amort_years)]
-pr_insurance_list = [pr_insurance_base * ((1 + pr_insurance_yoy_increase) ** i) for i in range(amort_years)]
-rental_insurance_list = [rental_insurance_base * ((1 + rental_insurance_yoy_increase) ** i) for i in range(amort_years)]
-
-s1_equity, s1_cashflow = scenario1_cashflow(
-    pr_price,
-    rental_price,
-    down_pr1,
-    rate_schedule,
-    amort_years,
-    rental_app,
-    pr_app,
-    heloc_delta,
-    rental_rent_monthly,
-    rental_vacancy,
-    rental_prop_tax_list,
-    rental_insurance_list,
-    rental_maintenance_list,
-    rental_purchase_year,
-    pr_prop_tax_list,
-    pr_insurance_list,
-    pr_maintenance_list,
-)
-
-s2_equity, s2_cashflow, tax_savings_list = scenario2_cashflow(
-    pr_price,
-    sm_return,
-    down_pr2,
-    rate_schedule,
-    amort_years,
-    income_start,
-    income_growth,
-    pr_app,
-    heloc_loan,
-    heloc_delta,
-    sm_principal,
-    pr_prop_tax_list,
-    pr_insurance_list,
-    pr_maintenance_list,
-)
-
-# --- Apply Dynamic Rebalancing ---
-s1_equity, s2_equity, s1_cashflow, s2_cashflow = apply_rebalancing(
-    s1_equity, s2_equity, s1_cashflow, s2_cashflow, rebalancing_action
-)
-
-# --- Apply Drawdown Analysis ---
-s1_equity, s2_equity, s1_cashflow, s2_cashflow = apply_drawdown(
-    s1_equity, s2_equity, s1_cashflow, s2_cashflow, drawdown_amount, amort_years
-)
-
-# --- Apply Tax Law Change ---
-s1_equity, s2_equity = apply_tax_change(s1_equity, s2_equity, future_tax_change)
+scenario_inputs = get_sidebar_inputs()
+pr_price = scenario_inputs["pr_price"]
+rental_price = scenario_inputs["rental_price"]
+down_pr1 = scenario_inputs["down_pr1"]
+down_pr2 = scenario_inputs["down_pr2"]
+amort_years = scenario_inputs["amort_years"]
+rate_schedule = scenario_inputs["rate_schedule"]
+income_start = scenario_inputs["income_start"]
+income_growth = scenario_inputs["income_growth"]
+heloc_delta = scenario_inputs["heloc_delta"]
+rental_rent_monthly = scenario_inputs["rental_rent_monthly"]
+rental_vacancy = scenario_inputs["rental_vacancy"]
+
+
+# The projection stages live in a per-session dependency graph, so a widget change reruns only the
+# stages downstream of it (e.g. a new tax change skips both scenario models)
+if "projection_graph" not in st.session_state:
+    st.session_state["projection_graph"] = pipeline.projection_graph()
+s1_equity, s2_equity, s1_cashflow, s2_cashflow, tax_savings_list = st.session_state["projection_graph"].evaluate(
+    scenario_inputs, "projection"
+)["projection"]
 
 # Display Summary in Main Pane
 st.subheader(f"{amort_years}-Year Projection Summary")
@@ -334,58 +345,11 @@ fig_tax_saved = px.line(
 st.plotly_chart(fig_tax_saved, use_container_width=True)
 
 # --- HELOC Balance Visualization ---
-from models import scenario2_cashflow
-# Re-run scenario2_cashflow to get heloc_balances
-def get_heloc_balances(pr_price, sm_return, down_pr2, amort_years, rate_schedule, income_start, income_growth, pr_app, heloc_loan, heloc_delta, sm_principal, pr_prop_tax_list, pr_insurance_list, pr_maintenance_list):
-    s2_equity_list, cashflow_list, tax_savings_list = scenario2_cashflow(
-        pr_price,
-        sm_return,
-        down_pr2,
-        rate_schedule,
-        amort_years,
-        income_start,
-        income_growth,
-        pr_app,
-        heloc_loan,
-        heloc_delta,
-        sm_principal,
-        pr_prop_tax_list,
-        pr_insurance_list,
-        pr_maintenance_list,
-    )
-    pr_loan = pr_price * (1 - down_pr2)
-    _, pr_monthly_balances = mortgage_balance_schedule(pr_loan, amort_years, rate_schedule)
-    heloc_balances = []
-    for year in range(1, amort_years + 1):
-        pr_principal_paid = (
-            pr_monthly_balances[min((year - 2) * 12, len(pr_monthly_balances) - 1)] - pr_monthly_balances[min((year - 1) * 12, len(pr_monthly_balances) - 1)]
-        ) if year > 1 else (pr_loan - pr_monthly_balances[min(12, len(pr_monthly_balances) - 1)])
-        heloc_balance = heloc_balances[-1] + pr_principal_paid if heloc_balances else pr_principal_paid
-        heloc_balances.append(heloc_balance)
-    return heloc_balances
-
-heloc_balances = get_heloc_balances(
-    pr_price=pr_price,
-    sm_return=sm_return,
-    down_pr2=down_pr2,
-    amort_years=amort_years,
-    rate_schedule=rate_schedule,
-    income_start=income_start,
-    income_growth=income_growth,
-    pr_app=pr_app,
-    heloc_loan=heloc_loan,
-    heloc_delta=heloc_delta,
-    sm_principal=sm_principal,
-    pr_prop_tax_list=pr_prop_tax_list,
-    pr_insurance_list=pr_insurance_list,
-    pr_maintenance_list=pr_maintenance_list,
+heloc_balances, mortgage_principal_balances = run_heloc_balances(
+    canonical_key(scenario_inputs, HELOC_INPUTS), scenario_inputs
 )
 st.subheader("HELOC Balance Over Time (Smith Manoeuvre)")
 years = np.arange(1, amort_years + 1)
-# Calculate mortgage principal balance for each year
-pr_loan = pr_price * (1 - down_pr2)
-_, pr_monthly_balances = mortgage_balance_schedule(pr_loan, amort_years, rate_schedule)
-mortgage_principal_balances = [pr_monthly_balances[min(int(year) * 12, len(pr_monthly_balances) - 1)] for year in years]
 
 fig_heloc = px.line(
     x=years,
@@ -410,52 +374,15 @@ st.dataframe(comparison_df, use_container_width=True)
 
 # --- Sensitivity Table ---
 st.subheader("Sensitivity Table with Cash Flow")
-sm_range = np.linspace(0.04, 0.08, 5)
-rental_range = np.linspace(0, 0.1, 5)
-table_data = []
-for r_app in rental_range:
-    row = {"Rental Appreciation (%)": round(r_app * 100, 1)}
-    for sm_ret in sm_range:
-        s1_equity_list, _ = scenario1_cashflow(
-            pr_price,
-            rental_price,
-            down_pr1,
-            rate_schedule,
-            amort_years,
-            r_app,
-            pr_app,
-            heloc_delta,
-            rental_rent_monthly,
-            rental_vacancy,
-            rental_prop_tax_list,
-            rental_insurance_list,
-            rental_maintenance_list,
-            rental_purchase_year,
-            pr_prop_tax_list,
-            pr_insurance_list,
-            pr_maintenance_list,
-        )
-        s2_equity_list, _, _ = scenario2_cashflow(
-            pr_price,
-            sm_ret,
-            down_pr2,
-            rate_schedule,
-            amort_years,
-            income_start,
-            income_growth,
-            pr_app,
-            heloc_loan,
-            heloc_delta,
-            sm_principal,
-            pr_prop_tax_list,
-            pr_insurance_list,
-            pr_maintenance_list,
-        )
-        diff = s1_equity_list[-1] - s2_equity_list[-1]
-        row[f"SM {round(sm_ret*100, 1)}% Net Worth Diff"] = round(diff / 1000, 1)
-    table_data.append(row)
-
-df_sensitivity = pd.DataFrame(table_data)
+sensitivity_grid_size = st.slider("Sensitivity Grid Size", 5, 100, 5, step=5)
+sm_range, rental_range, sensitivity_diff = run_sensitivity(
+    canonical_key(scenario_inputs, SCENARIO_INPUTS), scenario_inputs, sensitivity_grid_size
+)
+df_sensitivity = pd.DataFrame(
+    np.round(sensitivity_diff / 1000, 1),
+    columns=[f"SM {round(sm_ret*100, 2)}% Net Worth Diff" for sm_ret in sm_range],
+)
+df_sensitivity.insert(0, "Rental Appreciation (%)", np.round(rental_range * 100, 2))
 st.dataframe(df_sensitivity, use_container_width=True)
 
 # --- Interactive Parameter Sensitivity ---
@@ -464,12 +391,107 @@ net_diff = df_sensitivity[[col for col in df_sensitivity.columns if "Diff" in co
 fig5 = px.imshow(
     net_diff,
     labels=dict(x="SM Return (%)", y="Rental Appreciation (%)", color="Net Worth Diff ($000)"),
-    x=[round(x * 100, 1) for x in sm_range],
-    y=[round(x * 100, 1) for x in rental_range],
+    x=[round(x * 100, 2) for x in sm_range],
+    y=[round(x * 100, 2) for x in rental_range],
     color_continuous_scale="RdYlGn",
 )
 st.plotly_chart(fig5)
 
+# --- Parameter Optimizer ---
+st.subheader("Optimizer: Down Payment, Rental Purchase Year and SM Principal")
+optimize_for = tuple(name for name in scenario_inputs["optimize_for"] if name in SCORE_OBJECTIVES)
+if not optimize_for:
+    st.info(f"Select at least one of {', '.join(SCORE_OBJECTIVES)} under Optimize For to search the inputs.")
+else:
+    st.caption(
+        f"Maximizes the sum of {', '.join(optimize_for)} for each scenario over the inputs it depends on "
+        "(grid search, then coordinate descent); the Pareto front trades off all four objectives."
+    )
+    for opt_col, scenario in zip(st.columns(2), ("Scenario 1", "Scenario 2")):
+        optimum = run_optimizer(canonical_key(scenario_inputs, PROJECTION_INPUTS), scenario_inputs, scenario, optimize_for)
+        with opt_col:
+            st.markdown(f"**{scenario}**: score {optimum['best_score']:,.0f} after {optimum['evaluations']} evaluations")
+            st.dataframe(
+                pd.DataFrame(
+                    {
+                        "Input": list(optimum["best"]),
+                        "Current": [scenario_inputs[name] for name in optimum["best"]],
+                        "Optimal": list(optimum["best"].values()),
+                    }
+                ),
+                use_container_width=True,
+            )
+            front = pd.DataFrame({**optimum["candidates"], **optimum["objectives"], "Score": optimum["scores"]})
+            front = front.iloc[optimum["pareto"]].sort_values("Score", ascending=False)
+            st.markdown(f"Pareto front: {len(front)} non-dominated candidates")
+            st.dataframe(front.head(20).round(2), use_container_width=True)
+
+# --- Pareto Frontier ---
+st.subheader("Pareto Frontier: Trade-offs Between Objectives")
+frontier_cols = st.columns(4)
+frontier_scenario = frontier_cols[0].selectbox("Frontier Scenario", ["Scenario 1", "Scenario 2"])
+frontier_x = frontier_cols[1].selectbox("X Objective", SCORE_OBJECTIVES, index=0)
+frontier_y = frontier_cols[2].selectbox("Y Objective", SCORE_OBJECTIVES, index=1)
+frontier_plans = frontier_cols[3].select_slider("Plans Evaluated", [1_000, 10_000, 100_000], value=10_000)
+frontier = run_frontier(
+    canonical_key(scenario_inputs, PROJECTION_INPUTS), scenario_inputs, frontier_scenario, frontier_plans
+)
+st.plotly_chart(pareto_frontier_chart(frontier, frontier_x, frontier_y), use_container_width=True)
+st.caption(
+    f"{len(frontier['pareto']):,} of {len(frontier['ranks']):,} plans are non-dominated across all of "
+    f"{', '.join(SCORE_OBJECTIVES)} (Risk is minus the standard deviation of yearly net worth)."
+)
+
+# --- Stress Test Matrix ---
+st.subheader("Stress Test Matrix: Every Stress, Macro, Rebalancing and Tax Combination")
+matrix = run_stress_matrix(canonical_key(scenario_inputs, MATRIX_INPUTS), scenario_inputs)
+matrix_axes = matrix["axes"]
+matrix_labels = {
+    "s1_final_networth": "Scenario 1 Final Net Worth ($)",
+    "s2_final_networth": "Scenario 2 Final Net Worth ($)",
+    "difference": "Net Worth Difference S1 - S2 ($)",
+    "s1_total_cashflow": "Scenario 1 Total Cash Flow ($)",
+    "s2_total_cashflow": "Scenario 2 Total Cash Flow ($)",
+    "total_tax_savings": "Total SM Tax Savings ($)",
+}
+matrix_cols = st.columns(3)
+matrix_metric = matrix_cols[0].selectbox(
+    "Matrix Metric", list(matrix_labels), index=1, format_func=matrix_labels.get
+)
+matrix_rebalancing = matrix_cols[1].selectbox(
+    "Heatmap Rebalancing",
+    matrix_axes["rebalancing_action"],
+    index=matrix_axes["rebalancing_action"].index(scenario_inputs["rebalancing_action"]),
+)
+matrix_tax = matrix_cols[2].selectbox(
+    "Heatmap Tax Change",
+    matrix_axes["future_tax_change"],
+    index=matrix_axes["future_tax_change"].index(scenario_inputs["future_tax_change"]),
+)
+fig_matrix = px.imshow(
+    matrix[matrix_metric][
+        :,
+        :,
+        matrix_axes["rebalancing_action"].index(matrix_rebalancing),
+        matrix_axes["future_tax_change"].index(matrix_tax),
+    ],
+    labels=dict(x="Macroeconomic Scenario", y="Stress Test", color=matrix_labels[matrix_metric]),
+    x=list(matrix_axes["macro_scenario"]),
+    y=list(matrix_axes["stress_test"]),
+    color_continuous_scale="RdYlGn",
+    text_auto=".3s",
+)
+st.plotly_chart(fig_matrix, use_container_width=True)
+# One row per combination, worst outcome of the chosen metric first
+matrix_df = pd.DataFrame(
+    {field: matrix[field].ravel() for field in matrix_labels},
+    index=pd.MultiIndex.from_product(matrix_axes.values(), names=["Stress Test", "Macro", "Rebalancing", "Tax Change"]),
+).rename(columns=matrix_labels)
+matrix_df = matrix_df.sort_values(matrix_labels[matrix_metric]).reset_index()
+matrix_df.insert(0, "Rank", np.arange(1, len(matrix_df) + 1))
+st.dataframe(matrix_df.round(0), use_container_width=True, hide_index=True)
+st.caption(f"{len(matrix_df)} combinations, ranked from the worst {matrix_labels[matrix_metric]}.")
+
 # --- Export to Excel ---
 st.subheader("Export Data to Excel")
 output = io.BytesIO()
@@ -485,7 +507,29 @@ st.download_button(
 
 # --- Monte Carlo Simulation Panel ---
 st.subheader("Monte Carlo Simulation: Net Worth Distribution")
-num_simulations = st.slider("Number of Simulations", 100, 5000, 100, step=100)
+mc_mode = st.radio("Simulation Count", ["Fixed", "Adaptive (stop at target precision)"], horizontal=True)
+if mc_mode == "Fixed":
+    num_simulations = st.slider("Number of Simulations", 100, 5000, 100, step=100)
+else:
+    mc_target_half_width = st.number_input(
+        "Target 95% CI Half-Width on S1 - S2 Mean Final Net Worth ($)", 100, 1_000_000, 5_000, step=500
+    )
+    mc_time_budget = st.slider("Time Budget (seconds)", 1, 60, 10)
+    num_simulations = None
+mc_seed = st.number_input("Random Seed (same seed and inputs give the same simulations)", 0, 2**31 - 1, 42)
+MC_SAMPLERS = {"Pseudo-random": "random", "Latin Hypercube": "lhs", "Sobol (scrambled)": "sobol"}
+if not sobol_available():
+    # Sobol needs scipy, which is optional
+    del MC_SAMPLERS["Sobol (scrambled)"]
+mc_sampler = MC_SAMPLERS[st.selectbox("Sampling Method", list(MC_SAMPLERS), index=0)]
+mc_antithetic = st.checkbox("Antithetic Pairs (each path mirrored around the mean)", value=False)
+# The linear control is odd in the shocks, so every antithetic pair already averages it to its mean
+# and it cannot reduce the variance further
+mc_control_variate = st.checkbox(
+    "Control Variate (linearized run at mean inputs)", value=False, disabled=mc_antithetic
+) and not mc_antithetic
+if mc_antithetic:
+    st.caption("Control variate is off with antithetic pairs: the pairs already cancel the linear part it would remove.")
 
 # Sliders for appreciation and growth means and std devs
 pr_app_mean = st.slider("PR Appreciation Mean (%)", 0, 10, 3, step=1) / 100
@@ -522,155 +566,112 @@ mortgage_rate_std = st.slider("Mortgage Rate Std Dev (%)", 0, 10, 1, step=1) / 1
 heloc_delta_mean = st.slider("HELOC Rate Delta Mean (%)", 0, 10, 1, step=1) / 100
 heloc_delta_std = st.slider("HELOC Rate Delta Std Dev (%)", 0, 10, 0, step=1) / 100
 
+# Stochastic mortgage rate paths (fed to the amortization, HELOC interest and stress functions)
+RATE_MODELS = {
+    "Deterministic Schedule": "schedule",
+    "Vasicek (mean-reverting)": "vasicek",
+    "CIR (mean-reverting, non-negative)": "cir",
+    "Historical Bootstrap (CSV)": "bootstrap",
+}
+rate_model = RATE_MODELS[st.selectbox("Mortgage Rate Model", list(RATE_MODELS))]
+rate_reversion = 0.3
+rate_history = None
+if rate_model != "schedule":
+    rate_reversion = st.slider("Rate Mean Reversion Speed (per year)", 0.05, 2.0, 0.3, step=0.05)
+if rate_model == "bootstrap":
+    rate_history_file = st.file_uploader("Annual Rate History CSV (a 'rate' column, % or fraction)", type="csv")
+    if rate_history_file is not None:
+        rate_history = load_rate_history(rate_history_file.getvalue())
+    if rate_history is None or len(rate_history) < MIN_RATE_HISTORY:
+        st.warning(
+            f"Upload at least {MIN_RATE_HISTORY} years of rate history to bootstrap; using the deterministic schedule."
+        )
+        rate_model, rate_history = "schedule", None
+
 # Correlation matrix for key variables (simplified)
 cor_matrix = np.array([[1.0, 0.6, 0.5], [0.6, 1.0, 0.4], [0.5, 0.4, 1.0]])  # pr_app, rental_app, sm_return
 
+# How the correlated yearly appreciation/return draws reach the scenarios
+MARKET_PATHS = {"Yearly Paths": "yearly", "Yearly Paths with AR(1) Persistence": "ar1", "Mean per Path": "mean"}
+market_paths = MARKET_PATHS[st.selectbox("Appreciation/Return Dynamics", list(MARKET_PATHS))]
+ar1_phi = st.slider("AR(1) Year-to-Year Persistence", 0.0, 0.95, 0.5, step=0.05) if market_paths == "ar1" else 0.0
+
+
+mc_params = {
+    "pr_app_mean": pr_app_mean,
+    "pr_app_std": pr_app_std,
+    "prop_tax_std": prop_tax_std,
+    "pr_maintenance_mean": pr_maintenance_mean,
+    "pr_maintenance_std": pr_maintenance_std,
+    "pr_insurance_mean": pr_insurance_mean,
+    "pr_insurance_std": pr_insurance_std,
+    "rental_app_mean": rental_app_mean,
+    "rental_app_std": rental_app_std,
+    "rental_maintenance_std": rental_maintenance_std,
+    "rental_insurance_std": rental_insurance_std,
+    "rent_growth_std": rent_growth_std,
+    "vacancy_std": vacancy_std,
+    "sm_return_mean": sm_return_mean,
+    "sm_return_std": sm_return_std,
+    "income_start_std": income_start_std,
+    "income_growth_std": income_growth_std,
+    "heloc_delta_std": heloc_delta_std,
+    "cor_matrix": cor_matrix,
+    "market_paths": market_paths,
+    "ar1_phi": ar1_phi,
+    "rate_model": rate_model,
+    "mortgage_rate_mean": mortgage_rate_mean,
+    "mortgage_rate_std": mortgage_rate_std,
+    "rate_reversion": rate_reversion,
+    "rate_history": rate_history,
+}
 
-# Store all simulation results and variables for chart
-mc_results = []
-for _ in range(num_simulations):
-    # Correlated random draws for pr_app, rental_app, sm_return
-    means = [pr_app_mean, rental_app_mean, sm_return_mean]
-    stds = [pr_app_std, rental_app_std, sm_return_std]
-    cov = np.outer(stds, stds) * cor_matrix
-    pr_app_sim, rental_app_sim, sm_return_sim = np.random.multivariate_normal(means, cov, amort_years).T
-
-    # Simulate other variables
-    rent_monthly_sim = np.random.normal(rental_rent_monthly, rent_growth_std)
-    rental_vacancy_sim = np.random.normal(rental_vacancy, vacancy_std)
-    rental_prop_tax_sim = np.random.normal(rental_prop_tax_base, rental_prop_tax_base * rental_prop_tax_yoy_increase)
-    rental_insurance_sim = np.random.normal(
-        rental_insurance_base, rental_insurance_base * rental_insurance_yoy_increase
-    )
-    rental_maintenance_sim = np.random.normal(
-        rental_maintenance_base, rental_maintenance_base * rental_maintenance_yoy_increase
-    )
-    rate_schedule_sim = rate_schedule.copy()
-    income_growth_sim = np.random.normal(income_growth, income_growth_std)
-    income_start_sim = np.random.normal(income_start, income_start_std)
-    heloc_delta_sim = np.random.normal(heloc_delta, heloc_delta_std)
-
-    pr_maintenance_base_sim = np.random.normal(pr_maintenance_mean, pr_maintenance_std)
-    pr_maintenance_yoy_increase_sim = np.random.normal(pr_maintenance_yoy_increase, rent_growth_std)
-    pr_insurance_base_sim = np.random.normal(pr_insurance_mean, pr_insurance_std)
-    pr_insurance_yoy_increase_sim = np.random.normal(pr_insurance_yoy_increase, rent_growth_std)
-    pr_prop_tax_base_sim = np.random.normal(pr_prop_tax_base, prop_tax_std)
-    rental_prop_tax_base_sim = np.random.normal(rental_prop_tax_base, prop_tax_std)
-    pr_prop_tax_yoy_increase_sim = np.random.normal(pr_prop_tax_yoy_increase, rent_growth_std)
-    pr_prop_tax_list_sim = [
-        pr_prop_tax_base_sim * ((1 + pr_prop_tax_yoy_increase_sim) ** i) for i in range(amort_years)
-    ]
-    pr_maintenance_list_sim = [
-        pr_maintenance_base_sim * ((1 + pr_maintenance_yoy_increase_sim) ** i) for i in range(amort_years)
-    ]
-    pr_insurance_list_sim = [
-        pr_insurance_base_sim * ((1 + pr_insurance_yoy_increase_sim) ** i) for i in range(amort_years)
-    ]
-
-    rental_maintenance_base_sim = np.random.normal(rental_maintenance_base, rental_maintenance_std)
-    rental_maintenance_yoy_increase_sim = np.random.normal(rental_maintenance_yoy_increase, rent_growth_std)
-    rental_insurance_base_sim = np.random.normal(rental_insurance_base, rental_insurance_std)
-    rental_insurance_yoy_increase_sim = np.random.normal(rental_insurance_yoy_increase, rent_growth_std)
-    rental_maintenance_base_sim = np.random.normal(rental_maintenance_base, rental_maintenance_std)
-    rental_maintenance_yoy_increase_sim = np.random.normal(rental_maintenance_yoy_increase, rent_growth_std)
-    rental_prop_tax_yoy_increase_sim = np.random.normal(rental_prop_tax_yoy_increase, rent_growth_std)
-    rental_prop_tax_list_sim = [
-        rental_prop_tax_base_sim * ((1 + rental_prop_tax_yoy_increase_sim) ** i) for i in range(amort_years)
-    ]
-    rental_insurance_list_sim = [
-        rental_insurance_base_sim * ((1 + rental_insurance_yoy_increase_sim) ** i) for i in range(amort_years)
-    ]
-    rental_maintenance_list_sim = [
-        rental_maintenance_base_sim * ((1 + rental_maintenance_yoy_increase_sim) ** i) for i in range(amort_years)
-    ]
-    rental_maintenance_list_sim = [
-        rental_maintenance_base_sim * ((1 + rental_maintenance_yoy_increase_sim) ** i) for i in range(amort_years)
-    ]
-
-    # Apply stress/macro to each simulation
-    (
-        adj_pr_app,
-        adj_rental_app,
-        adj_sm_return,
-        adj_rent_monthly,
-        adj_vacancy,
-        adj_prop_tax,
-        adj_insurance,
-        adj_maintenance,
-        adj_rate_schedule,
-    ) = apply_stress_and_macro(
-        pr_app_sim.mean(),
-        rental_app_sim.mean(),
-        sm_return_sim.mean(),
-        rent_monthly_sim,
-        rental_vacancy_sim,
-        rental_prop_tax_sim,
-        rental_insurance_sim,
-        rental_maintenance_sim,
-        rate_schedule_sim,
-        stress_test,
-        macro_scenario,
-    )
-
-    s1_equity_sim, _ = scenario1_cashflow(
-        pr_price,
-        rental_price,
-        down_pr1,
-        rate_schedule_sim,
-        amort_years,
-        adj_rental_app,
-        adj_pr_app,
-        heloc_delta,
-        adj_rent_monthly,
-        adj_vacancy,
-        rental_prop_tax_list_sim,
-        rental_insurance_list_sim,
-        rental_maintenance_list_sim,
-        rental_purchase_year,
-        pr_prop_tax_list_sim,
-        pr_insurance_list_sim,
-        pr_maintenance_list_sim,
+# Run all simulations at once; every entry is an array over simulated paths
+mc_key = canonical_key(
+    {
+        "inputs": {name: scenario_inputs[name] for name in MONTE_CARLO_INPUTS},
+        "mc_params": mc_params,
+        "n": num_simulations,
+        "seed": mc_seed,
+        "sampler": mc_sampler,
+        "antithetic": mc_antithetic,
+        "control_variate": mc_control_variate,
+        "adaptive": None if num_simulations else (mc_target_half_width, mc_time_budget),
+    }
+)
+if mc_mode == "Fixed":
+    mc_results = run_monte_carlo(
+        mc_key, scenario_inputs, mc_params, num_simulations, int(mc_seed), mc_sampler, mc_antithetic, mc_control_variate
     )
-    s2_equity_sim, _, _ = scenario2_cashflow(
-        pr_price,
-        adj_sm_return,
-        down_pr2,
-        rate_schedule_sim,
-        amort_years,
-        income_start_sim,
-        income_growth_sim,
-        adj_pr_app,
-        heloc_loan,
-        heloc_delta_sim,
-        sm_principal,
-        pr_prop_tax_list_sim,
-        pr_insurance_list_sim,
-        pr_maintenance_list_sim,
+else:
+    mc_adaptive = run_adaptive_monte_carlo(
+        mc_key,
+        scenario_inputs,
+        mc_params,
+        mc_target_half_width,
+        mc_time_budget,
+        int(mc_seed),
+        mc_sampler,
+        mc_antithetic,
+        mc_control_variate,
     )
-    # Store results for chart
-    mc_results.append(
-        {
-            "s1_equity_sim": s1_equity_sim,
-            "s2_equity_sim": s2_equity_sim,
-            "pr_app_sim": adj_pr_app,
-            "rental_app_sim": adj_rental_app,
-            "sm_return_sim": adj_sm_return,
-            "rent_monthly_sim": rent_monthly_sim,
-            "vacancy_sim": rental_vacancy_sim,
-            "prop_tax_sim": rental_prop_tax_sim,
-            "insurance_sim": rental_insurance_sim,
-            "maintenance_sim": rental_maintenance_sim,
-            "mortgage_rate_sim": np.mean(list(rate_schedule_sim.values())),
-            "income_growth_sim": income_growth_sim,
-            "income_start_sim": income_start_sim,
-            "heloc_delta_sim": heloc_delta_sim,
-        }
+    mc_results = mc_adaptive["results"]
+    num_simulations = mc_adaptive["num_simulations"]
+    stop_reason = "target precision reached" if mc_adaptive["converged"] else "time budget or path cap reached"
+    st.write(
+        f"Adaptive run: {num_simulations:,} paths in {mc_adaptive['elapsed']:.1f}s ({stop_reason}); "
+        f"final 95% CI half-width {mc_adaptive['history'][-1][1]:,.0f}"
     )
+    if num_simulations > ADAPTIVE_CHART_PATHS:
+        st.caption(
+            f"Charts and path statistics show the first {ADAPTIVE_CHART_PATHS:,} paths; "
+            "the mean estimates and confidence intervals use all of them."
+        )
 
 
 # Extract final net worth arrays from mc_results
-final_networth_s1 = [r["s1_equity_sim"][-1] for r in mc_results]
-final_networth_s2 = [r["s2_equity_sim"][-1] for r in mc_results]
+final_networth_s1 = mc_results["s1_equity_sim"][:, -1]
+final_networth_s2 = mc_results["s2_equity_sim"][:, -1]
 
 # Histogram of final net worth
 fig_mc = px.histogram(
@@ -683,50 +684,15 @@ fig_mc = px.histogram(
 fig_mc.update_traces(opacity=0.6)
 st.plotly_chart(fig_mc, use_container_width=True)
 
-# Line chart of mean net worth over amort_years
-
-# Prepare DataFrame for all paths
-
-# Store all simulation variables for hover
-mc_vars_s1 = []
-
-
 years_range = np.arange(1, amort_years + 1)
-df_paths = pd.DataFrame()
-if "mc_results" in locals():
-    for i, result in enumerate(mc_results):
-        # Scenario 1
-        df1 = pd.DataFrame(
-            {
-                "Year": years_range,
-                "Net Worth": result["s1_equity_sim"],
-                "Scenario": f"Scenario 1 (Sim {i+1})",
-                **{k: [v] * amort_years for k, v in result.items() if k not in ["s1_equity_sim", "s2_equity_sim"]},
-            }
-        )
-        df_paths = pd.concat([df_paths, df1], ignore_index=True)
-        # Scenario 2
-        df2 = pd.DataFrame(
-            {
-                "Year": years_range,
-                "Net Worth": result["s2_equity_sim"],
-                "Scenario": f"Scenario 2 (Sim {i+1})",
-                **{k: [v] * amort_years for k, v in result.items() if k not in ["s1_equity_sim", "s2_equity_sim"]},
-            }
-        )
-        df_paths = pd.concat([df_paths, df2], ignore_index=True)
-
-    # Add mean lines (no hover vars)
-    mean_networth_s1 = np.mean([r["s1_equity_sim"] for r in mc_results], axis=0)
-    mean_networth_s2 = np.mean([r["s2_equity_sim"] for r in mc_results], axis=0)
-    df_paths = pd.concat(
-        [
-            df_paths,
-            pd.DataFrame({"Year": years_range, "Net Worth": mean_networth_s1, "Scenario": "Scenario 1 Mean"}),
-            pd.DataFrame({"Year": years_range, "Net Worth": mean_networth_s2, "Scenario": "Scenario 2 Mean"}),
-        ],
-        ignore_index=True,
-    )
+path_chart_mode = st.radio("Path Chart Mode", ["Percentile Bands", "Individual Paths"], horizontal=True)
+max_chart_paths = st.slider("Max Individual Paths Drawn", 0, 1000, 50, step=10)
+if "mc_results" in locals() and path_chart_mode == "Percentile Bands":
+    st.plotly_chart(monte_carlo_fan_chart(mc_results, years_range, max_chart_paths), use_container_width=True)
+elif "mc_results" in locals():
+    # One trace per drawn path, so only a capped sample is sent to the browser
+    path_idx = sample_path_indices(len(mc_results["s1_equity_sim"]), max_chart_paths)
+    df_paths = monte_carlo_paths_frame(mc_results, years_range, path_idx)
     fig_mc_line = px.line(
         df_paths,
         x="Year",
@@ -755,140 +721,58 @@ if "mc_results" in locals():
     fig_mc_line.update_traces(line=dict(width=1), opacity=0.15, selector=lambda trace: "Mean" not in trace.name)
     fig_mc_line.update_traces(line=dict(width=4), opacity=1, selector=lambda trace: "Mean" in trace.name)
     st.plotly_chart(fig_mc_line, use_container_width=True)
+if "mc_results" in locals():
     st.write(
         f"Scenario 1 Final Net Worth: Mean = {np.mean(final_networth_s1):,.0f}, Std = {np.std(final_networth_s1):,.0f}"
-        f" | PR appreciation: {np.mean([r['pr_app_sim'] for r in mc_results]):.2%}, "
-        f"Rental appreciation: {np.mean([r['rental_app_sim'] for r in mc_results]):.2%}, "
-        f"SM return: {np.mean([r['sm_return_sim'] for r in mc_results]):.2%}, "
-        f"rent monthly: {np.mean([r['rent_monthly_sim'] for r in mc_results]):,.0f}, "
-        f"vacancy: {np.mean([r['vacancy_sim'] for r in mc_results]):.2%}, "
-        f"prop tax: {np.mean([r['prop_tax_sim'] for r in mc_results]):,.0f}, "
-        f"insurance: {np.mean([r['insurance_sim'] for r in mc_results]):,.0f}, "
-        f"maintenance: {np.mean([r['maintenance_sim'] for r in mc_results]):,.0f}, "
-        f"mortgage rate: {np.mean([r['mortgage_rate_sim'] for r in mc_results]):.2%}, "
-        f"income growth: {np.mean([r['income_growth_sim'] for r in mc_results]):.2%}, "
-        f"income_start: {np.mean([r['income_start_sim'] for r in mc_results]):,.0f}, "
-        f"heloc_delta: {np.mean([r['heloc_delta_sim'] for r in mc_results]):.2%}"
+        f" | PR appreciation: {np.mean(mc_results['pr_app_sim']):.2%}, "
+        f"Rental appreciation: {np.mean(mc_results['rental_app_sim']):.2%}, "
+        f"SM return: {np.mean(mc_results['sm_return_sim']):.2%}, "
+        f"rent monthly: {np.mean(mc_results['rent_monthly_sim']):,.0f}, "
+        f"vacancy: {np.mean(mc_results['vacancy_sim']):.2%}, "
+        f"prop tax: {np.mean(mc_results['prop_tax_sim']):,.0f}, "
+        f"insurance: {np.mean(mc_results['insurance_sim']):,.0f}, "
+        f"maintenance: {np.mean(mc_results['maintenance_sim']):,.0f}, "
+        f"mortgage rate: {np.mean(mc_results['mortgage_rate_sim']):.2%}, "
+        f"income growth: {np.mean(mc_results['income_growth_sim']):.2%}, "
+        f"income_start: {np.mean(mc_results['income_start_sim']):,.0f}, "
+        f"heloc_delta: {np.mean(mc_results['heloc_delta_sim']):.2%}"
     )
     st.write(
         f"Scenario 2 Final Net Worth: Mean = {np.mean(final_networth_s2):,.0f}, Std = {np.std(final_networth_s2):,.0f}"
-        f" | pr appreciation: {np.mean([r['pr_app_sim'] for r in mc_results]):.2%}, "
-        f"rental appreciation: {np.mean([r['rental_app_sim'] for r in mc_results]):.2%}, "
-        f"SM return: {np.mean([r['sm_return_sim'] for r in mc_results]):.2%}, "
-        f"rent_monthly: {np.mean([r['rent_monthly_sim'] for r in mc_results]):,.0f}, "
-        f"vacancy: {np.mean([r['vacancy_sim'] for r in mc_results]):.2%}, "
-        f"prop_tax: {np.mean([r['prop_tax_sim'] for r in mc_results]):,.0f}, "
-        f"insurance: {np.mean([r['insurance_sim'] for r in mc_results]):,.0f}, "
-        f"maintenance: {np.mean([r['maintenance_sim'] for r in mc_results]):,.0f}, "
-        f"mortgage rate: {np.mean([r['mortgage_rate_sim'] for r in mc_results]):.2%}, "
-        f"income growth: {np.mean([r['income_growth_sim'] for r in mc_results]):.2%}, "
-        f"income start: {np.mean([r['income_start_sim'] for r in mc_results]):,.0f}, "
-        f"heloc delta: {np.mean([r['heloc_delta_sim'] for r in mc_results]):.2%}"
+        f" | pr appreciation: {np.mean(mc_results['pr_app_sim']):.2%}, "
+        f"rental appreciation: {np.mean(mc_results['rental_app_sim']):.2%}, "
+        f"SM return: {np.mean(mc_results['sm_return_sim']):.2%}, "
+        f"rent_monthly: {np.mean(mc_results['rent_monthly_sim']):,.0f}, "
+        f"vacancy: {np.mean(mc_results['vacancy_sim']):.2%}, "
+        f"prop_tax: {np.mean(mc_results['prop_tax_sim']):,.0f}, "
+        f"insurance: {np.mean(mc_results['insurance_sim']):,.0f}, "
+        f"maintenance: {np.mean(mc_results['maintenance_sim']):,.0f}, "
+        f"mortgage rate: {np.mean(mc_results['mortgage_rate_sim']):.2%}, "
+        f"income growth: {np.mean(mc_results['income_growth_sim']):.2%}, "
+        f"income start: {np.mean(mc_results['income_start_sim']):,.0f}, "
+        f"heloc delta: {np.mean(mc_results['heloc_delta_sim']):.2%}"
     )
-
-# --- Amortization Table: Principal Residence ---
-st.subheader("Amortization Table: Principal Residence")
-pr_loan = pr_price * (1 - down_pr1)
-pr_interest_rate = rate_schedule[max(rate_schedule.keys())] if rate_schedule else 0.0395
-pr_monthly_rate = pr_interest_rate / 12
-pr_n_months = amort_years * 12
-pr_monthly_payment = pr_loan * pr_monthly_rate / (1 - (1 + pr_monthly_rate) ** -pr_n_months)
-# Get monthly balances for PR
-_, pr_monthly_balances = mortgage_balance_schedule(pr_loan, amort_years, rate_schedule)
-pr_years = np.arange(1, amort_years + 1)
-pr_eoy_balances = [pr_monthly_balances[min(i * 12, len(pr_monthly_balances) - 1)] for i in range(amort_years)]
-pr_principal_paid = [
-    (
-        (
-            pr_monthly_balances[min((i - 1) * 12, len(pr_monthly_balances) - 1)]
-            - pr_monthly_balances[min(i * 12, len(pr_monthly_balances) - 1)]
-        )
-        if i > 0
-        else (pr_loan - pr_monthly_balances[min(12, len(pr_monthly_balances) - 1)])
-    )
-    for i in range(amort_years)
-]
-pr_interest_paid = [
-    sum(
-        [
-            pr_monthly_balances[min(j, len(pr_monthly_balances) - 1)] * pr_monthly_rate
-            for j in range(i * 12 if i > 0 else 0, min((i + 1) * 12, len(pr_monthly_balances)))
-        ]
+    # Mean final net worth with standard errors and 95% confidence intervals, using the control
+    # variate and QMC/antithetic replicate groups when enabled
+    mc_estimates = monte_carlo_estimates(mc_results) if mc_mode == "Fixed" else mc_adaptive["estimates"]
+    st.dataframe(
+        pd.DataFrame(
+            {
+                label: {
+                    "Mean Final Net Worth ($)": f"{est['mean']:,.0f}",
+                    "Std Error ($)": f"{est['standard_error']:,.0f}",
+                    "95% CI ($)": f"{est['ci_low']:,.0f} to {est['ci_high']:,.0f}",
+                }
+                for label, est in zip(("Scenario 1", "Scenario 2", "Difference (S1 - S2)"), mc_estimates.values())
+            }
+        ).T
     )
-    for i in range(amort_years)
-]
-pr_total_monthly = [pr_monthly_payment * 12 for _ in range(amort_years)]
-pr_expenses_col = [pr_prop_tax_list[i] + pr_insurance_list[i] + pr_maintenance_list[i] for i in range(amort_years)]
-pr_amort_df = pd.DataFrame(
-    {
-        "Year": pr_years,
-        "End-of-Year Balance": pr_eoy_balances,
-        "Principal Paid": pr_principal_paid,
-        "Interest Paid": pr_interest_paid,
-        "Total Payment": pr_total_monthly,
-        "Expenses": pr_expenses_col,
-    }
+
+# --- Amortization Tables ---
+pr_amort_df, rental_amort_df = run_amortization_tables(
+    canonical_key(scenario_inputs, AMORTIZATION_INPUTS), scenario_inputs
 )
+st.subheader("Amortization Table: Principal Residence")
 st.dataframe(pr_amort_df, use_container_width=True)
-
-# --- Amortization Table: Rental Property ---
 st.subheader("Amortization Table: Rental Property")
-rental_down_payment = rental_price * 0.2
-rental_loan = rental_price - rental_down_payment
-rental_interest_rate = pr_interest_rate  # Assume same rate for simplicity
-rental_monthly_rate = rental_interest_rate / 12
-rental_n_months = amort_years * 12
-rental_monthly_payment = rental_loan * rental_monthly_rate / (1 - (1 + rental_monthly_rate) ** -rental_n_months)
-# Get monthly balances for Rental
-_, rental_monthly_balances = mortgage_balance_schedule(rental_loan, amort_years, rate_schedule)
-rental_years = np.arange(1, amort_years + 1)
-rental_eoy_balances = [
-    rental_monthly_balances[min(i * 12, len(rental_monthly_balances) - 1)] for i in range(amort_years)
-]
-rental_principal_paid = [
-    (
-        (
-            rental_monthly_balances[min((i - 1) * 12, len(rental_monthly_balances) - 1)]
-            - rental_monthly_balances[min(i * 12, len(rental_monthly_balances) - 1)]
-        )
-        if i > 0
-        else (rental_loan - rental_monthly_balances[min(12, len(rental_monthly_balances) - 1)])
-    )
-    for i in range(amort_years)
-]
-rental_interest_paid = [
-    sum(
-        [
-            rental_monthly_balances[min(j, len(rental_monthly_balances) - 1)] * rental_monthly_rate
-            for j in range(i * 12 if i > 0 else 0, min((i + 1) * 12, len(rental_monthly_balances)))
-        ]
-    )
-    for i in range(amort_years)
-]
-rental_total_monthly = [rental_monthly_payment * 12 for _ in range(amort_years)]
-rental_expenses_col = [
-    rental_prop_tax_list[i] + rental_insurance_list[i] + rental_maintenance_list[i] for i in range(amort_years)
-]
-readvanceable_pr_principal = []
-rent_contribution = []
-for year in range(1, amort_years + 1):
-    months_paid = year * 12
-    principal_paid = pr_loan - pr_monthly_balances[min(months_paid - 1, len(pr_monthly_balances) - 1)]
-    total_rental_payment = rental_loan / amort_years
-    pr_contrib = min(principal_paid, total_rental_payment)
-    rent_contrib = total_rental_payment - pr_contrib
-    readvanceable_pr_principal.append(pr_contrib)
-    rent_contribution.append(rent_contrib)
-rental_amort_df = pd.DataFrame(
-    {
-        "Year": rental_years,
-        "End-of-Year Balance": rental_eoy_balances,
-        "Principal Paid": rental_principal_paid,
-        "Interest Paid": rental_interest_paid,
-        "Total Payment": rental_total_monthly,
-        "Expenses": rental_expenses_col,
-        "Re-advanceable PR Principal": readvanceable_pr_principal,
-        "Rent Contribution": rent_contribution,
-    }
-)
 st.dataframe(rental_amort_df, use_container_width=True)
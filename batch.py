@@ -0,0 +1,83 @@
+# Headless batch runner: python batch.py scenarios.csv -o results.csv
+# Reads scenario definitions from a CSV or JSONL file (one scenario per row/line, columns named like
+# the sidebar inputs, fractions not percent, rate_schedule as "1:3.95,3:3.45,5:3.25"), projects them
+# through pipeline.py and streams one result row per scenario. Fields a row leaves out take the
+# sidebar defaults from config.SCENARIO_DEFAULTS.
+import argparse
+import csv
+import json
+import sys
+import time
+
+from parallel import iter_projections_parallel
+from pipeline import SUMMARY_FIELDS, iter_projections
+
+
+def read_records(path, fmt):
+    # Lazily yield one dict per scenario so large files are never fully loaded
+    with (sys.stdin if path == "-" else open(path, newline="")) as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _format(path, fmt):
+    if fmt:
+        return fmt
+    return "jsonl" if path.endswith((".jsonl", ".json")) else "csv"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Project many PR vs SM scenarios without the Streamlit app.")
+    parser.add_argument("scenarios", help="CSV or JSONL scenario file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="Results file (CSV or JSONL), default stdout")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"], help="Default: from the file extension")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"], help="Default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="Scenarios projected per vectorized batch")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (0: one per core)")
+    parser.add_argument("--stress", action="store_true", help="Apply each row's stress_test/macro_scenario")
+    parser.add_argument("--yearly", action="store_true", help="Include the yearly equity paths of both scenarios")
+    parser.add_argument("--id-field", default="id", help="Input field copied to the results as the scenario id")
+    args = parser.parse_args(argv)
+
+    in_fmt = _format(args.scenarios, args.input_format)
+    out_fmt = _format(args.output, args.output_format)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    writer = None
+    count = 0
+    start = time.perf_counter()
+    try:
+        records = read_records(args.scenarios, in_fmt)
+        if args.workers == 1:
+            projections = iter_projections(records, args.chunk_size, args.stress)
+        else:
+            projections = iter_projections_parallel(records, args.chunk_size, args.workers or None, args.stress)
+        for record, result in projections:
+            row = {"id": record.get(args.id_field, count + 1)}
+            row.update({name: round(result[name], 2) for name in SUMMARY_FIELDS})
+            if args.yearly:
+                row["s1_equity"] = [round(v, 2) for v in result["s1_equity"].tolist()]
+                row["s2_equity"] = [round(v, 2) for v in result["s2_equity"].tolist()]
+            if out_fmt == "jsonl":
+                out.write(json.dumps(row) + "\n")
+            else:
+                if writer is None:
+                    writer = csv.DictWriter(out, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow({k: " ".join(map(str, v)) if isinstance(v, list) else v for k, v in row.items()})
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{count} scenarios in {elapsed:.2f}s ({count / max(elapsed, 1e-9):,.0f} scenarios/s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
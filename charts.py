@@ -1,13 +1,16 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
-import plotly.express as px
+import plotly.graph_objects as go
 from models import mortgage_balance_schedule
+from optimizer import pareto_front
+from rates import RateSchedule
 
 
 def amortization_table_pr(
     pr_loan, amort_years, rate_schedule, pr_prop_tax_list, pr_condo_fee, pr_insurance, pr_maintenance_list
 ):
-    pr_interest_rate = rate_schedule[max(rate_schedule.keys())] if rate_schedule else 0.0395
+    pr_interest_rate = RateSchedule.coerce(rate_schedule, amort_years).rate(amort_years)
     pr_monthly_rate = pr_interest_rate / 12
     _, pr_monthly_balances = mortgage_balance_schedule(pr_loan, amort_years, rate_schedule)
     pr_years = range(1, amort_years + 1)
@@ -49,7 +52,7 @@ def amortization_table_rental(
     pr_loan,
     pr_monthly_balances,
 ):
-    rental_interest_rate = rate_schedule[max(rate_schedule.keys())] if rate_schedule else 0.0395
+    rental_interest_rate = RateSchedule.coerce(rate_schedule, amort_years).rate(amort_years)
     rental_monthly_rate = rental_interest_rate / 12
     _, rental_monthly_balances = mortgage_balance_schedule(rental_loan, amort_years, rate_schedule)
     rental_years = range(1, amort_years + 1)
@@ -94,4 +97,154 @@ def amortization_table_rental(
     return df
 
 
+def sample_path_indices(n_paths, max_paths):
+    # Evenly spaced, deterministic subset of at most max_paths path indices
+    if n_paths <= max_paths:
+        return np.arange(n_paths)
+    return np.linspace(0, n_paths - 1, max_paths).round().astype(int)
+
+
+def monte_carlo_paths_frame(mc_results, years, path_idx=None):
+    # Long-format frame of the simulated paths (all, or only path_idx) plus the two mean paths over
+    # all simulations, built once from preallocated columns. Per-path hover variables are repeated
+    # with np.repeat and left NaN on the mean rows; the Scenario label is categorical so the
+    # 2 * paths labels are stored once.
+    if path_idx is None:
+        path_idx = np.arange(len(mc_results["s1_equity_sim"]))
+    s1_paths, s2_paths = mc_results["s1_equity_sim"][path_idx], mc_results["s2_equity_sim"][path_idx]
+    n_paths, n_years = s1_paths.shape
+    n_lines = 2 * n_paths + 2
+    net_worth = np.empty((n_lines, n_years))
+    # Rows alternate Scenario 1 / Scenario 2 per simulation, then the means
+    net_worth[0 : 2 * n_paths : 2] = s1_paths
+    net_worth[1 : 2 * n_paths : 2] = s2_paths
+    net_worth[-2] = mc_results["s1_equity_sim"].mean(axis=0)
+    net_worth[-1] = mc_results["s2_equity_sim"].mean(axis=0)
+    sim_labels = (np.asarray(path_idx) + 1).astype(str)
+    categories = np.empty(n_lines, dtype=object)
+    categories[0 : 2 * n_paths : 2] = np.char.add(np.char.add("Scenario 1 (Sim ", sim_labels), ")")
+    categories[1 : 2 * n_paths : 2] = np.char.add(np.char.add("Scenario 2 (Sim ", sim_labels), ")")
+    categories[-2:] = ["Scenario 1 Mean", "Scenario 2 Mean"]
+    columns = {
+        "Year": np.tile(years, n_lines),
+        "Net Worth": net_worth.ravel(),
+        "Scenario": pd.Categorical.from_codes(np.repeat(np.arange(n_lines), n_years), categories=categories),
+    }
+    for name, values in mc_results.items():
+        if name in ("s1_equity_sim", "s2_equity_sim") or not name.endswith("_sim"):
+            continue
+        column = np.full(n_lines * n_years, np.nan)
+        column[: 2 * n_paths * n_years] = np.repeat(np.asarray(values, dtype=float)[path_idx], 2 * n_years)
+        columns[name] = column
+    return pd.DataFrame(columns)
+
+
+FAN_PERCENTILES = (5, 25, 50, 75, 95)
+FAN_COLORS = {"Scenario 1": "31, 119, 180", "Scenario 2": "255, 127, 14"}
+
+
+def monte_carlo_fan_chart(mc_results, years, max_paths=50):
+    # Percentile fan (P5-P95 and P25-P75 bands, median, mean) computed server-side, plus a capped,
+    # deterministic sample of individual paths drawn as one gap-separated trace per scenario. The
+    # figure has at most 6 traces per scenario whatever the number of simulations.
+    fig = go.Figure()
+    path_idx = sample_path_indices(len(mc_results["s1_equity_sim"]), max_paths)
+    for scenario, key in (("Scenario 1", "s1_equity_sim"), ("Scenario 2", "s2_equity_sim")):
+        paths = mc_results[key]
+        rgb = FAN_COLORS[scenario]
+        p5, p25, p50, p75, p95 = np.percentile(paths, FAN_PERCENTILES, axis=0)
+        for lower, upper, label, alpha in ((p5, p95, "P5-P95", 0.15), (p25, p75, "P25-P75", 0.3)):
+            fig.add_trace(
+                go.Scatter(
+                    x=np.concatenate((years, years[::-1])),
+                    y=np.concatenate((upper, lower[::-1])),
+                    fill="toself",
+                    fillcolor=f"rgba({rgb}, {alpha})",
+                    line=dict(width=0),
+                    hoverinfo="skip",
+                    name=f"{scenario} {label}",
+                    legendgroup=scenario,
+                )
+            )
+        if len(path_idx):
+            # NaN after each path breaks the line, so all sampled paths share one trace
+            sample = np.full((len(path_idx), len(years) + 1), np.nan)
+            sample[:, :-1] = paths[path_idx]
+            fig.add_trace(
+                go.Scatter(
+                    x=np.tile(np.append(years, np.nan), len(path_idx)),
+                    y=sample.ravel(),
+                    customdata=np.repeat(path_idx + 1, len(years) + 1),
+                    mode="lines",
+                    line=dict(width=1, color=f"rgba({rgb}, 0.25)"),
+                    hovertemplate="Sim %{customdata}<br>Year %{x}<br>$%{y:,.0f}<extra></extra>",
+                    name=f"{scenario} Sample Paths ({len(path_idx)})",
+                    legendgroup=scenario,
+                )
+            )
+        fig.add_trace(
+            go.Scatter(x=years, y=p50, line=dict(width=2, dash="dash", color=f"rgb({rgb})"), name=f"{scenario} Median")
+        )
+        fig.add_trace(
+            go.Scatter(x=years, y=paths.mean(axis=0), line=dict(width=4, color=f"rgb({rgb})"), name=f"{scenario} Mean")
+        )
+    fig.update_layout(
+        title="Monte Carlo Simulation: Net Worth Percentile Bands and Sample Paths",
+        xaxis_title="Year",
+        yaxis_title="Net Worth ($)",
+    )
+    return fig
+
+
+def pareto_frontier_chart(frontier, x="Net Worth", y="Risk", max_points=5000):
+    # Scatter of evaluated plans (optimizer.pareto_frontier or optimize_scenario results) on two
+    # objectives: a capped, deterministic sample of all plans, the plans on the Pareto front over
+    # all objectives, and the two-objective frontier of x against y as a line. Hover shows each
+    # plan's inputs.
+    objectives, candidates = frontier["objectives"], frontier["candidates"]
+    names = list(candidates)
+    inputs = np.column_stack([candidates[name] for name in names])
+    hover = "<br>".join(f"{name}: %{{customdata[{i}]:,.2f}}" for i, name in enumerate(names))
+    hovertemplate = f"{x}: %{{x:,.0f}}<br>{y}: %{{y:,.0f}}<br>{hover}<extra></extra>"
+    xy = np.column_stack((objectives[x], objectives[y]))
+    on_front = np.zeros(len(xy), dtype=bool)
+    on_front[frontier["pareto"]] = True
+    fig = go.Figure()
+    for label, idx, marker in (
+        ("Plans", np.flatnonzero(~on_front), dict(size=4, color="rgba(150, 150, 150, 0.35)")),
+        ("Pareto Front (all objectives)", np.flatnonzero(on_front), dict(size=6, color="rgba(31, 119, 180, 0.8)")),
+    ):
+        idx = idx[sample_path_indices(len(idx), max_points)]
+        fig.add_trace(
+            go.Scattergl(
+                x=xy[idx, 0],
+                y=xy[idx, 1],
+                customdata=inputs[idx],
+                mode="markers",
+                marker=marker,
+                hovertemplate=hovertemplate,
+                name=f"{label} ({len(idx)} shown)",
+            )
+        )
+    frontier_idx = pareto_front(xy)
+    frontier_idx = frontier_idx[np.argsort(xy[frontier_idx, 0], kind="stable")]
+    fig.add_trace(
+        go.Scatter(
+            x=xy[frontier_idx, 0],
+            y=xy[frontier_idx, 1],
+            customdata=inputs[frontier_idx],
+            mode="lines+markers",
+            line=dict(width=2, color="rgb(255, 127, 14)"),
+            hovertemplate=hovertemplate,
+            name=f"{x} vs {y} Frontier",
+        )
+    )
+    fig.update_layout(
+        title=f"{frontier['scenario']}: Pareto Frontier of {x} vs {y}",
+        xaxis_title=x,
+        yaxis_title=y,
+    )
+    return fig
+
+
 # Add more chart functions as needed...
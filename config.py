@@ -1,4 +1,56 @@
 # Default parameters, ranges, and constants for the app
 
 YEARS_DEFAULT = 10
+
+# Sidebar defaults as a scenario inputs dict (fractions, not percent), used to fill in the fields a
+# batch scenario file leaves out. rate_schedule uses the sidebar's "year:rate %" text format.
+SCENARIO_DEFAULTS = {
+    "pr_price": 1_300_000,
+    "rental_price": 800_000,
+    "down_pr1": 0.10,
+    "down_pr2": 0.20,
+    "amort_years": 30,
+    "pr_app": 0.03,
+    "rental_app": 0.05,
+    "income_start": 250_000,
+    "income_growth": 0.03,
+    "heloc_loan": 250_000,
+    "heloc_delta": 0.01,
+    "sm_principal": 250_000,
+    "marginal_tax_rate": 0.50,
+    "pr_prop_tax_base": 4_000,
+    "pr_prop_tax_yoy_increase": 0.02,
+    "pr_insurance_base": 1_200,
+    "pr_insurance_yoy_increase": 0.02,
+    "pr_maintenance_base": 2_000,
+    "pr_maintenance_yoy_increase": 0.02,
+    "rental_rent_monthly": 4_000,
+    "rental_vacancy": 0.05,
+    "rental_prop_tax_base": 5_000,
+    "rental_prop_tax_yoy_increase": 0.02,
+    "rental_insurance_base": 1_500,
+    "rental_insurance_yoy_increase": 0.02,
+    "rental_maintenance_base": 2_000,
+    "rental_maintenance_yoy_increase": 0.02,
+    "rental_purchase_year": 0,
+    "rate_schedule": "1:3.95,3:3.45,5:3.25",
+    "sm_return": 0.05,
+    "cashflow_resolution": "annual",
+    "payment_frequency": "monthly",
+    "purchase_month": 1,
+    "stress_test": "None",
+    "macro_scenario": "Base Case",
+    "rebalancing_action": "None",
+    "drawdown_amount": 0,
+    "future_tax_change": "None",
+}
+# Extra shocks offered next to the built-in ones, by selectbox: {group: {choice name: ops}} with
+# group one of stress_test, macro_scenario, rebalancing_action, future_tax_change and ops a list of
+# operation dicts (see shocks.py), applied in order. For example:
+#   "stress_test": {"Stagflation": [
+#       {"op": "add", "target": "rate_schedule", "value": 0.03, "years": (1, 5)},
+#       {"op": "scale", "target": "rental_rent_monthly", "value": 0.9},
+#       {"op": "scale", "target": "rental_maintenance_base", "value": 1.3},
+#   ]}
+CUSTOM_SHOCKS = {}
 # ...add more as needed...
@@ -1,5 +1,8 @@
 import streamlit as st
 
+from rates import RateSchedule, parse_rate_text
+from utils import MACRO_SCENARIOS, REBALANCING_ACTIONS, STRESS_TESTS, TAX_CHANGES
+
 
 def get_sidebar_inputs():
     sidebar = st.sidebar
@@ -22,7 +25,8 @@ def get_sidebar_inputs():
     sidebar.subheader("Principal Residence Expenses")
     pr_prop_tax_base = sidebar.number_input("PR Base Property Tax ($)", 0, 50_000, 4_000, step=500)
     pr_prop_tax_yoy_increase = sidebar.slider("PR Property Tax YoY Increase (%)", 0, 10, 2, step=1) / 100
-    pr_insurance = sidebar.number_input("PR Annual Insurance", 0, 10_000, 1_200, step=500)
+    pr_insurance_base = sidebar.number_input("PR Base Annual Insurance ($)", 0, 10_000, 1_200, step=500)
+    pr_insurance_yoy_increase = sidebar.slider("PR Insurance YoY Increase (%)", 0, 10, 2, step=1) / 100
     pr_maintenance_base = sidebar.number_input("PR Annual Maintenance ($)", 0, 12_000, 2_000, step=500)
     pr_maintenance_yoy_increase = sidebar.slider("PR Maintenance YoY Increase (%)", 0, 10, 2, step=1) / 100
 
@@ -32,35 +36,10 @@ def get_sidebar_inputs():
     rental_vacancy = sidebar.slider("Vacancy Rate (%)", 0, 20, 5, step=1) / 100
     rental_prop_tax_base = sidebar.number_input("Rental Base Property Tax ($)", 0, 50_000, 5_000, step=500)
     rental_prop_tax_yoy_increase = sidebar.slider("Rental Property Tax YoY Increase (%)", 0, 10, 2, step=1) / 100
-    rental_insurance = sidebar.number_input("Rental Annual Insurance", 0, 50_000, 1_500, step=500)
+    rental_insurance_base = sidebar.number_input("Rental Base Annual Insurance ($)", 0, 50_000, 1_500, step=500)
+    rental_insurance_yoy_increase = sidebar.slider("Rental Insurance YoY Increase (%)", 0, 10, 2, step=1) / 100
     rental_maintenance_base = sidebar.number_input("Rental Base Maintenance ($)", 0, 50_000, 2_000, step=500)
     rental_maintenance_yoy_increase = sidebar.slider("Rental Maintenance YoY Increase (%)", 0, 10, 2, step=1) / 100
-    rental_mgmt_fee = sidebar.slider("Property Management Fee (%)", 0, 10, 5, step=1) / 100
-
-    # --- Future-Proofing & Stress Testing ---
-    sidebar.header("Future-Proofing & Stress Testing")
-    stress_test = sidebar.selectbox(
-        "Stress Test Scenario",
-        ["None", "Interest Rate Spike", "Market Crash", "Rent Drop", "High Vacancy", "Combined Shock"],
-    )
-    macro_scenario = sidebar.selectbox(
-        "Macroeconomic Scenario", ["Base Case", "Recession", "Inflation", "Housing Boom", "Housing Bust"]
-    )
-    rebalancing_action = sidebar.selectbox(
-        "Mid-Course Correction", ["None", "Sell Rental Property", "Refinance PR", "Increase Investment", "Reduce Debt"]
-    )
-    drawdown_amount = sidebar.number_input(
-        "Annual Drawdown ($, for emergencies/retirement)", 0, 500_000, 0, step=10_000
-    )
-    future_tax_change = sidebar.selectbox(
-        "Future Tax Law Change",
-        ["None", "Increase Capital Gains Tax", "Increase Property Tax", "Remove Mortgage Interest Deductibility"],
-    )
-    optimize_for = sidebar.multiselect(
-        "Optimize For", ["Net Worth", "Risk", "Liquidity", "Stress Resilience", "Lifestyle"], default=["Net Worth"]
-    )
-    risk_tolerance = sidebar.slider("Risk Tolerance (1=Low, 10=High)", 1, 10, 5)
-    discipline = sidebar.slider("Investment Discipline (1=Low, 10=High)", 1, 10, 7)
 
     # Rental Purchase Timing
     sidebar.subheader("Rental Purchase Timing")
@@ -68,26 +47,54 @@ def get_sidebar_inputs():
 
     # Rate schedule input
     sidebar.markdown("### Mortgage Rate Schedule (Year: Rate %)")
-    rate_input = sidebar.text_area("Example: 1:3.95,3:4.5,5:5", "1:3.95,3:4.5,5:5")
-    rate_schedule = {}
+    rate_input = sidebar.text_area("Example: 1:3.95,3:3.45,5:3.25", "1:3.95,3:3.45,5:3.25")
     try:
-        for item in rate_input.split(","):
-            if ":" not in item:
-                continue
-            yr, r = item.split(":")
-            yr = int(yr.strip())
-            r = float(r.strip()) / 100
-            if yr > 0 and 0 < r < 1:
-                rate_schedule[yr] = r
+        rate_schedule = parse_rate_text(rate_input)
     except Exception as e:
         sidebar.warning(f"Rate schedule input invalid, using default 3.95%. Error: {e}")
         rate_schedule = {1: 0.0395}
     if not rate_schedule:
         rate_schedule = {1: 0.0395}
+    # Resolve the schedule once into dense per-year rates shared by every model
+    rate_schedule = RateSchedule.from_dict(rate_schedule, amort_years)
+
+    # Monthly resolution is needed for accelerated payments and mid-year rental purchases
+    sidebar.markdown("### Cashflow Resolution")
+    cashflow_resolution = "monthly" if sidebar.radio("Resolution", ["Annual", "Monthly"], horizontal=True) == "Monthly" else "annual"
+    payment_frequency = "monthly"
+    purchase_month = 1
+    if cashflow_resolution == "monthly":
+        payment_frequency = sidebar.selectbox(
+            "Mortgage Payment Frequency",
+            ["monthly", "accelerated_biweekly"],
+            format_func=lambda f: {"monthly": "Monthly", "accelerated_biweekly": "Accelerated Bi-weekly"}[f],
+        )
+        purchase_month = sidebar.slider(
+            "Month of Rental Purchase",
+            1,
+            12,
+            1,
+            help="Month of the rental down payment and HELOC draw; rent and the rental mortgage still start in year 1.",
+        )
 
     # SM Return range for heatmap
     sm_return = sidebar.slider("Smith Manoeuvre Return (%)", 0, 10, 5) / 100
 
+    # --- Future-Proofing & Stress Testing ---
+    sidebar.header("Future-Proofing & Stress Testing")
+    stress_test = sidebar.selectbox("Stress Test Scenario", STRESS_TESTS)
+    macro_scenario = sidebar.selectbox("Macroeconomic Scenario", MACRO_SCENARIOS)
+    rebalancing_action = sidebar.selectbox("Mid-Course Correction", REBALANCING_ACTIONS)
+    drawdown_amount = sidebar.number_input(
+        "Annual Drawdown ($, for emergencies/retirement)", 0, 500_000, 0, step=10_000
+    )
+    future_tax_change = sidebar.selectbox("Future Tax Law Change", TAX_CHANGES)
+    optimize_for = sidebar.multiselect(
+        "Optimize For", ["Net Worth", "Risk", "Liquidity", "Stress Resilience", "Lifestyle"], default=["Net Worth"]
+    )
+    risk_tolerance = sidebar.slider("Risk Tolerance (1=Low, 10=High)", 1, 10, 5)
+    discipline = sidebar.slider("Investment Discipline (1=Low, 10=High)", 1, 10, 7)
+
     return {
         "pr_price": pr_price,
         "rental_price": rental_price,
@@ -104,17 +111,18 @@ def get_sidebar_inputs():
         "marginal_tax_rate": marginal_tax_rate,
         "pr_prop_tax_base": pr_prop_tax_base,
         "pr_prop_tax_yoy_increase": pr_prop_tax_yoy_increase,
-        "pr_insurance": pr_insurance,
+        "pr_insurance_base": pr_insurance_base,
+        "pr_insurance_yoy_increase": pr_insurance_yoy_increase,
         "pr_maintenance_base": pr_maintenance_base,
         "pr_maintenance_yoy_increase": pr_maintenance_yoy_increase,
         "rental_rent_monthly": rental_rent_monthly,
         "rental_vacancy": rental_vacancy,
         "rental_prop_tax_base": rental_prop_tax_base,
         "rental_prop_tax_yoy_increase": rental_prop_tax_yoy_increase,
-        "rental_insurance": rental_insurance,
+        "rental_insurance_base": rental_insurance_base,
+        "rental_insurance_yoy_increase": rental_insurance_yoy_increase,
         "rental_maintenance_base": rental_maintenance_base,
         "rental_maintenance_yoy_increase": rental_maintenance_yoy_increase,
-        "rental_mgmt_fee": rental_mgmt_fee,
         "stress_test": stress_test,
         "macro_scenario": macro_scenario,
         "rebalancing_action": rebalancing_action,
@@ -126,4 +134,7 @@ def get_sidebar_inputs():
         "rental_purchase_year": rental_purchase_year,
         "rate_schedule": rate_schedule,
         "sm_return": sm_return,
+        "cashflow_resolution": cashflow_resolution,
+        "payment_frequency": payment_frequency,
+        "purchase_month": purchase_month,
     }
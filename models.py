@@ -1,55 +1,178 @@
 # Scenario modeling and financial calculation functions
 
-from typing import Dict, List, Tuple
+import json
+from typing import Dict, Tuple
 import numpy as np
 
+from rates import RateSchedule
 
-def calculate_bc_tax(income: float) -> Tuple[float, float]:
-    # Federal brackets (2025, approximate)
-    fed_brackets = [0, 53359, 106717, 165430, 235675]
-    fed_rates = [0.15, 0.205, 0.26, 0.29, 0.33]
-    # BC brackets (2025, approximate)
-    bc_brackets = [0, 45654, 91310, 104835, 127299, 172602, 240716]
-    bc_rates = [0.0506, 0.077, 0.105, 0.1229, 0.147, 0.168, 0.205]
-
-    def calc_tax(brackets, rates, income):
-        tax = 0
-        for i in range(1, len(brackets)):
-            if income > brackets[i]:
-                tax += (brackets[i] - brackets[i - 1]) * rates[i - 1]
-            else:
-                tax += (income - brackets[i - 1]) * rates[i - 1]
-                break
-        else:
-            tax += (income - brackets[-1]) * rates[-1]
-        # Marginal rate
-        for i in range(len(brackets) - 1, 0, -1):
-            if income > brackets[i]:
-                return tax, rates[i]
-        return tax, rates[0]
-
-    fed_tax, fed_marginal = calc_tax(fed_brackets, fed_rates, income)
-    bc_tax, bc_marginal = calc_tax(bc_brackets, bc_rates, income)
-    total_tax = fed_tax + bc_tax
-    marginal_rate = fed_marginal + bc_marginal
+
+# Federal brackets (2025, approximate)
+FED_BRACKETS = [0, 53359, 106717, 165430, 235675]
+FED_RATES = [0.15, 0.205, 0.26, 0.29, 0.33]
+# BC brackets (2025, approximate)
+BC_BRACKETS = [0, 45654, 91310, 104835, 127299, 172602, 240716]
+BC_RATES = [0.0506, 0.077, 0.105, 0.1229, 0.147, 0.168, 0.205]
+DEFAULT_TAX_YEAR = 2025
+
+# Compiled (brackets, rates, tax owed at each bracket start) for federal and BC, keyed by tax year
+TAX_TABLES = {}
+
+
+def _compile_brackets(brackets, rates):
+    brackets = np.asarray(brackets, dtype=float)
+    rates = np.asarray(rates, dtype=float)
+    cumulative_tax = np.concatenate(([0.0], np.cumsum(np.diff(brackets) * rates[:-1])))
+    return brackets, rates, cumulative_tax
+
+
+def register_tax_table(tax_year: int, fed_brackets, fed_rates, bc_brackets, bc_rates):
+    TAX_TABLES[tax_year] = (_compile_brackets(fed_brackets, fed_rates), _compile_brackets(bc_brackets, bc_rates))
+
+
+def load_tax_tables(path: str):
+    # JSON file of the form {"2026": {"federal": {"brackets": [...], "rates": [...]}, "bc": {...}}}
+    with open(path) as f:
+        tables = json.load(f)
+    for tax_year, table in tables.items():
+        register_tax_table(
+            int(tax_year),
+            table["federal"]["brackets"],
+            table["federal"]["rates"],
+            table["bc"]["brackets"],
+            table["bc"]["rates"],
+        )
+
+
+register_tax_table(DEFAULT_TAX_YEAR, FED_BRACKETS, FED_RATES, BC_BRACKETS, BC_RATES)
+
+
+def calculate_bc_tax_array(income, tax_year: int = DEFAULT_TAX_YEAR) -> Tuple[np.ndarray, np.ndarray]:
+    # Progressive federal + BC tax for an array of incomes: returns (total tax, marginal rate) arrays
+    income = np.asarray(income, dtype=float)
+    total_tax = np.zeros(income.shape)
+    marginal_rate = np.zeros(income.shape)
+    for brackets, rates, cumulative_tax in TAX_TABLES[tax_year]:
+        idx = np.clip(np.searchsorted(brackets, income, side="left") - 1, 0, None)
+        total_tax += cumulative_tax[idx] + (income - brackets[idx]) * rates[idx]
+        marginal_rate += rates[idx]
     return total_tax, marginal_rate
 
 
+def calculate_bc_tax(income: float, tax_year: int = DEFAULT_TAX_YEAR) -> Tuple[float, float]:
+    total_tax, marginal_rate = calculate_bc_tax_array(income, tax_year)
+    return float(total_tax), float(marginal_rate)
+
+
+def resolve_rate_schedule(rate_schedule, amort_years: int) -> np.ndarray:
+    # Dense per-year rates for a RateSchedule, a {start_year: rate} dict or a per-year rate array
+    return RateSchedule.coerce(rate_schedule, amort_years).annual(amort_years)
+
+
+_MONTHS = np.arange(1, 13)
+# Payment frequencies of the monthly engine. Accelerated bi-weekly pays half the monthly payment
+# every two weeks, 26 half payments or 13 monthly payments a year; at monthly resolution that is
+# the monthly payment scaled by 13/12, all of it extra principal.
+PAYMENT_FREQUENCIES = {"monthly": 1.0, "accelerated_biweekly": 13 / 12}
+
+
+def _remaining_fraction(r: np.ndarray, n: np.ndarray, months: np.ndarray = _MONTHS) -> np.ndarray:
+    # Fraction of a start-of-year balance still owed after each of the 12 monthly payments, when the
+    # payment amortizes the balance over the n remaining months at monthly rate r (only after the
+    # given months, if not all 12 are needed).
+    if not r.all():
+        r_safe = np.where(r == 0, 1.0, r)
+        growth_n = (1 + r_safe) ** n
+        annuity = (growth_n[..., None] - (1 + r_safe[..., None]) ** months) / (growth_n - 1)[..., None]
+        return np.where((r == 0)[..., None], (n[..., None] - months) / n[..., None], annuity)
+    growth_n = (1 + r) ** n
+    return (growth_n[..., None] - (1 + r[..., None]) ** months) / (growth_n - 1)[..., None]
+
+
+def _accelerated_balances(start_balances: np.ndarray, r: np.ndarray, n: np.ndarray, payment_scale: float) -> np.ndarray:
+    # Month-end balances (..., years, 12) when every payment is payment_scale times the regular one.
+    # The regular payment follows the unaccelerated schedule (start_balances), as a lender sets it
+    # from the contract rather than the prepaid balance, so the loan is repaid early instead of the
+    # payment shrinking to fit the term. Without the floor at zero, year-start balances follow the
+    # linear recursion A[y+1] = A[y] * growth[y] - paid[y], solved with cumulative products; a
+    # balance that crosses zero stays negative from then on, so flooring afterwards is exact.
+    r_safe = np.where(r == 0, 1.0, r)
+    growth_n = (1 + r_safe) ** n
+    payment = payment_scale * start_balances * np.where(r == 0, 1 / n, r_safe * growth_n / (growth_n - 1))
+    growth_k = (1 + r[..., None]) ** _MONTHS
+    paid_k = payment[..., None] * np.where((r == 0)[..., None], _MONTHS, (growth_k - 1) / r_safe[..., None])
+    growth_to = np.cumprod(growth_k[..., -1], axis=-1)
+    discounted_paid = np.cumsum(paid_k[..., -1] / growth_to, axis=-1)
+    year_start = np.empty_like(start_balances)
+    year_start[..., 0] = start_balances[..., 0]
+    year_start[..., 1:] = growth_to[..., :-1] * (start_balances[..., :1] - discounted_paid[..., :-1])
+    return np.maximum(year_start[..., None] * growth_k - paid_k, 0)
+
+
+def _amortize(principals, annual_rates, payment_scale: float = 1.0):
+    # Batched core: principals broadcast against the leading axes of annual_rates (..., years).
+    # Returns (balances, interest, principal_paid), each shaped (..., years * 12).
+    annual_rates = np.asarray(annual_rates, dtype=float)
+    amort_years = annual_rates.shape[-1]
+    r = annual_rates / 12
+    n = (amort_years - np.arange(amort_years)) * 12
+    # The accelerated schedule only needs the regular one's year-start balances
+    remaining = _remaining_fraction(r, n, _MONTHS if payment_scale == 1 else _MONTHS[-1:])  # (..., years, 12 or 1)
+    principals = np.asarray(principals, dtype=float)[..., None]
+    start_balances = np.empty(np.broadcast_shapes(principals.shape, r.shape))
+    start_balances[..., 0] = principals[..., 0]
+    start_balances[..., 1:] = principals * np.cumprod(remaining[..., :-1, -1], axis=-1)
+    if payment_scale != 1:
+        balances = _accelerated_balances(start_balances, r, n, payment_scale)
+        start_balances[..., 1:] = balances[..., :-1, -1]
+    else:
+        balances = start_balances[..., None] * remaining
+    opening = np.empty_like(balances)
+    opening[..., 0] = start_balances
+    opening[..., 1:] = balances[..., :-1]
+    interest = opening * r[..., None]
+    # Principal repaid each month is the drop in balance
+    principal_paid = opening - balances
+    shape = balances.shape[:-2] + (amort_years * 12,)
+    return balances.reshape(shape), interest.reshape(shape), principal_paid.reshape(shape)
+
+
+def _payment_scale(payment_frequency: str) -> float:
+    if payment_frequency not in PAYMENT_FREQUENCIES:
+        raise ValueError(f"Unknown payment_frequency {payment_frequency!r}, expected one of {tuple(PAYMENT_FREQUENCIES)}")
+    return PAYMENT_FREQUENCIES[payment_frequency]
+
+
+def amortization_schedule(principal: float, amort_years: int, rate_schedule: Dict[int, float], payment_frequency="monthly"):
+    # Closed-form amortization with the payment re-computed at the start of every year for the
+    # remaining term. Returns (balances, interest, principal_paid), each an ndarray with one entry
+    # per month; balances are end-of-month, after that month's payment.
+    return _amortize(principal, resolve_rate_schedule(rate_schedule, amort_years), _payment_scale(payment_frequency))
+
+
+def amortization_schedule_batch(principals, annual_rates):
+    # Amortize many loans against many rate paths in one call. annual_rates holds one rate per
+    # amortization year, shape (paths, years); principals is a scalar, (paths,) or (loans, 1) to get
+    # every loan against every path. Returns (balances, interest, principal_paid) of shape
+    # (..., years * 12).
+    return _amortize(principals, annual_rates)
+
+
 def mortgage_balance_schedule(principal: float, amort_years: int, rate_schedule: Dict[int, float]):
-    balance = principal
-    monthly_balances = []
-    for y in range(1, amort_years + 1):
-        applicable_years = [yr for yr in rate_schedule.keys() if yr <= y]
-        rate = rate_schedule[max(applicable_years)] if applicable_years else list(rate_schedule.values())[0]
-        r_month = rate / 12
-        n_months = (amort_years - y + 1) * 12
-        pmt = balance * r_month / (1 - (1 + r_month) ** -n_months)
-        for m in range(12):
-            interest = balance * r_month
-            principal_paid = pmt - interest
-            balance -= principal_paid
-            monthly_balances.append(balance)
-    return balance, monthly_balances
+    monthly_balances, _, _ = amortization_schedule(principal, amort_years, rate_schedule)
+    return monthly_balances[-1], monthly_balances
+
+
+def mortgage_balance_schedule_batch(principals, annual_rates):
+    # Batched mortgage_balance_schedule: returns (final balances, (paths, months) balance tensor).
+    monthly_balances, _, _ = _amortize(principals, annual_rates)
+    return monthly_balances[..., -1], monthly_balances
+
+
+def _per_year(x):
+    # A per-year sequence for a single path becomes a (1, years) path; scalars pass through
+    x = np.asarray(x, dtype=float)
+    return x[None, :] if x.ndim == 1 else x
 
 
 def scenario1_cashflow(
@@ -73,111 +196,29 @@ def scenario1_cashflow(
     capex_events=None,  # List of (year, amount)
     rent_growth=0.03,  # Annual rent growth, default 3%
 ):
-    s1_equity_list = []
-    cashflow_list = []
-    if capex_events is None:
-        capex_events = []
-    capex_dict = {year: amount for year, amount in capex_events}
-
-    pr_loan = pr_price * (1 - down_pr1)
-    rental_down_payment = rental_price * 0.2
-    rental_loan = rental_price - rental_down_payment
-    # Get amortization tables for both properties
-    _, pr_monthly_balances = mortgage_balance_schedule(pr_loan, amort_years, rate_schedule)
-    _, rental_monthly_balances = mortgage_balance_schedule(rental_loan, amort_years, rate_schedule)
-    # Calculate yearly principal paid and interest paid
-    pr_principal_paid = [
-        (
-            (
-                pr_monthly_balances[min((i - 1) * 12, len(pr_monthly_balances) - 1)]
-                - pr_monthly_balances[min(i * 12, len(pr_monthly_balances) - 1)]
-            )
-            if i > 0
-            else (pr_loan - pr_monthly_balances[min(12, len(pr_monthly_balances) - 1)])
-        )
-        for i in range(amort_years)
-    ]
-    pr_interest_paid = [
-        sum(
-            [
-                pr_monthly_balances[min(j, len(pr_monthly_balances) - 1)]
-                * (rate_schedule[max([yr for yr in rate_schedule.keys() if yr <= (i + 1)], default=1)] / 12)
-                for j in range(i * 12 if i > 0 else 0, min((i + 1) * 12, len(pr_monthly_balances)))
-            ]
-        )
-        for i in range(amort_years)
-    ]
-    pr_total_payment = [pr_principal_paid[i] + pr_interest_paid[i] for i in range(amort_years)]
-    rental_principal_paid = [
-        (
-            (
-                rental_monthly_balances[min((i - 1) * 12, len(rental_monthly_balances) - 1)]
-                - rental_monthly_balances[min(i * 12, len(rental_monthly_balances) - 1)]
-            )
-            if i > 0
-            else (rental_loan - rental_monthly_balances[min(12, len(rental_monthly_balances) - 1)])
-        )
-        for i in range(amort_years)
-    ]
-    rental_interest_paid = [
-        sum(
-            [
-                rental_monthly_balances[min(j, len(rental_monthly_balances) - 1)]
-                * (rate_schedule[max([yr for yr in rate_schedule.keys() if yr <= (i + 1)], default=1)] / 12)
-                for j in range(i * 12 if i > 0 else 0, min((i + 1) * 12, len(rental_monthly_balances)))
-            ]
-        )
-        for i in range(amort_years)
-    ]
-    rental_total_payment = [rental_principal_paid[i] + rental_interest_paid[i] for i in range(amort_years)]
-
-    # Calculate cashflow for each year
-    for year in range(1, amort_years + 1):
-        pr_idx = year - 1
-        # Property value appreciation
-        pr_future = pr_price * ((1 + pr_app) ** year)
-        rental_future = rental_price * ((1 + rental_app) ** year)
-        # Annual rent and expenses with variable rent growth
-        effective_rent = rental_rent_monthly * ((1 + rent_growth) ** (year - 1))
-        rent_income = effective_rent * 12 * (1 - rental_vacancy)
-        pr_expenses = pr_prop_tax_list[pr_idx] + pr_insurance_list[pr_idx] + pr_maintenance_list[pr_idx]
-        rental_expenses = rental_prop_tax_list[pr_idx] + rental_insurance_list[pr_idx] + rental_maintenance_list[pr_idx]
-        expenses = pr_expenses + rental_expenses
-        capex = capex_dict.get(year, 0)
-        expenses += capex
-        # Use amortization table values for payments
-        pr_payment = pr_total_payment[pr_idx]
-        rental_payment = rental_total_payment[pr_idx]
-        net_cashflow = rent_income - expenses - pr_payment - rental_payment
-        # Down payment/HELOC logic (unchanged)
-        if rental_purchase_year > 0:
-            months_paid = rental_purchase_year * 12
-            principal_paid = (
-                pr_loan - pr_monthly_balances[months_paid - 1] if months_paid <= len(pr_monthly_balances) else pr_loan
-            )
-        else:
-            principal_paid = 0
-        rental_down_payment = rental_price * 0.2
-        heloc_used = min(principal_paid, rental_down_payment)
-        cash_down_payment = rental_down_payment - heloc_used
-        if year == rental_purchase_year:
-            net_cashflow -= cash_down_payment
-            net_cashflow -= heloc_used * (
-                rate_schedule[max([yr for yr in rate_schedule.keys() if yr <= year], default=1)] + heloc_delta
-            )
-        elif year > rental_purchase_year and heloc_used > 0:
-            net_cashflow -= heloc_used * (
-                rate_schedule[max([yr for yr in rate_schedule.keys() if yr <= year], default=1)] + heloc_delta
-            )
-        cashflow_list.append(net_cashflow)
-        equity = (
-            pr_future
-            - pr_monthly_balances[min(pr_idx * 12, len(pr_monthly_balances) - 1)]
-            + (rental_future - rental_monthly_balances[min(pr_idx * 12, len(rental_monthly_balances) - 1)])
-        )
-        s1_equity_list.append(equity + sum(cashflow_list))
-
-    return s1_equity_list, cashflow_list
+    # rental_app, pr_app and rent_growth may be a single rate or one rate per year.
+    # Returns (equity, cashflow) as ndarrays with one entry per year.
+    s1_equity, cashflow = scenario1_cashflow_batch(
+        pr_price,
+        rental_price,
+        down_pr1,
+        resolve_rate_schedule(rate_schedule, amort_years),
+        _per_year(rental_app),
+        _per_year(pr_app),
+        heloc_delta,
+        rental_rent_monthly,
+        rental_vacancy,
+        rental_prop_tax_list,
+        rental_insurance_list,
+        rental_maintenance_list,
+        rental_purchase_year,
+        pr_prop_tax_list,
+        pr_insurance_list,
+        pr_maintenance_list,
+        capex_events,
+        _per_year(rent_growth),
+    )
+    return s1_equity.reshape(-1), cashflow.reshape(-1)
 
 
 def scenario2_cashflow(
@@ -197,48 +238,673 @@ def scenario2_cashflow(
     pr_maintenance_list,
     capex_events=None,  # List of (year, amount)
     rent_growth=0.03,  # Annual rent growth, default 3%
+    tax_year=DEFAULT_TAX_YEAR,  # Bracket table used for the marginal tax rate
+):
+    # sm_return, income_growth and pr_app may be a single rate or one rate per year.
+    # Returns (equity, cashflow, tax_savings) as ndarrays with one entry per year.
+    s2_equity, cashflow, tax_savings = scenario2_cashflow_batch(
+        pr_price,
+        _per_year(sm_return),
+        down_pr2,
+        resolve_rate_schedule(rate_schedule, amort_years),
+        income_start,
+        _per_year(income_growth),
+        _per_year(pr_app),
+        heloc_loan,
+        heloc_delta,
+        sm_principal,
+        pr_prop_tax_list,
+        pr_insurance_list,
+        pr_maintenance_list,
+        capex_events,
+        rent_growth,
+        tax_year,
+    )
+    return s2_equity.reshape(-1), cashflow.reshape(-1), tax_savings.reshape(-1)
+
+
+def growth_schedule(base, yoy_increase, years: int) -> np.ndarray:
+    # base * (1 + yoy_increase) ** i for i in range(years); per-path bases give (paths, years)
+    base = np.asarray(base, dtype=float)[..., None]
+    yoy_increase = np.asarray(yoy_increase, dtype=float)[..., None]
+    return base * (1 + yoy_increase) ** np.arange(years)
+
+
+def _column(x) -> np.ndarray:
+    # Per-path scalars of shape (paths,) become (paths, 1) so they broadcast against (paths, years)
+    x = np.asarray(x, dtype=float)
+    return x[..., None] if x.ndim else x
+
+
+def _growth_factors(rate, amort_years: int, lagged: bool = False) -> np.ndarray:
+    # Cumulative (1 + rate) growth at the end of each year. rate is a scalar or (paths,) for a constant
+    # rate, or (paths, years) for a per-year path. lagged=True gives growth at the start of each year.
+    rate = np.asarray(rate, dtype=float)
+    if rate.ndim == 2:
+        factors = np.cumprod(1 + rate, axis=-1)
+        if lagged:
+            factors = np.concatenate((np.ones(factors.shape[:-1] + (1,)), factors[..., :-1]), axis=-1)
+        return factors
+    years = np.arange(1, amort_years + 1) - lagged
+    return (1 + _column(rate)) ** years
+
+
+def _capex_by_year(capex_events, amort_years: int) -> np.ndarray:
+    capex = np.zeros(amort_years)
+    for year, amount in capex_events or []:
+        if 1 <= year <= amort_years:
+            capex[year - 1] += amount
+    return capex
+
+
+def _yearly_principal_interest(loan, monthly_balances, annual_rates):
+    # Yearly principal and interest read off the monthly balance tensor, using the same
+    # end-of-year indexing as the original per-year comprehensions.
+    n_months = monthly_balances.shape[-1]
+    eoy_idx = np.minimum(np.arange(n_months // 12) * 12, n_months - 1)
+    end_idx = eoy_idx.copy()
+    end_idx[0] = min(12, n_months - 1)
+    start = np.empty(monthly_balances.shape[:-1] + eoy_idx.shape)
+    start[..., 0] = loan
+    start[..., 1:] = monthly_balances[..., eoy_idx[:-1]]
+    principal_paid = start - monthly_balances[..., end_idx]
+    yearly_balances = monthly_balances.reshape(monthly_balances.shape[:-1] + (-1, 12)).sum(axis=-1)
+    return principal_paid, yearly_balances * annual_rates / 12
+
+
+def yearly_amortization_batch(principals, annual_rates, interest_rates=None):
+    # Per-year view of (loans,) principals amortized against one rate path, for the amortization
+    # tables: returns the (loans, months) balance tensor and (loans, years) end-of-year balances,
+    # principal paid and interest paid, indexed like the scenario kernels. interest_rates (default
+    # annual_rates) prices the interest.
+    principals = np.asarray(principals, dtype=float)
+    _, monthly_balances = mortgage_balance_schedule_batch(principals, annual_rates)
+    interest_rates = annual_rates if interest_rates is None else interest_rates
+    principal_paid, interest_paid = _yearly_principal_interest(principals, monthly_balances, interest_rates)
+    return monthly_balances, _eoy_balances(monthly_balances), principal_paid, interest_paid
+
+
+def _balance_at_month(monthly_balances, month_idx):
+    # monthly_balances[..., month_idx] where month_idx may differ per path
+    if monthly_balances.ndim == 1:
+        return monthly_balances[month_idx]
+    month_idx = np.broadcast_to(month_idx, monthly_balances.shape[:-1])
+    return np.take_along_axis(monthly_balances, month_idx[..., None], axis=-1)[..., 0]
+
+
+def _eoy_balances(monthly_balances):
+    n_months = monthly_balances.shape[-1]
+    return monthly_balances[..., np.minimum(np.arange(n_months // 12) * 12, n_months - 1)]
+
+
+def scenario1_cashflow_batch(
+    pr_price,
+    rental_price,
+    down_pr1,
+    annual_rates,
+    rental_app,
+    pr_app,
+    heloc_delta,
+    rental_rent_monthly,
+    rental_vacancy,
+    rental_prop_tax,
+    rental_insurance,
+    rental_maintenance,
+    rental_purchase_year,
+    pr_prop_tax,
+    pr_insurance,
+    pr_maintenance,
+    capex_events=None,  # List of (year, amount)
+    rent_growth=0.03,  # Annual rent growth, default 3%
+    resolution="annual",  # "monthly": annual rollup of scenario1_cashflow_monthly
+    payment_frequency="monthly",  # Monthly resolution only, see scenario1_cashflow_monthly
+    purchase_month=1,
 ):
-    s2_equity_list = []
-    cashflow_list = []
-    tax_savings_list = []
-    if capex_events is None:
-        capex_events = []
-    capex_dict = {year: amount for year, amount in capex_events}
-
-    # Initial PR loan
-    pr_loan = pr_price * (1 - down_pr2)
-    invest_principal = sm_principal
-    _, pr_monthly_balances = mortgage_balance_schedule(pr_loan, amort_years, rate_schedule)
-    heloc_balances = []
-    for year in range(1, amort_years + 1):
-        # PR appreciation
-        pr_future = pr_price * ((1 + pr_app) ** year)
-        # Investment growth
-        invest_growth = invest_principal * ((1 + sm_return) ** year)
-        # Annual income for marginal tax calculation
-        income = income_start * ((1 + income_growth) ** year)
-        _, marginal_tax_rate = calculate_bc_tax(income)
-        # Calculate base mortgage rate for this year
-        applicable_years = [yr for yr in rate_schedule.keys() if yr <= year]
-        mortgage_rate = rate_schedule[max(applicable_years)] if applicable_years else list(rate_schedule.values())[0]
-        heloc_rate = mortgage_rate + heloc_delta
-        # Dynamic HELOC: grows as PR principal is paid down
-        pr_principal_paid = (
-            pr_monthly_balances[min((year - 2) * 12, len(pr_monthly_balances) - 1)] - pr_monthly_balances[min((year - 1) * 12, len(pr_monthly_balances) - 1)]
-        ) if year > 1 else (pr_loan - pr_monthly_balances[min(12, len(pr_monthly_balances) - 1)])
-        heloc_balance = heloc_balances[-1] + pr_principal_paid if heloc_balances else pr_principal_paid
-        heloc_balances.append(heloc_balance)
-        # Interest on HELOC used for rental mortgage (tax-deductible)
-        interest_payment = heloc_balance * heloc_rate
-        tax_savings = interest_payment * marginal_tax_rate
-        tax_savings_list.append(tax_savings)
-        # Cash flow is the tax savings in SM minus CapEx, PR maintenance, and PR property tax for this year
-        capex = capex_dict.get(year, 0)
-        pr_expenses = pr_prop_tax_list[year - 1] + pr_insurance_list[year - 1] + pr_maintenance_list[year - 1]
-        cashflow_list.append(tax_savings - capex - pr_expenses)
-        # Mortgage balance for PR at end of year
-        pr_balance = pr_monthly_balances[min((year - 1) * 12, len(pr_monthly_balances) - 1)]
-        # Total equity including SM growth and cumulative cash flow
-        s2_equity_list.append(pr_future - pr_balance + invest_growth + sum(cashflow_list))
-
-    return s2_equity_list, cashflow_list, tax_savings_list
+    # Array version of scenario1_cashflow over many paths at once. Scalar inputs may be per-path
+    # arrays of shape (paths,); annual_rates and the expense schedules are (years,) or
+    # (paths, years); rental_app, pr_app and rent_growth may also be per-year (paths, years) paths.
+    # Returns (equity, cashflow) arrays of shape (paths, years).
+    if resolution == "monthly":
+        return _scenario1_monthly_rollup(
+            pr_price,
+            rental_price,
+            down_pr1,
+            annual_rates,
+            rental_app,
+            pr_app,
+            heloc_delta,
+            rental_rent_monthly,
+            rental_vacancy,
+            rental_prop_tax,
+            rental_insurance,
+            rental_maintenance,
+            rental_purchase_year,
+            pr_prop_tax,
+            pr_insurance,
+            pr_maintenance,
+            capex_events,
+            rent_growth,
+            payment_frequency,
+            purchase_month,
+        )
+    annual_rates = np.asarray(annual_rates, dtype=float)
+    amort_years = annual_rates.shape[-1]
+    years = np.arange(1, amort_years + 1)
+    pr_price, rental_price = np.asarray(pr_price, dtype=float), np.asarray(rental_price, dtype=float)
+    pr_loan = pr_price * (1 - np.asarray(down_pr1))
+    rental_down_payment = rental_price * 0.2
+    rental_loan = rental_price - rental_down_payment
+    # Amortization is linear in the principal, so one unit-loan schedule per rate path serves both loans
+    _, unit_balances = mortgage_balance_schedule_batch(1.0, annual_rates)
+    unit_principal, unit_interest = _yearly_principal_interest(1.0, unit_balances, annual_rates)
+    unit_eoy = _eoy_balances(unit_balances)
+
+    pr_future = _column(pr_price) * _growth_factors(pr_app, amort_years)
+    rental_future = _column(rental_price) * _growth_factors(rental_app, amort_years)
+    effective_rent = _column(rental_rent_monthly) * _growth_factors(rent_growth, amort_years, lagged=True)
+    rent_income = effective_rent * 12 * (1 - _column(rental_vacancy))
+    expenses = (
+        np.asarray(pr_prop_tax)
+        + np.asarray(pr_insurance)
+        + np.asarray(pr_maintenance)
+        + np.asarray(rental_prop_tax)
+        + np.asarray(rental_insurance)
+        + np.asarray(rental_maintenance)
+        + _capex_by_year(capex_events, amort_years)
+    )
+    pr_payment = _column(pr_loan) * (unit_principal + unit_interest)
+    rental_payment = _column(rental_loan) * (unit_principal + unit_interest)
+    cashflow = rent_income - expenses - pr_payment - rental_payment
+
+    # Down payment/HELOC logic: PR principal paid down by the purchase year funds the rental down payment
+    rental_purchase_year = np.asarray(rental_purchase_year)
+    n_months = unit_balances.shape[-1]
+    months_paid = (rental_purchase_year * 12).astype(int)
+    balance_at_purchase = pr_loan * _balance_at_month(unit_balances, np.clip(months_paid - 1, 0, n_months - 1))
+    principal_paid = np.where(months_paid <= n_months, pr_loan - balance_at_purchase, pr_loan)
+    principal_paid = np.where(rental_purchase_year > 0, principal_paid, 0)
+    heloc_used = _column(np.minimum(principal_paid, rental_down_payment))
+    cash_down_payment = _column(rental_down_payment) - heloc_used
+    heloc_interest = heloc_used * (annual_rates + _column(heloc_delta))
+    purchase_year = _column(rental_purchase_year)
+    cashflow = cashflow - np.where(years == purchase_year, cash_down_payment + heloc_interest, 0)
+    cashflow = cashflow - np.where((years > purchase_year) & (heloc_used > 0), heloc_interest, 0)
+
+    equity = (
+        pr_future
+        - _column(pr_loan) * unit_eoy
+        + (rental_future - _column(rental_loan) * unit_eoy)
+        + np.cumsum(cashflow, axis=-1)
+    )
+    return equity, cashflow
+
+
+def scenario2_cashflow_batch(
+    pr_price,
+    sm_return,
+    down_pr2,
+    annual_rates,
+    income_start,
+    income_growth,
+    pr_app,
+    heloc_loan,
+    heloc_delta,
+    sm_principal,
+    pr_prop_tax,
+    pr_insurance,
+    pr_maintenance,
+    capex_events=None,  # List of (year, amount)
+    rent_growth=0.03,  # Annual rent growth, default 3%
+    tax_year=DEFAULT_TAX_YEAR,  # Bracket table used for the marginal tax rate
+    resolution="annual",  # "monthly": annual rollup of scenario2_cashflow_monthly
+    payment_frequency="monthly",  # Monthly resolution only, see scenario2_cashflow_monthly
+):
+    # Array version of scenario2_cashflow; same shape conventions as scenario1_cashflow_batch, with
+    # sm_return, income_growth and pr_app accepted as per-year (paths, years) paths.
+    # Returns (equity, cashflow, tax_savings) arrays of shape (paths, years).
+    if resolution == "monthly":
+        return _scenario2_monthly_rollup(
+            pr_price,
+            sm_return,
+            down_pr2,
+            annual_rates,
+            income_start,
+            income_growth,
+            pr_app,
+            heloc_loan,
+            heloc_delta,
+            sm_principal,
+            pr_prop_tax,
+            pr_insurance,
+            pr_maintenance,
+            capex_events,
+            rent_growth,
+            tax_year,
+            payment_frequency,
+        )
+    annual_rates = np.asarray(annual_rates, dtype=float)
+    amort_years = annual_rates.shape[-1]
+    pr_price = np.asarray(pr_price, dtype=float)
+    pr_loan = pr_price * (1 - np.asarray(down_pr2))
+    _, unit_balances = mortgage_balance_schedule_batch(1.0, annual_rates)
+    unit_principal, _ = _yearly_principal_interest(1.0, unit_balances, annual_rates)
+
+    pr_future = _column(pr_price) * _growth_factors(pr_app, amort_years)
+    invest_growth = _column(sm_principal) * _growth_factors(sm_return, amort_years)
+    income = _column(income_start) * _growth_factors(income_growth, amort_years)
+    _, marginal_tax_rate = calculate_bc_tax_array(income, tax_year)
+    heloc_rate = annual_rates + _column(heloc_delta)
+    # Dynamic HELOC: grows as PR principal is paid down; its interest is tax-deductible
+    heloc_balances = _column(pr_loan) * np.cumsum(unit_principal, axis=-1)
+    tax_savings = heloc_balances * heloc_rate * marginal_tax_rate
+    pr_expenses = np.asarray(pr_prop_tax) + np.asarray(pr_insurance) + np.asarray(pr_maintenance)
+    cashflow = tax_savings - _capex_by_year(capex_events, amort_years) - pr_expenses
+
+    equity = pr_future - _column(pr_loan) * _eoy_balances(unit_balances) + invest_growth + np.cumsum(cashflow, axis=-1)
+    return equity, cashflow, tax_savings
+
+
+CASHFLOW_RESOLUTIONS = ("annual", "monthly")
+_MONTH_FRACTIONS = _MONTHS / 12
+
+
+def annual_rollup(monthly, how: str = "sum") -> np.ndarray:
+    # (..., years * 12) monthly array to (..., years): "sum" for flows, "last" for month-end stocks
+    monthly = np.asarray(monthly)
+    if how == "last":
+        return monthly[..., 11::12]
+    return monthly.reshape(monthly.shape[:-1] + (-1, 12)).sum(axis=-1)
+
+
+def _by_month(annual) -> np.ndarray:
+    # A per-year value repeated for each of its 12 months
+    return np.repeat(np.asarray(annual, dtype=float), 12, axis=-1)
+
+
+def _spread_by_month(annual) -> np.ndarray:
+    # A per-year amount paid in 12 equal monthly instalments
+    return _by_month(annual) / 12
+
+
+def _capex_by_month(capex_events, amort_years: int) -> np.ndarray:
+    # Capital expenditures fall in the first month of their year
+    capex = np.zeros(amort_years * 12)
+    capex[::12] = _capex_by_year(capex_events, amort_years)
+    return capex
+
+
+def _monthly_growth(value, rate, amort_years: int) -> np.ndarray:
+    # Month-end value of value compounding at each year's rate (scalar, (paths,) or (paths, years)),
+    # so that every December equals value * _growth_factors(rate); shape (..., years * 12)
+    start = _column(value) * _growth_factors(rate, amort_years, lagged=True)
+    rate = np.asarray(rate, dtype=float)
+    rate = rate if rate.ndim == 2 else _column(rate)
+    monthly = start[..., None] * (1 + rate[..., None]) ** _MONTH_FRACTIONS
+    return monthly.reshape(monthly.shape[:-2] + (-1,))
+
+
+def _rental_heloc_draw(pr_loan, rental_down_payment, unit_balances, rental_purchase_year, purchase_month):
+    # (purchase month index, HELOC draw) of the rental purchase: the down payment is drawn from the
+    # PR principal repaid before the purchase month. The annual kernel sizes it from the principal
+    # repaid by the end of the purchase year instead, so the monthly rollup draws less HELOC (and
+    # pays more of the down payment in cash) than resolution="annual" for the same purchase year.
+    # A rental already owned (year <= 0) draws nothing and gets the index past the last month.
+    n_months = unit_balances.shape[-1]
+    rental_purchase_year = np.asarray(rental_purchase_year, dtype=float)
+    purchase_idx = np.rint((rental_purchase_year - 1) * 12).astype(int) + np.asarray(purchase_month, dtype=int) - 1
+    repaid = 1 - _balance_at_month(unit_balances, np.clip(purchase_idx - 1, 0, n_months - 1))
+    repaid = np.where(purchase_idx > 0, repaid, 0)
+    heloc_used = np.where(rental_purchase_year > 0, np.minimum(pr_loan * repaid, rental_down_payment), 0)
+    return np.where(rental_purchase_year > 0, purchase_idx, n_months), heloc_used
+
+
+def scenario1_cashflow_monthly(
+    pr_price,
+    rental_price,
+    down_pr1,
+    annual_rates,
+    rental_app,
+    pr_app,
+    heloc_delta,
+    rental_rent_monthly,
+    rental_vacancy,
+    rental_prop_tax,
+    rental_insurance,
+    rental_maintenance,
+    rental_purchase_year,
+    pr_prop_tax,
+    pr_insurance,
+    pr_maintenance,
+    capex_events=None,  # List of (year, amount)
+    rent_growth=0.03,  # Annual rent growth, default 3%
+    payment_frequency="monthly",  # Key of PAYMENT_FREQUENCIES, applied to both mortgages
+    purchase_month=1,  # Month (1-12) of rental_purchase_year of the down payment / HELOC draw
+):
+    # Month-by-month version of scenario1_cashflow_batch (same inputs and shape conventions). Mortgage
+    # interest accrues on each month's opening balance, annual expenses are paid in 12 instalments,
+    # and the rental down payment is drawn from the HELOC in the purchase month, sized by the PR
+    # principal repaid before it (see _rental_heloc_draw), with HELOC interest from that month on.
+    # As in the annual model, the rental is otherwise owned from month 1: purchase_month (and
+    # rental_purchase_year) only time the down payment and HELOC draw, while rent, the rental
+    # mortgage and the rental's equity start in year 1 whatever the purchase date.
+    # Returns a dict of (paths, years * 12) arrays; roll them up with annual_rollup.
+    annual_rates = np.asarray(annual_rates, dtype=float)
+    amort_years = annual_rates.shape[-1]
+    n_months = amort_years * 12
+    months = np.arange(n_months)
+    pr_price, rental_price = np.asarray(pr_price, dtype=float), np.asarray(rental_price, dtype=float)
+    pr_loan = pr_price * (1 - np.asarray(down_pr1))
+    rental_down_payment = rental_price * 0.2
+    rental_loan = rental_price - rental_down_payment
+    unit_balances, unit_interest, unit_principal = _amortize(1.0, annual_rates, _payment_scale(payment_frequency))
+    monthly_rates = _by_month(annual_rates)
+
+    effective_rent = _column(rental_rent_monthly) * _growth_factors(rent_growth, amort_years, lagged=True)
+    rent_income = _by_month(effective_rent * (1 - _column(rental_vacancy)))
+    expenses = _spread_by_month(
+        np.asarray(pr_prop_tax)
+        + np.asarray(pr_insurance)
+        + np.asarray(pr_maintenance)
+        + np.asarray(rental_prop_tax)
+        + np.asarray(rental_insurance)
+        + np.asarray(rental_maintenance)
+    ) + _capex_by_month(capex_events, amort_years)
+    loans = _column(pr_loan + rental_loan)
+    interest = loans * unit_interest
+    principal = loans * unit_principal
+
+    purchase_idx, heloc_used = _rental_heloc_draw(
+        pr_loan, rental_down_payment, unit_balances, rental_purchase_year, purchase_month
+    )
+    purchase_idx = _column(purchase_idx)
+    owned = months >= purchase_idx
+    down_payment = np.where(months == purchase_idx, _column(rental_down_payment - heloc_used), 0)
+    heloc_balance = np.where(owned, _column(heloc_used), 0)
+    heloc_interest = heloc_balance * (monthly_rates + _column(heloc_delta)) / 12
+    cashflow = rent_income - expenses - interest - principal - down_payment - heloc_interest
+
+    equity = (
+        _monthly_growth(pr_price, pr_app, amort_years)
+        + _monthly_growth(rental_price, rental_app, amort_years)
+        - loans * unit_balances
+        + np.cumsum(cashflow, axis=-1)
+    )
+    return {
+        "rent_income": rent_income,
+        "expenses": expenses,
+        "interest": interest,
+        "principal": principal,
+        "down_payment": down_payment,
+        "heloc_balance": heloc_balance,
+        "heloc_interest": heloc_interest,
+        "cashflow": cashflow,
+        "equity": equity,
+    }
+
+
+def scenario2_cashflow_monthly(
+    pr_price,
+    sm_return,
+    down_pr2,
+    annual_rates,
+    income_start,
+    income_growth,
+    pr_app,
+    heloc_loan,
+    heloc_delta,
+    sm_principal,
+    pr_prop_tax,
+    pr_insurance,
+    pr_maintenance,
+    capex_events=None,  # List of (year, amount)
+    rent_growth=0.03,  # Annual rent growth, default 3%
+    tax_year=DEFAULT_TAX_YEAR,  # Bracket table used for the marginal tax rate
+    payment_frequency="monthly",  # Key of PAYMENT_FREQUENCIES for the PR mortgage
+):
+    # Month-by-month version of scenario2_cashflow_batch. Each month's PR principal payment is
+    # re-borrowed on the HELOC (the Smith Manoeuvre draw); interest on the HELOC balance outstanding
+    # during the month is deductible at that year's marginal rate.
+    # Returns a dict of (paths, years * 12) arrays; roll them up with annual_rollup.
+    annual_rates = np.asarray(annual_rates, dtype=float)
+    amort_years = annual_rates.shape[-1]
+    pr_price = np.asarray(pr_price, dtype=float)
+    pr_loan = _column(pr_price * (1 - np.asarray(down_pr2)))
+    unit_balances, unit_interest, unit_principal = _amortize(1.0, annual_rates, _payment_scale(payment_frequency))
+
+    income = _column(income_start) * _growth_factors(income_growth, amort_years)
+    _, marginal_tax_rate = calculate_bc_tax_array(income, tax_year)
+    heloc_draw = pr_loan * unit_principal
+    heloc_balance = np.cumsum(heloc_draw, axis=-1) - heloc_draw
+    heloc_interest = heloc_balance * (_by_month(annual_rates) + _column(heloc_delta)) / 12
+    tax_savings = heloc_interest * _by_month(marginal_tax_rate)
+    expenses = _spread_by_month(
+        np.asarray(pr_prop_tax) + np.asarray(pr_insurance) + np.asarray(pr_maintenance)
+    ) + _capex_by_month(capex_events, amort_years)
+    cashflow = tax_savings - expenses
+
+    equity = (
+        _monthly_growth(pr_price, pr_app, amort_years)
+        - pr_loan * unit_balances
+        + _monthly_growth(sm_principal, sm_return, amort_years)
+        + np.cumsum(cashflow, axis=-1)
+    )
+    return {
+        "interest": pr_loan * unit_interest,
+        "principal": heloc_draw,
+        "heloc_draw": heloc_draw,
+        "heloc_balance": heloc_balance,
+        "heloc_interest": heloc_interest,
+        "tax_savings": tax_savings,
+        "expenses": expenses,
+        "cashflow": cashflow,
+        "equity": equity,
+    }
+
+
+def _scenario1_monthly_rollup(
+    pr_price,
+    rental_price,
+    down_pr1,
+    annual_rates,
+    rental_app,
+    pr_app,
+    heloc_delta,
+    rental_rent_monthly,
+    rental_vacancy,
+    rental_prop_tax,
+    rental_insurance,
+    rental_maintenance,
+    rental_purchase_year,
+    pr_prop_tax,
+    pr_insurance,
+    pr_maintenance,
+    capex_events,
+    rent_growth,
+    payment_frequency,
+    purchase_month,
+):
+    # Annual rollup of scenario1_cashflow_monthly without the (paths, months) arrays. Every monthly
+    # term is a per-path scalar times a unit-loan or per-year quantity, so the yearly sums are formed
+    # from the unit schedule's rollups (one per rate path) at the cost of the annual kernel.
+    annual_rates = np.asarray(annual_rates, dtype=float)
+    amort_years = annual_rates.shape[-1]
+    years = np.arange(1, amort_years + 1)
+    pr_price, rental_price = np.asarray(pr_price, dtype=float), np.asarray(rental_price, dtype=float)
+    pr_loan = pr_price * (1 - np.asarray(down_pr1))
+    rental_down_payment = rental_price * 0.2
+    rental_loan = rental_price - rental_down_payment
+    unit_balances, unit_interest, unit_principal = _amortize(1.0, annual_rates, _payment_scale(payment_frequency))
+
+    effective_rent = _column(rental_rent_monthly) * _growth_factors(rent_growth, amort_years, lagged=True)
+    rent_income = effective_rent * 12 * (1 - _column(rental_vacancy))
+    expenses = (
+        np.asarray(pr_prop_tax)
+        + np.asarray(pr_insurance)
+        + np.asarray(pr_maintenance)
+        + np.asarray(rental_prop_tax)
+        + np.asarray(rental_insurance)
+        + np.asarray(rental_maintenance)
+        + _capex_by_year(capex_events, amort_years)
+    )
+    loans = _column(pr_loan + rental_loan)
+    payments = loans * annual_rollup(unit_interest + unit_principal)
+
+    purchase_idx, heloc_used = _rental_heloc_draw(
+        pr_loan, rental_down_payment, unit_balances, rental_purchase_year, purchase_month
+    )
+    purchase_idx = _column(purchase_idx)
+    months_owned = np.clip(years * 12 - purchase_idx, 0, 12)
+    heloc_interest = _column(heloc_used) * (annual_rates + _column(heloc_delta)) / 12 * months_owned
+    down_payment = np.where(years - 1 == purchase_idx // 12, _column(rental_down_payment - heloc_used), 0)
+    cashflow = rent_income - expenses - payments - down_payment - heloc_interest
+
+    equity = (
+        _column(pr_price) * _growth_factors(pr_app, amort_years)
+        + _column(rental_price) * _growth_factors(rental_app, amort_years)
+        - loans * annual_rollup(unit_balances, "last")
+        + np.cumsum(cashflow, axis=-1)
+    )
+    return equity, cashflow
+
+
+def _scenario2_monthly_rollup(
+    pr_price,
+    sm_return,
+    down_pr2,
+    annual_rates,
+    income_start,
+    income_growth,
+    pr_app,
+    heloc_loan,
+    heloc_delta,
+    sm_principal,
+    pr_prop_tax,
+    pr_insurance,
+    pr_maintenance,
+    capex_events,
+    rent_growth,
+    tax_year,
+    payment_frequency,
+):
+    # Annual rollup of scenario2_cashflow_monthly, factored like _scenario1_monthly_rollup: the HELOC
+    # interest of a year is pr_loan * (rate + delta) / 12 times the unit HELOC balances summed over it
+    annual_rates = np.asarray(annual_rates, dtype=float)
+    amort_years = annual_rates.shape[-1]
+    pr_price = np.asarray(pr_price, dtype=float)
+    pr_loan = _column(pr_price * (1 - np.asarray(down_pr2)))
+    unit_balances, _, unit_principal = _amortize(1.0, annual_rates, _payment_scale(payment_frequency))
+
+    income = _column(income_start) * _growth_factors(income_growth, amort_years)
+    _, marginal_tax_rate = calculate_bc_tax_array(income, tax_year)
+    unit_heloc = annual_rollup(np.cumsum(unit_principal, axis=-1) - unit_principal)
+    tax_savings = pr_loan * unit_heloc * (annual_rates + _column(heloc_delta)) / 12 * marginal_tax_rate
+    pr_expenses = np.asarray(pr_prop_tax) + np.asarray(pr_insurance) + np.asarray(pr_maintenance)
+    cashflow = tax_savings - _capex_by_year(capex_events, amort_years) - pr_expenses
+
+    equity = (
+        _column(pr_price) * _growth_factors(pr_app, amort_years)
+        - pr_loan * annual_rollup(unit_balances, "last")
+        + _column(sm_principal) * _growth_factors(sm_return, amort_years)
+        + np.cumsum(cashflow, axis=-1)
+    )
+    return equity, cashflow, tax_savings
+
+
+# Input names each scenario depends on; used to factor sweeps and caches over unrelated inputs
+SCENARIO1_INPUTS = (
+    "pr_price",
+    "rental_price",
+    "down_pr1",
+    "rate_schedule",
+    "amort_years",
+    "rental_app",
+    "pr_app",
+    "heloc_delta",
+    "rental_rent_monthly",
+    "rental_vacancy",
+    "rental_prop_tax_base",
+    "rental_prop_tax_yoy_increase",
+    "rental_insurance_base",
+    "rental_insurance_yoy_increase",
+    "rental_maintenance_base",
+    "rental_maintenance_yoy_increase",
+    "rental_purchase_year",
+    "pr_prop_tax_base",
+    "pr_prop_tax_yoy_increase",
+    "pr_insurance_base",
+    "pr_insurance_yoy_increase",
+    "pr_maintenance_base",
+    "pr_maintenance_yoy_increase",
+    "cashflow_resolution",
+    "payment_frequency",
+    "purchase_month",
+)
+SCENARIO2_INPUTS = (
+    "pr_price",
+    "sm_return",
+    "down_pr2",
+    "rate_schedule",
+    "amort_years",
+    "income_start",
+    "income_growth",
+    "pr_app",
+    "heloc_loan",
+    "heloc_delta",
+    "sm_principal",
+    "pr_prop_tax_base",
+    "pr_prop_tax_yoy_increase",
+    "pr_insurance_base",
+    "pr_insurance_yoy_increase",
+    "pr_maintenance_base",
+    "pr_maintenance_yoy_increase",
+    "cashflow_resolution",
+    "payment_frequency",
+)
+
+
+def scenario1_from_inputs(inputs: Dict):
+    # Run scenario1_cashflow_batch from a sidebar-style inputs dict; any scalar input may be a
+    # (paths,) array to evaluate many variants at once
+    amort_years = inputs["amort_years"]
+    return scenario1_cashflow_batch(
+        inputs["pr_price"],
+        inputs["rental_price"],
+        inputs["down_pr1"],
+        resolve_rate_schedule(inputs["rate_schedule"], amort_years),
+        inputs["rental_app"],
+        inputs["pr_app"],
+        inputs["heloc_delta"],
+        inputs["rental_rent_monthly"],
+        inputs["rental_vacancy"],
+        growth_schedule(inputs["rental_prop_tax_base"], inputs["rental_prop_tax_yoy_increase"], amort_years),
+        growth_schedule(inputs["rental_insurance_base"], inputs["rental_insurance_yoy_increase"], amort_years),
+        growth_schedule(inputs["rental_maintenance_base"], inputs["rental_maintenance_yoy_increase"], amort_years),
+        inputs["rental_purchase_year"],
+        growth_schedule(inputs["pr_prop_tax_base"], inputs["pr_prop_tax_yoy_increase"], amort_years),
+        growth_schedule(inputs["pr_insurance_base"], inputs["pr_insurance_yoy_increase"], amort_years),
+        growth_schedule(inputs["pr_maintenance_base"], inputs["pr_maintenance_yoy_increase"], amort_years),
+        resolution=inputs.get("cashflow_resolution", "annual"),
+        payment_frequency=inputs.get("payment_frequency", "monthly"),
+        purchase_month=inputs.get("purchase_month", 1),
+    )
+
+
+def scenario2_from_inputs(inputs: Dict):
+    amort_years = inputs["amort_years"]
+    return scenario2_cashflow_batch(
+        inputs["pr_price"],
+        inputs["sm_return"],
+        inputs["down_pr2"],
+        resolve_rate_schedule(inputs["rate_schedule"], amort_years),
+        inputs["income_start"],
+        inputs["income_growth"],
+        inputs["pr_app"],
+        inputs["heloc_loan"],
+        inputs["heloc_delta"],
+        inputs["sm_principal"],
+        growth_schedule(inputs["pr_prop_tax_base"], inputs["pr_prop_tax_yoy_increase"], amort_years),
+        growth_schedule(inputs["pr_insurance_base"], inputs["pr_insurance_yoy_increase"], amort_years),
+        growth_schedule(inputs["pr_maintenance_base"], inputs["pr_maintenance_yoy_increase"], amort_years),
+        resolution=inputs.get("cashflow_resolution", "annual"),
+        payment_frequency=inputs.get("payment_frequency", "monthly"),
+    )
@@ -0,0 +1,263 @@
+# Parameter optimizer: searches a scenario's decision inputs (down payment, rental purchase year,
+# SM principal) for the best score_scenarios score. Candidates are evaluated in
+# vectorized batches through pipeline.run_projection and memoized by their lattice position.
+import itertools
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from models import SCENARIO1_INPUTS, SCENARIO2_INPUTS
+from pipeline import run_projection, stressed_inputs
+from utils import SCORE_OBJECTIVES, scenario_objectives
+
+# Searchable inputs as (low, high, step), matching the sidebar widgets; candidates lie on this
+# lattice. rental_purchase_year is also capped at amort_years. heloc_loan is left out: scenario 2
+# takes it but no model result depends on it yet, so every value would tie.
+DECISION_SPACE = {
+    "down_pr1": (0.0, 0.5, 0.01),
+    "down_pr2": (0.0, 0.5, 0.01),
+    "rental_purchase_year": (0, 30, 1),
+    "sm_principal": (0, 1_000_000, 10_000),
+}
+SCENARIO_DEPENDENCIES = {"Scenario 1": SCENARIO1_INPUTS, "Scenario 2": SCENARIO2_INPUTS}
+EVAL_CHUNK = 4096
+PARETO_BLOCK = 256
+# Fronts ranked by pareto_frontier; later plans share rank PARETO_RANKS
+PARETO_RANKS = 5
+
+
+def decision_lattice(name: str, amort_years: int) -> np.ndarray:
+    low, high, step = DECISION_SPACE[name]
+    if name == "rental_purchase_year":
+        high = min(high, amort_years)
+    return np.round(np.arange(low, high + step / 2, step), 10)
+
+
+def _weakly_dominates(front: np.ndarray, block: np.ndarray) -> np.ndarray:
+    # (len(block), len(front)) mask of front rows >= block rows in every objective, built one
+    # objective at a time (a reduction over the short objectives axis is far slower)
+    mask = front[:, 0] >= block[:, 0, None]
+    for j in range(1, block.shape[1]):
+        mask &= front[:, j] >= block[:, j, None]
+    return mask
+
+
+def _front_of_unique(values: np.ndarray) -> np.ndarray:
+    # Indices of the non-dominated rows among distinct rows. Rows are visited in an order where a
+    # row can only be dominated by an earlier one (weak dominance then implies strict).
+    n, k = values.shape
+    if k == 1:
+        return np.array([np.argmax(values[:, 0])])
+    if k == 2:
+        # Descending lexicographic order: a row survives iff its second objective beats every
+        # earlier row's, a running maximum, so the whole front costs one O(n log n) sort
+        order = np.lexsort((-values[:, 1], -values[:, 0]))
+        second = values[order, 1]
+        earlier_best = np.maximum.accumulate(np.concatenate(([-np.inf], second[:-1])))
+        return order[second > earlier_best]
+    # More objectives: descending sum of standardized objectives (ties broken lexicographically)
+    # puts plans that are good at everything first, so the front grows early and most rows are
+    # discarded by their first few comparisons. Each block is checked against the front in slices,
+    # dropping rows as soon as they are dominated, then its survivors against each other.
+    scale = values.std(axis=0)
+    strength = ((values - values.mean(axis=0)) / np.where(scale > 0, scale, 1)).sum(axis=1)
+    order = np.lexsort(tuple(-values[:, ::-1].T) + (-strength,))
+    front_idx: List[np.ndarray] = []
+    front = np.empty((0, k))
+    for start in range(0, n, PARETO_BLOCK):
+        idx = order[start : start + PARETO_BLOCK]
+        block = values[idx]
+        for front_start in range(0, len(front), PARETO_BLOCK):
+            dominated = _weakly_dominates(front[front_start : front_start + PARETO_BLOCK], block).any(axis=-1)
+            idx, block = idx[~dominated], block[~dominated]
+            if not len(idx):
+                break
+        if not len(idx):
+            continue
+        within = _weakly_dominates(block, block) & np.tri(len(idx), k=-1, dtype=bool)
+        survivors = ~within.any(axis=-1)
+        front_idx.append(idx[survivors])
+        front = np.concatenate((front, block[survivors]))
+    return np.concatenate(front_idx) if front_idx else np.empty(0, dtype=int)
+
+
+def pareto_front(values) -> np.ndarray:
+    # Indices (ascending) of the non-dominated rows of values (n, objectives), every objective
+    # maximized; equal rows are all kept or all dropped. Distinct rows are sorted once, O(n log n),
+    # then filtered in a single pass (see _front_of_unique) instead of being compared pairwise.
+    values = np.asarray(values, dtype=float)
+    if not len(values):
+        return np.empty(0, dtype=int)
+    # Group equal rows: after a lexicographic sort they are adjacent
+    order = np.lexsort(values.T[::-1])
+    ordered = values[order]
+    new_group = np.ones(len(values), dtype=bool)
+    new_group[1:] = (ordered[1:] != ordered[:-1]).any(axis=1)
+    group = np.cumsum(new_group) - 1
+    keep = np.zeros(group[-1] + 1, dtype=bool)
+    keep[_front_of_unique(ordered[new_group])] = True
+    mask = np.empty(len(values), dtype=bool)
+    mask[order] = keep[group]
+    return np.flatnonzero(mask)
+
+
+def pareto_ranks(values, max_rank: Optional[int] = None) -> np.ndarray:
+    # Non-dominated sorting: rank 0 for the Pareto front, 1 for the front of the rest, and so on.
+    # Fronts are peeled one at a time with pareto_front; rows past max_rank fronts get max_rank.
+    values = np.asarray(values, dtype=float)
+    ranks = np.full(len(values), -1 if max_rank is None else max_rank)
+    remaining = np.arange(len(values))
+    rank = 0
+    while len(remaining) and (max_rank is None or rank < max_rank):
+        front = pareto_front(values[remaining])
+        ranks[remaining[front]] = rank
+        remaining = np.delete(remaining, front)
+        rank += 1
+    return ranks
+
+
+def objective_vectors(inputs: Dict, scenario: str, candidates: Dict[str, np.ndarray], chunk_size: int = EVAL_CHUNK) -> np.ndarray:
+    # SCORE_OBJECTIVES of one scenario, shape (n, len(SCORE_OBJECTIVES)), for n candidate plans
+    # given as {input name: (n,) values} on top of inputs, projected chunk_size plans at a time
+    n = len(next(iter(candidates.values())))
+    values = np.empty((n, len(SCORE_OBJECTIVES)))
+    for start in range(0, n, chunk_size):
+        batch = dict(inputs)
+        batch.update({name: np.asarray(v)[start : start + chunk_size] for name, v in candidates.items()})
+        s1_equity, s2_equity, s1_cashflow, s2_cashflow, _ = run_projection(batch)
+        if scenario == "Scenario 1":
+            objectives = scenario_objectives(s1_equity, s1_cashflow)
+        else:
+            objectives = scenario_objectives(s2_equity, s2_cashflow)
+        size = min(chunk_size, n - start)
+        for i, name in enumerate(SCORE_OBJECTIVES):
+            values[start : start + size, i] = np.broadcast_to(objectives[name], size)
+    return values
+
+
+def scenario_variables(scenario: str) -> List[str]:
+    # The DECISION_SPACE inputs a scenario depends on
+    if scenario not in SCENARIO_DEPENDENCIES:
+        raise ValueError(f"Unknown scenario {scenario!r}, expected one of {tuple(SCENARIO_DEPENDENCIES)}")
+    return [name for name in DECISION_SPACE if name in SCENARIO_DEPENDENCIES[scenario]]
+
+
+def _evaluate(base: Dict, scenario: str, names, lattice, rows, memo: Dict) -> np.ndarray:
+    # Objective vectors (len(rows), len(SCORE_OBJECTIVES)) of lattice index rows; only rows missing
+    # from memo are projected
+    keys = [tuple(row) for row in np.asarray(rows).tolist()]
+    todo = [key for key in dict.fromkeys(keys) if key not in memo]
+    if todo:
+        idx = np.array(todo)
+        candidates = {name: lattice[j][idx[:, j]] for j, name in enumerate(names)}
+        memo.update(zip(todo, objective_vectors(base, scenario, candidates)))
+    return np.array([memo[key] for key in keys]).reshape(len(keys), len(SCORE_OBJECTIVES))
+
+
+def optimize_scenario(
+    inputs: Dict,
+    scenario: str = "Scenario 1",
+    optimize_for: Sequence[str] = ("Net Worth",),
+    variables: Optional[Sequence[str]] = None,
+    grid_points: int = 5,
+    starts: int = 3,
+    max_sweeps: int = 20,
+    stress: bool = False,
+) -> Dict:
+    # Maximize the sum of the optimize_for objectives (see utils.scenario_objectives) of one scenario
+    # over variables, by default every DECISION_SPACE input the scenario depends on. A coarse grid
+    # of grid_points values per variable is evaluated in one batch; the best starts cells then seed
+    # coordinate descent, where each step evaluates a variable's whole lattice line in one batch
+    # and moves to its best value until a full sweep brings no improvement. The other grid cells
+    # are pruned, and a descent that joins the path of an earlier one stops there, since the rest
+    # of that path has been explored. Every evaluation is memoized, so revisited lines cost nothing.
+    # Returns the best input values and score, plus every evaluated candidate with its objectives
+    # and the indices of their Pareto front over SCORE_OBJECTIVES.
+    weights = np.array([name in optimize_for for name in SCORE_OBJECTIVES], dtype=float)
+    if not weights.any():
+        raise ValueError(f"optimize_for needs at least one of {SCORE_OBJECTIVES}")
+    names = list(variables) if variables is not None else scenario_variables(scenario)
+    base = stressed_inputs(inputs) if stress else dict(inputs)
+    lattice = [decision_lattice(name, base["amort_years"]) for name in names]
+    memo: Dict[tuple, np.ndarray] = {}
+
+    def scores(rows):
+        return _evaluate(base, scenario, names, lattice, rows, memo) @ weights
+
+    axes = [np.unique(np.linspace(0, len(values) - 1, grid_points).round().astype(int)) for values in lattice]
+    grid = np.array(list(itertools.product(*axes)))
+    grid_scores = scores(grid)
+    explored = set()
+    best_row, best_score = grid[np.argmax(grid_scores)], grid_scores.max()
+    history: List[float] = [float(best_score)]
+    for start in np.argsort(-grid_scores, kind="stable")[:starts]:
+        current, current_score = grid[start], grid_scores[start]
+        path = [tuple(current)]
+        joined = path[0] in explored
+        for _ in range(max_sweeps):
+            improved = False
+            for j in range(len(names)):
+                if joined:
+                    break
+                line = np.repeat(current[None], len(lattice[j]), axis=0)
+                line[:, j] = np.arange(len(lattice[j]))
+                line_scores = scores(line)
+                step = np.argmax(line_scores)
+                if line_scores[step] > current_score:
+                    current, current_score, improved = line[step], line_scores[step], True
+                    path.append(tuple(current))
+                    joined = path[-1] in explored
+            if joined or not improved:
+                break
+        explored.update(path)
+        if current_score > best_score:
+            best_row, best_score = current, current_score
+            history.append(float(best_score))
+
+    rows = np.array(list(memo))
+    objectives = np.array([memo[key] for key in memo])
+    return {
+        "scenario": scenario,
+        "best": {name: float(lattice[j][best_row[j]]) for j, name in enumerate(names)},
+        "best_score": float(best_score),
+        "best_objectives": dict(zip(SCORE_OBJECTIVES, memo[tuple(best_row)].tolist())),
+        "candidates": {name: lattice[j][rows[:, j]] for j, name in enumerate(names)},
+        "objectives": {name: objectives[:, i] for i, name in enumerate(SCORE_OBJECTIVES)},
+        "scores": objectives @ weights,
+        "pareto": pareto_front(objectives),
+        "evaluations": len(memo),
+        "history": history,
+    }
+
+
+def pareto_frontier(
+    inputs: Dict,
+    scenario: str = "Scenario 1",
+    num_plans: int = 20_000,
+    variables: Optional[Sequence[str]] = None,
+    seed: Optional[int] = None,
+    stress: bool = False,
+) -> Dict:
+    # Pareto front of num_plans random plans, drawn uniformly from the lattice of each decision
+    # variable (by default those the scenario depends on), or of every plan when the lattice has at
+    # most num_plans points; plans are evaluated in vectorized batches.
+    # Returns the same candidates/objectives/pareto entries as optimize_scenario, plus each plan's
+    # non-dominated rank within the first few fronts.
+    names = list(variables) if variables is not None else scenario_variables(scenario)
+    base = stressed_inputs(inputs) if stress else dict(inputs)
+    lattice = [decision_lattice(name, base["amort_years"]) for name in names]
+    if np.prod([len(values) for values in lattice]) <= num_plans:
+        # Small enough to enumerate every plan
+        grid = np.meshgrid(*lattice, indexing="ij")
+        candidates = {name: values.ravel() for name, values in zip(names, grid)}
+    else:
+        rng = np.random.default_rng(seed)
+        candidates = {name: values[rng.integers(len(values), size=num_plans)] for name, values in zip(names, lattice)}
+    objectives = objective_vectors(base, scenario, candidates)
+    return {
+        "scenario": scenario,
+        "candidates": candidates,
+        "objectives": {name: objectives[:, i] for i, name in enumerate(SCORE_OBJECTIVES)},
+        "pareto": pareto_front(objectives),
+        "ranks": pareto_ranks(objectives, max_rank=PARETO_RANKS),
+    }
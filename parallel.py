@@ -0,0 +1,91 @@
+# Multi-process execution backend: shards scenario batches and Monte Carlo paths across a
+# ProcessPoolExecutor, in chunks sized to the core count
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pipeline import run_projection_records, scenario_inputs
+from simulation import MC_BLOCK_SIZE, monte_carlo_streaming, seed_sequence
+from stats import PathStats
+
+# Chunks per worker: a few per core keeps every core busy when chunks finish unevenly
+CHUNKS_PER_WORKER = 4
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def chunk_sizes(total: int, chunk_size: int) -> List[int]:
+    # total split into chunk_size pieces, the last one possibly shorter
+    return [min(chunk_size, total - start) for start in range(0, total, chunk_size)]
+
+
+def _project_chunk(records: List[Dict], stress: bool) -> List[Dict]:
+    return run_projection_records([scenario_inputs(r) for r in records], stress)
+
+
+def iter_projections_parallel(
+    records: Iterable[Dict], chunk_size: int = 1024, workers: Optional[int] = None, stress: bool = False
+) -> Iterator[Tuple[Dict, Dict]]:
+    # Parallel counterpart of pipeline.iter_projections: chunks of raw scenario records are projected
+    # in worker processes and (record, result) pairs are yielded in input order. At most
+    # CHUNKS_PER_WORKER chunks per worker are in flight, so memory stays bounded for any file size.
+    workers = workers or default_workers()
+    records = iter(records)
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        while True:
+            while len(pending) < workers * CHUNKS_PER_WORKER:
+                chunk = [record for _, record in zip(range(chunk_size), records)]
+                if not chunk:
+                    break
+                pending.append((chunk, pool.submit(_project_chunk, chunk, stress)))
+            if not pending:
+                return
+            chunk, future = pending.popleft()
+            yield from zip(chunk, future.result())
+
+
+def monte_carlo_parallel(
+    inputs: Dict,
+    mc_params: Dict,
+    num_simulations: int,
+    workers: Optional[int] = None,
+    seed: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    sampler: str = "random",
+    antithetic: bool = False,
+) -> Dict[str, PathStats]:
+    # Monte Carlo sharded across worker processes. Chunks are whole multiples of MC_BLOCK_SIZE paths
+    # and every block draws from its own SeedSequence.spawn streams of seed, so the statistics match
+    # simulation.monte_carlo_streaming with the same seed for any workers/chunk_size. chunk_size
+    # defaults to num_simulations / (CHUNKS_PER_WORKER * workers). Each worker streams its chunk
+    # into PathStats, which are merged here; returns the same dict as monte_carlo_streaming.
+    workers = workers or default_workers()
+    root = seed_sequence(seed)
+    if chunk_size is None:
+        chunk_size = -(-num_simulations // (workers * CHUNKS_PER_WORKER))
+    chunk_size = max(1, -(-chunk_size // MC_BLOCK_SIZE)) * MC_BLOCK_SIZE
+    sizes = chunk_sizes(num_simulations, chunk_size)
+    starts = [i * chunk_size for i in range(len(sizes))]
+    if workers == 1 or len(sizes) == 1:
+        partials = [
+            monte_carlo_streaming(inputs, mc_params, size, root, start, sampler=sampler, antithetic=antithetic)
+            for size, start in zip(sizes, starts)
+        ]
+    else:
+        with ProcessPoolExecutor(min(workers, len(sizes))) as pool:
+            futures = [
+                pool.submit(monte_carlo_streaming, inputs, mc_params, size, root, start, sampler=sampler, antithetic=antithetic)
+                for size, start in zip(sizes, starts)
+            ]
+            partials = [future.result() for future in futures]
+
+    merged: Dict = {"seed": root.entropy}
+    for partial in partials:
+        for name, stats in partial.items():
+            if isinstance(stats, PathStats):
+                merged.setdefault(name, PathStats(stats.years)).merge(stats)
+    return merged
@@ -0,0 +1,311 @@
+# Headless scenario pipeline: the model wiring behind the app's projection, without Streamlit/Plotly
+import itertools
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import SCENARIO_DEFAULTS
+from models import SCENARIO1_INPUTS, SCENARIO2_INPUTS, scenario1_from_inputs, scenario2_from_inputs
+from rates import RateSchedule, parse_rate_text
+from shocks import apply_shock, shock_targets
+from utils import (
+    MACRO_SCENARIOS,
+    REBALANCING_ACTIONS,
+    STRESS_TESTS,
+    TAX_CHANGES,
+    apply_drawdown,
+    apply_rebalancing,
+    apply_tax_change,
+    canonical_key,
+)
+
+SCENARIO_INPUTS = tuple(dict.fromkeys(SCENARIO1_INPUTS + SCENARIO2_INPUTS))
+PROJECTION_INPUTS = SCENARIO_INPUTS + ("rebalancing_action", "drawdown_amount", "future_tax_change")
+CHOICE_INPUTS = (
+    "stress_test",
+    "macro_scenario",
+    "rebalancing_action",
+    "future_tax_change",
+    "cashflow_resolution",
+    "payment_frequency",
+)
+# Inputs stress_matrix depends on; it runs every choice of the scenario selectboxes itself
+MATRIX_INPUTS = SCENARIO_INPUTS + ("drawdown_amount",)
+# Inputs that must be shared by every scenario evaluated in one vectorized batch
+GROUP_INPUTS = ("amort_years", "rate_schedule", "drawdown_amount") + CHOICE_INPUTS
+NUMERIC_INPUTS = tuple(name for name in SCENARIO_DEFAULTS if name not in CHOICE_INPUTS + ("rate_schedule",))
+# Inputs the stress tests and macro scenarios may change, besides the rate schedule
+STRESSED_INPUTS = tuple(name for name in shock_targets("stress_test", "macro_scenario") if name != "rate_schedule")
+SUMMARY_FIELDS = (
+    "s1_final_networth",
+    "s2_final_networth",
+    "difference",
+    "s1_total_cashflow",
+    "s2_total_cashflow",
+    "total_tax_savings",
+)
+
+
+def _rate_key(rate_schedule) -> Tuple[Tuple[int, float], ...]:
+    # Rate schedule from a file field: "year:rate %" text as in the sidebar, or a {year: rate} mapping
+    if isinstance(rate_schedule, str):
+        rate_schedule = _parse_rate_text(rate_schedule)
+    else:
+        rate_schedule = {int(yr): float(r) for yr, r in rate_schedule.items()}
+    if not rate_schedule:
+        raise ValueError("rate_schedule has no valid year:rate entries")
+    return tuple(sorted(rate_schedule.items()))
+
+
+# Scenario files repeat a handful of rate schedules, so each is parsed and resolved once
+_parse_rate_text = lru_cache(maxsize=256)(parse_rate_text)
+
+
+@lru_cache(maxsize=256)
+def _rate_schedule(rate_key, amort_years: int) -> RateSchedule:
+    return RateSchedule.from_dict(dict(rate_key), amort_years)
+
+
+def scenario_inputs(record: Dict) -> Dict:
+    # Full scenario inputs dict from one record of a scenario file (CSV row or JSON object): missing
+    # or empty fields take SCENARIO_DEFAULTS, numbers may be given as strings, unknown keys are kept
+    inputs = dict(SCENARIO_DEFAULTS)
+    inputs.update({name: value for name, value in record.items() if value not in ("", None)})
+    for name in NUMERIC_INPUTS:
+        inputs[name] = float(inputs[name])
+    inputs["amort_years"] = int(inputs["amort_years"])
+    inputs["rate_key"] = _rate_key(inputs["rate_schedule"])
+    inputs["rate_schedule"] = _rate_schedule(inputs["rate_key"], inputs["amort_years"])
+    return inputs
+
+
+def stressed_inputs(inputs: Dict) -> Dict:
+    # inputs with its stress_test's then its macro_scenario's shocks applied; scaling the rental
+    # expense bases scales their whole growth schedules
+    inputs = apply_shock(inputs, "stress_test", inputs["stress_test"])
+    return apply_shock(inputs, "macro_scenario", inputs["macro_scenario"])
+
+
+def run_projection(inputs: Dict):
+    # Both scenarios plus the rebalancing, drawdown and tax-change adjustments, as shown in the app.
+    # Any scalar numeric input may be a (K,) array to project K scenarios at once.
+    # Returns (s1_equity, s2_equity, s1_cashflow, s2_cashflow, tax_savings), each (years,) or (K, years).
+    s1_equity, s1_cashflow = scenario1_from_inputs(inputs)
+    s2_equity, s2_cashflow, tax_savings_list = scenario2_from_inputs(inputs)
+    # --- Apply Dynamic Rebalancing ---
+    s1_equity, s2_equity, s1_cashflow, s2_cashflow = apply_rebalancing(
+        s1_equity, s2_equity, s1_cashflow, s2_cashflow, inputs["rebalancing_action"]
+    )
+    # --- Apply Drawdown Analysis ---
+    s1_equity, s2_equity, s1_cashflow, s2_cashflow = apply_drawdown(
+        s1_equity, s2_equity, s1_cashflow, s2_cashflow, inputs["drawdown_amount"], inputs["amort_years"]
+    )
+    # --- Apply Tax Law Change ---
+    s1_equity, s2_equity = apply_tax_change(s1_equity, s2_equity, inputs["future_tax_change"])
+    return s1_equity, s2_equity, s1_cashflow, s2_cashflow, tax_savings_list
+
+
+class StageGraph:
+    # Dependency graph of named stages with per-stage memoization. A stage is a function of some
+    # named inputs and of earlier stages' outputs; its cache key hashes those inputs together with
+    # the keys of the stages it reads, so changing an input invalidates exactly the stages
+    # downstream of it. Each stage keeps its max_entries most recent results.
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max_entries
+        self.stages: Dict[str, Tuple[Callable, Tuple[str, ...], Tuple[str, ...]]] = {}
+        self.cache: Dict[str, OrderedDict] = {}
+        self.recomputed: List[str] = []
+
+    def add(self, name: str, func: Callable, inputs: Sequence[str] = (), stages: Sequence[str] = ()) -> "StageGraph":
+        # func(*stage outputs, **inputs); stages must already be in the graph, so insertion order
+        # is a topological order
+        for stage in stages:
+            if stage not in self.stages:
+                raise ValueError(f"Stage {name!r} depends on unknown stage {stage!r}")
+        self.stages[name] = (func, tuple(inputs), tuple(stages))
+        self.cache[name] = OrderedDict()
+        return self
+
+    def evaluate(self, inputs: Dict, target: Optional[str] = None) -> Dict:
+        # Outputs of every stage (or of target and the stages it needs), recomputing only stages
+        # whose key changed; their names are left in self.recomputed
+        needed = set(self.stages) if target is None else self._ancestors(target)
+        keys: Dict[str, str] = {}
+        values: Dict = {}
+        self.recomputed = []
+        for name, (func, input_names, stage_names) in self.stages.items():
+            if name not in needed:
+                continue
+            stage_inputs = {input_name: inputs[input_name] for input_name in input_names}
+            keys[name] = canonical_key({"inputs": stage_inputs, "stages": [keys[s] for s in stage_names]})
+            cache = self.cache[name]
+            if keys[name] in cache:
+                cache.move_to_end(keys[name])
+            else:
+                cache[keys[name]] = func(*[values[s] for s in stage_names], **stage_inputs)
+                self.recomputed.append(name)
+                if len(cache) > self.max_entries:
+                    cache.popitem(last=False)
+            values[name] = cache[keys[name]]
+        return values
+
+    def _ancestors(self, target: str) -> set:
+        needed, pending = set(), [target]
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.stages[name][2])
+        return needed
+
+
+def _scenario1_stage(**inputs):
+    return scenario1_from_inputs(inputs)
+
+
+def _scenario2_stage(**inputs):
+    return scenario2_from_inputs(inputs)
+
+
+def _rebalancing_stage(scenario1, scenario2, rebalancing_action):
+    return apply_rebalancing(scenario1[0], scenario2[0], scenario1[1], scenario2[1], rebalancing_action)
+
+
+def _drawdown_stage(rebalancing, drawdown_amount, amort_years):
+    return apply_drawdown(*rebalancing, drawdown_amount, amort_years)
+
+
+def _tax_change_stage(drawdown, future_tax_change):
+    return apply_tax_change(drawdown[0], drawdown[1], future_tax_change)
+
+
+def _projection_stage(scenario2, drawdown, tax_change):
+    # Same tuple as run_projection
+    return tax_change[0], tax_change[1], drawdown[2], drawdown[3], scenario2[2]
+
+
+def projection_graph(max_entries: int = 8) -> StageGraph:
+    # run_projection as a StageGraph: each scenario depends only on its own inputs, and the
+    # rebalancing, drawdown and tax-change adjustments are separate stages, so e.g. a new
+    # future_tax_change reruns just the last two stages. The "projection" stage holds the
+    # run_projection tuple.
+    return (
+        StageGraph(max_entries)
+        .add("scenario1", _scenario1_stage, SCENARIO1_INPUTS)
+        .add("scenario2", _scenario2_stage, SCENARIO2_INPUTS)
+        .add("rebalancing", _rebalancing_stage, ("rebalancing_action",), ("scenario1", "scenario2"))
+        .add("drawdown", _drawdown_stage, ("drawdown_amount", "amort_years"), ("rebalancing",))
+        .add("tax_change", _tax_change_stage, ("future_tax_change",), ("drawdown",))
+        .add("projection", _projection_stage, stages=("scenario2", "drawdown", "tax_change"))
+    )
+
+
+def stress_matrix(inputs: Dict) -> Dict:
+    # Summary of every stress test x macro scenario x rebalancing action x tax change combination
+    # for one scenario inputs dict. The stress/macro pairs change the model inputs, so their
+    # variants are stacked into (pairs,) inputs and (pairs, years) rates and both scenarios are
+    # projected once for all of them; each rebalancing action, the drawdown and each tax change
+    # are then applied once to the whole stack. Returns the choices under "axes" and every
+    # SUMMARY_FIELDS entry as an array of shape (stress tests, macro scenarios, rebalancing
+    # actions, tax changes), in the order of "axes".
+    amort_years = inputs["amort_years"]
+    variants = [
+        stressed_inputs(dict(inputs, stress_test=stress, macro_scenario=macro))
+        for stress, macro in itertools.product(STRESS_TESTS, MACRO_SCENARIOS)
+    ]
+    batch = dict(inputs)
+    for name in STRESSED_INPUTS:
+        batch[name] = np.array([variant[name] for variant in variants], dtype=float)
+    batch["rate_schedule"] = RateSchedule(
+        np.stack([RateSchedule.coerce(variant["rate_schedule"], amort_years).annual(amort_years) for variant in variants])
+    )
+    s1_equity, s1_cashflow = scenario1_from_inputs(batch)
+    s2_equity, s2_cashflow, tax_savings = scenario2_from_inputs(batch)
+
+    # (rebalancing actions, pairs, years)
+    s1_equity, s2_equity, s1_cashflow, s2_cashflow = (
+        np.stack(arrays)
+        for arrays in zip(
+            *(apply_rebalancing(s1_equity, s2_equity, s1_cashflow, s2_cashflow, action) for action in REBALANCING_ACTIONS)
+        )
+    )
+    s1_equity, s2_equity, s1_cashflow, s2_cashflow = apply_drawdown(
+        s1_equity, s2_equity, s1_cashflow, s2_cashflow, inputs["drawdown_amount"], amort_years
+    )
+    # (tax changes, rebalancing actions, pairs)
+    s1_final, s2_final = (
+        np.stack(equities)[..., -1]
+        for equities in zip(*(apply_tax_change(s1_equity, s2_equity, change) for change in TAX_CHANGES))
+    )
+
+    axes = {
+        "stress_test": STRESS_TESTS,
+        "macro_scenario": MACRO_SCENARIOS,
+        "rebalancing_action": REBALANCING_ACTIONS,
+        "future_tax_change": TAX_CHANGES,
+    }
+    shape = tuple(len(choices) for choices in axes.values())
+
+    def to_grid(values):
+        # (tax changes, rebalancing actions, pairs) or (rebalancing actions, pairs) to the axes order
+        values = np.broadcast_to(values, (len(TAX_CHANGES),) + np.shape(values)[-2:])
+        return np.transpose(values, (2, 1, 0)).reshape(shape)
+
+    return {
+        "axes": axes,
+        "s1_final_networth": to_grid(s1_final),
+        "s2_final_networth": to_grid(s2_final),
+        "difference": to_grid(s1_final - s2_final),
+        "s1_total_cashflow": to_grid(s1_cashflow.sum(axis=-1)),
+        "s2_total_cashflow": to_grid(s2_cashflow.sum(axis=-1)),
+        "total_tax_savings": to_grid(np.broadcast_to(tax_savings.sum(axis=-1), s1_cashflow.shape[:-1])),
+    }
+
+
+def _group_key(inputs: Dict):
+    return tuple(inputs["rate_key"] if name == "rate_schedule" else inputs[name] for name in GROUP_INPUTS)
+
+
+def run_projection_records(records: List[Dict], stress: bool = False) -> List[Dict]:
+    # Project a list of scenario inputs dicts (see scenario_inputs). Records sharing amort_years,
+    # rate schedule, drawdown and the scenario choices are stacked into (K,) inputs and projected in
+    # one vectorized call. Returns one summary dict per record, in input order.
+    groups: Dict[tuple, List[int]] = {}
+    for i, inputs in enumerate(records):
+        groups.setdefault(_group_key(inputs), []).append(i)
+    results: List[Dict] = [{} for _ in records]
+    for idx in groups.values():
+        first = records[idx[0]]
+        batch = {name: first[name] for name in GROUP_INPUTS}
+        for name in SCENARIO_INPUTS:
+            if name not in GROUP_INPUTS:
+                batch[name] = np.array([records[i][name] for i in idx], dtype=float)
+        if stress:
+            batch = stressed_inputs(batch)
+        s1_equity, s2_equity, s1_cashflow, s2_cashflow, tax_savings = run_projection(batch)
+        summary = zip(
+            s1_equity[:, -1].tolist(),
+            s2_equity[:, -1].tolist(),
+            (s1_equity[:, -1] - s2_equity[:, -1]).tolist(),
+            s1_cashflow.sum(axis=-1).tolist(),
+            s2_cashflow.sum(axis=-1).tolist(),
+            tax_savings.sum(axis=-1).tolist(),
+        )
+        for row, (i, values) in enumerate(zip(idx, summary)):
+            results[i] = dict(zip(SUMMARY_FIELDS, values), s1_equity=s1_equity[row], s2_equity=s2_equity[row])
+    return results
+
+
+def iter_projections(records: Iterable[Dict], chunk_size: int = 1024, stress: bool = False) -> Iterator[Tuple[Dict, Dict]]:
+    # Stream (record, result) pairs for raw scenario-file records, projecting chunk_size records at a time
+    chunk: List[Dict] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield from zip(chunk, run_projection_records([scenario_inputs(r) for r in chunk], stress))
+            chunk = []
+    if chunk:
+        yield from zip(chunk, run_projection_records([scenario_inputs(r) for r in chunk], stress))
@@ -0,0 +1,198 @@
+# Mortgage rate schedules resolved once into dense per-year / per-month rate arrays, and stochastic
+# (paths, years) rate paths for the Monte Carlo
+import csv
+import io
+from typing import Dict, Optional
+
+import numpy as np
+
+
+def parse_rate_text(rate_text: str) -> Dict[int, float]:
+    # "1:3.95,3:3.45,5:3.25" (start year: rate %) -> {1: 0.0395, 3: 0.0345, 5: 0.0325}; entries
+    # without a ":" or outside year > 0, 0 < rate < 1 are skipped, malformed numbers raise ValueError
+    rate_schedule = {}
+    for item in rate_text.split(","):
+        if ":" not in item:
+            continue
+        yr, r = item.split(":")
+        yr = int(yr.strip())
+        r = float(r.strip()) / 100
+        if yr > 0 and 0 < r < 1:
+            rate_schedule[yr] = r
+    return rate_schedule
+
+
+class RateSchedule:
+    # A piecewise {start_year: rate} schedule stored as one rate per year, shape (years,), or one
+    # rate path per simulation, shape (paths, years). Lookups are plain array indexing and shocks
+    # return a new schedule, so the same object serves the scenario kernels, the stress functions
+    # and the Monte Carlo.
+
+    def __init__(self, annual_rates):
+        self.annual_rates = np.asarray(annual_rates, dtype=float)
+
+    @classmethod
+    def from_dict(cls, rate_schedule: Dict[int, float], amort_years: Optional[int] = None) -> "RateSchedule":
+        # Years before the first scheduled change use the first rate; the last rate carries on
+        start_years = sorted(rate_schedule)
+        horizon = max(start_years[-1], amort_years or 0)
+        rates = np.full(horizon, rate_schedule[start_years[0]], dtype=float)
+        for yr in start_years[1:]:
+            rates[yr - 1 :] = rate_schedule[yr]
+        return cls(rates)
+
+    @classmethod
+    def coerce(cls, rate_schedule, amort_years: Optional[int] = None) -> "RateSchedule":
+        if isinstance(rate_schedule, RateSchedule):
+            return rate_schedule
+        if isinstance(rate_schedule, dict):
+            return cls.from_dict(rate_schedule, amort_years)
+        return cls(rate_schedule)
+
+    @property
+    def years(self) -> int:
+        return self.annual_rates.shape[-1]
+
+    def annual(self, amort_years: Optional[int] = None) -> np.ndarray:
+        # Dense per-year rates over amort_years, extending the last rate past the stored horizon
+        if amort_years is None or amort_years == self.years:
+            return self.annual_rates
+        if amort_years < self.years:
+            return self.annual_rates[..., :amort_years]
+        pad = [(0, 0)] * (self.annual_rates.ndim - 1) + [(0, amort_years - self.years)]
+        return np.pad(self.annual_rates, pad, mode="edge")
+
+    def monthly(self, amort_years: Optional[int] = None) -> np.ndarray:
+        return np.repeat(self.annual(amort_years), 12, axis=-1)
+
+    def rate(self, year: int):
+        # Rate in effect during a 1-based year (per path for a batched schedule)
+        return self.annual_rates[..., min(max(year, 1), self.years) - 1]
+
+    def shift(self, delta) -> "RateSchedule":
+        # Parallel shock, e.g. +0.02; a (paths,) delta gives one shocked schedule per path
+        delta = np.asarray(delta, dtype=float)
+        return RateSchedule(self.annual_rates + (delta[..., None] if delta.ndim == 1 else delta))
+
+    def __add__(self, delta) -> "RateSchedule":
+        return self.shift(delta)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.annual_rates if dtype is None else self.annual_rates.astype(dtype)
+
+    def mean(self):
+        return self.annual_rates.mean(axis=-1)
+
+    def __repr__(self) -> str:
+        return f"RateSchedule(shape={self.annual_rates.shape})"
+
+
+# Rates never go below this floor on simulated paths
+MIN_RATE = 0.001
+# The bootstrap resamples blocks of BOOTSTRAP_BLOCK_SIZE yearly changes and needs a history
+# spanning at least BOOTSTRAP_MIN_BLOCKS blocks (MIN_RATE_HISTORY years of rates)
+BOOTSTRAP_BLOCK_SIZE = 3
+BOOTSTRAP_MIN_BLOCKS = 4
+MIN_RATE_HISTORY = BOOTSTRAP_BLOCK_SIZE * BOOTSTRAP_MIN_BLOCKS + 1
+
+
+def short_rate_paths(
+    r0,
+    long_run_mean: float,
+    long_run_std: float,
+    reversion: float,
+    n_paths: int,
+    years: int,
+    rng: np.random.Generator,
+    model: str = "vasicek",
+    steps_per_year: int = 12,
+) -> RateSchedule:
+    # Mean-reverting rate paths, one row per path, sampled at the start of every year:
+    # "vasicek": dr = k (theta - r) dt + sigma dW, exact Gaussian transition
+    # "cir": dr = k (theta - r) dt + sigma sqrt(r) dW, full-truncation Euler with steps_per_year steps
+    # sigma is set so the stationary std is long_run_std; r0 is a scalar or (paths,) start rate.
+    r = np.broadcast_to(np.asarray(r0, dtype=float), (n_paths,)).copy()
+    rates = np.empty((n_paths, years))
+    dt = 1.0 / steps_per_year
+    if model == "vasicek":
+        sigma = long_run_std * np.sqrt(2 * reversion)
+        decay = np.exp(-reversion * dt)
+        step_std = sigma * np.sqrt((1 - decay**2) / (2 * reversion)) if reversion > 0 else sigma * np.sqrt(dt)
+    elif model == "cir":
+        sigma = long_run_std * np.sqrt(2 * reversion / max(long_run_mean, MIN_RATE))
+    else:
+        raise ValueError(f"Unknown rate model {model!r}, expected 'vasicek' or 'cir'")
+    shocks = rng.standard_normal((years - 1, steps_per_year, n_paths))
+    rates[:, 0] = r
+    for year in range(1, years):
+        for z in shocks[year - 1]:
+            if model == "vasicek":
+                r = long_run_mean + (r - long_run_mean) * decay + step_std * z
+            else:
+                r_pos = np.maximum(r, 0)
+                r = r + reversion * (long_run_mean - r_pos) * dt + sigma * np.sqrt(r_pos * dt) * z
+        rates[:, year] = r
+    return RateSchedule(np.maximum(rates, MIN_RATE))
+
+
+def load_rate_history(source) -> np.ndarray:
+    # Annual rate history from a CSV path or file object: the "rate" column (or the last column),
+    # one row per year in order; values above 1 are read as percent
+    if isinstance(source, (bytes, bytearray)):
+        source = io.StringIO(source.decode())
+    f = open(source, newline="") if isinstance(source, str) else source
+    try:
+        rows = [row for row in csv.reader(f) if row]
+    finally:
+        if isinstance(source, str):
+            f.close()
+    header = [cell.strip().lower() for cell in rows[0]]
+    if "rate" in header:
+        col, rows = header.index("rate"), rows[1:]
+    else:
+        col = -1
+        try:
+            float(rows[0][col])
+        except ValueError:
+            rows = rows[1:]
+    history = np.array([float(row[col]) for row in rows])
+    return history / 100 if np.nanmax(history) > 1 else history
+
+
+def bootstrap_rate_paths(
+    rate_schedule: RateSchedule,
+    history,
+    n_paths: int,
+    rng: np.random.Generator,
+    block_size: int = BOOTSTRAP_BLOCK_SIZE,
+    demean: bool = True,
+    reversion: float = 0.3,
+) -> RateSchedule:
+    # Paths around the deterministic schedule: year-over-year rate changes resampled in blocks of
+    # block_size consecutive historical years (keeping their autocorrelation) accumulate into a
+    # shift added to the schedule from year 2 on. Blocks wrap around the end of the history
+    # (circular bootstrap), so every change is drawn equally often and demean, which removes the
+    # history's trend, keeps the shifts centred on zero. The shift decays toward zero by
+    # exp(-reversion) a year (0: a plain cumulative walk), so its spread levels off instead of
+    # growing with the horizon. The MIN_RATE floor still lifts the mean of the paths by the part of
+    # the lower tail it clips: a few basis points at the default reversion for a schedule a couple
+    # of standard deviations above the floor, but growing as the reversion goes to 0.
+    changes = np.diff(np.asarray(history, dtype=float))
+    if len(changes) < block_size * BOOTSTRAP_MIN_BLOCKS:
+        raise ValueError(
+            f"Rate history of {len(changes) + 1} years is too short to bootstrap blocks of {block_size} years; "
+            f"need at least {block_size * BOOTSTRAP_MIN_BLOCKS + 1}"
+        )
+    if demean:
+        changes = changes - changes.mean()
+    base = rate_schedule.annual_rates
+    years = base.shape[-1]
+    n_blocks = -(-(years - 1) // block_size)
+    starts = rng.integers(0, len(changes), (n_paths, n_blocks))
+    idx = ((starts[..., None] + np.arange(block_size)) % len(changes)).reshape(n_paths, -1)[:, : years - 1]
+    steps = changes[idx]
+    decay = np.exp(-reversion)
+    shifts = np.zeros((n_paths, years))
+    for year in range(1, years):
+        shifts[:, year] = shifts[:, year - 1] * decay + steps[:, year - 1]
+    return RateSchedule(np.maximum(base + shifts, MIN_RATE))
@@ -0,0 +1,74 @@
+# Quasi-Monte Carlo point sets on the unit cube and their mapping to standard normals
+import importlib
+import warnings
+
+import numpy as np
+
+SAMPLERS = ("random", "lhs", "sobol")
+
+# Acklam's rational approximation to the inverse normal CDF (relative error below 1.2e-9)
+_A = (-3.969683028665376e01, 2.209460984245205e02, -2.759285104469687e02, 1.383577518672690e02, -3.066479806614716e01, 2.506628277459239e00)
+_B = (-5.447609879822406e01, 1.615858368580409e02, -1.556989798598866e02, 6.680131188771972e01, -1.328068155288572e01)
+_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e00, -2.549732539343734e00, 4.374664141464968e00, 2.938163982698783e00)
+_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e00, 3.754408661907416e00)
+_P_LOW = 0.02425
+
+
+def norm_ppf(u) -> np.ndarray:
+    # Standard normal quantile of u in (0, 1)
+    u = np.asarray(u, dtype=float)
+    z = np.empty_like(u)
+    low, high = u < _P_LOW, u > 1 - _P_LOW
+    mid = ~(low | high)
+    q = u[mid] - 0.5
+    r = q * q
+    num = ((((_A[0] * r + _A[1]) * r + _A[2]) * r + _A[3]) * r + _A[4]) * r + _A[5]
+    den = ((((_B[0] * r + _B[1]) * r + _B[2]) * r + _B[3]) * r + _B[4]) * r + 1
+    z[mid] = q * num / den
+    for mask, sign, p in ((low, 1, u[low]), (high, -1, 1 - u[high])):
+        q = np.sqrt(-2 * np.log(p))
+        num = (((((_C[0] * q + _C[1]) * q + _C[2]) * q + _C[3]) * q + _C[4]) * q + _C[5])
+        den = ((((_D[0] * q + _D[1]) * q + _D[2]) * q + _D[3]) * q + 1)
+        z[mask] = sign * num / den
+    return z
+
+
+def latin_hypercube(n: int, d: int, rng: np.random.Generator) -> np.ndarray:
+    # One point in each of the n equal strata of every dimension, strata shuffled independently
+    strata = rng.permuted(np.tile(np.arange(n), (d, 1)), axis=1).T
+    return (strata + rng.random((n, d))) / n
+
+
+def sobol_available() -> bool:
+    # Whether scipy.stats.qmc can be imported, so callers only offer the Sobol sampler when it can run
+    try:
+        importlib.import_module("scipy.stats.qmc")
+    except ImportError:
+        return False
+    return True
+
+
+def sobol(n: int, d: int, rng: np.random.Generator) -> np.ndarray:
+    # Scrambled (Owen) Sobol points; needs scipy, which the rest of the app does not
+    try:
+        from scipy.stats import qmc
+    except ImportError as e:
+        raise ImportError("The Sobol sampler needs scipy (pip install scipy); use 'lhs' instead") from e
+    with warnings.catch_warnings():
+        # Balance is best at powers of two, but any prefix of a scrambled sequence is still valid
+        warnings.simplefilter("ignore", UserWarning)
+        return qmc.Sobol(d, scramble=True, seed=rng).random(n)
+
+
+def standard_normals(sampler: str, n: int, d: int, rng: np.random.Generator) -> np.ndarray:
+    # (n, d) standard normal draws from one randomized point set of the given sampler
+    if sampler == "lhs":
+        u = latin_hypercube(n, d, rng)
+    elif sampler == "sobol":
+        u = sobol(n, d, rng)
+    elif sampler == "random":
+        return rng.standard_normal((n, d))
+    else:
+        raise ValueError(f"Unknown sampler {sampler!r}, expected one of {SAMPLERS}")
+    # Keep u strictly inside (0, 1) so the tails stay finite
+    return norm_ppf(np.clip(u, 1e-12, 1 - 1e-12))
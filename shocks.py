@@ -0,0 +1,185 @@
+# Declarative shocks: every choice of the stress test, macro scenario, rebalancing and tax change
+# selectboxes is a tuple of operations on named variables, compiled once into numpy array
+# operations. A compiled shock costs the same for one scenario, a (K,) batch or (paths, years) draws.
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import CUSTOM_SHOCKS
+from rates import RateSchedule
+
+# Operation dicts, as written in config.CUSTOM_SHOCKS:
+#   {"op": "scale", "target": name, "value": factor}
+#   {"op": "add", "target": name, "value": delta}
+#   {"op": "clip", "target": name, "lower": lo, "upper": hi}     (either bound may be left out)
+#   {"op": "hold", "target": name}                               (value frozen at the window's first year)
+# Any op may add "years": (first, last), 1-based and inclusive, last None for "to the end"; windowed
+# ops need a per-year target (rate_schedule, or the equity and cash flow projections).
+SHOCK_OPS = ("scale", "add", "clip", "hold")
+
+
+def scale(target: str, value, years: Optional[Tuple] = None) -> Dict:
+    return {"op": "scale", "target": target, "value": value, "years": years}
+
+
+def add(target: str, value, years: Optional[Tuple] = None) -> Dict:
+    return {"op": "add", "target": target, "value": value, "years": years}
+
+
+def clip(target: str, lower=None, upper=None, years: Optional[Tuple] = None) -> Dict:
+    return {"op": "clip", "target": target, "lower": lower, "upper": upper, "years": years}
+
+
+def hold(target: str, years: Optional[Tuple] = None) -> Dict:
+    return {"op": "hold", "target": target, "years": years}
+
+
+_RATE_SPIKE = (add("rate_schedule", 0.02),)
+_MARKET_CRASH = (scale("pr_app", 0.5), scale("rental_app", 0.5), scale("sm_return", 0.5))
+_RENT_DROP = (scale("rental_rent_monthly", 0.7),)
+_HIGH_VACANCY = (add("rental_vacancy", 0.15), clip("rental_vacancy", upper=1))
+# Rebalancing actions take effect from year 6
+_CORRECTION_YEARS = (6, None)
+
+# Shock groups, keyed by the scenario input that selects one of their shocks, in sidebar order
+SHOCKS: Dict[str, Dict[str, Tuple[Dict, ...]]] = {
+    "stress_test": {
+        "None": (),
+        "Interest Rate Spike": _RATE_SPIKE,
+        "Market Crash": _MARKET_CRASH,
+        "Rent Drop": _RENT_DROP,
+        "High Vacancy": _HIGH_VACANCY,
+        "Combined Shock": _RATE_SPIKE + _MARKET_CRASH + _RENT_DROP + _HIGH_VACANCY,
+    },
+    "macro_scenario": {
+        "Base Case": (),
+        "Recession": (
+            scale("pr_app", 0.7),
+            scale("rental_app", 0.7),
+            scale("sm_return", 0.7),
+            scale("rental_rent_monthly", 0.9),
+            add("rental_vacancy", 0.05),
+            clip("rental_vacancy", upper=1),
+        ),
+        "Inflation": (
+            scale("rental_prop_tax_base", 1.2),
+            scale("rental_insurance_base", 1.2),
+            scale("rental_maintenance_base", 1.2),
+            add("rate_schedule", 0.01),
+        ),
+        "Housing Boom": (scale("pr_app", 1.5), scale("rental_app", 1.5), scale("rental_rent_monthly", 1.2)),
+        "Housing Bust": (
+            scale("pr_app", 0.5),
+            scale("rental_app", 0.5),
+            scale("rental_rent_monthly", 0.8),
+            add("rental_vacancy", 0.10),
+            clip("rental_vacancy", upper=1),
+        ),
+    },
+    "rebalancing_action": {
+        "None": (),
+        "Sell Rental Property": (hold("s1_equity", _CORRECTION_YEARS), scale("s1_cashflow", 0, _CORRECTION_YEARS)),
+        "Refinance PR": (add("s1_cashflow", 50_000, _CORRECTION_YEARS),),
+        "Increase Investment": (scale("s2_equity", 1.1, _CORRECTION_YEARS),),
+        "Reduce Debt": (add("s1_equity", 25_000, _CORRECTION_YEARS), add("s2_equity", 25_000, _CORRECTION_YEARS)),
+    },
+    "future_tax_change": {
+        "None": (),
+        "Increase Capital Gains Tax": (scale("s1_equity", 0.85), scale("s2_equity", 0.85)),
+        "Increase Property Tax": (add("s1_equity", -5000), add("s2_equity", -5000)),
+        "Remove Mortgage Interest Deductibility": (scale("s2_equity", 0.95),),
+    },
+}
+for _group, _shocks in CUSTOM_SHOCKS.items():
+    if _group not in SHOCKS:
+        raise ValueError(f"Unknown shock group {_group!r} in CUSTOM_SHOCKS, expected one of {tuple(SHOCKS)}")
+    SHOCKS[_group].update({name: tuple(ops) for name, ops in _shocks.items()})
+
+
+def _window(years: Optional[Sequence]) -> Optional[slice]:
+    # 1-based inclusive (first, last) years to a slice of the year axis
+    if years is None:
+        return None
+    first, last = years
+    if first < 1 or (last is not None and last < first):
+        raise ValueError(f"Invalid shock years {years!r}, expected (first, last) with 1 <= first <= last")
+    return slice(first - 1, last)
+
+
+def _compile_op(op: Dict) -> Tuple[str, Callable]:
+    # One operation dict to (target, function of the target's value)
+    kind, target = op.get("op"), op.get("target")
+    if kind not in SHOCK_OPS:
+        raise ValueError(f"Unknown shock op {kind!r}, expected one of {SHOCK_OPS}")
+    if not isinstance(target, str):
+        raise ValueError(f"Shock op {op!r} needs a target variable name")
+    if kind == "scale":
+        value = op["value"]
+        step = lambda x: x * value
+    elif kind == "add":
+        value = op["value"]
+        step = lambda x: x + value
+    elif kind == "clip":
+        lower, upper = op.get("lower"), op.get("upper")
+
+        def step(x):
+            if lower is not None:
+                x = np.maximum(x, lower)
+            if upper is not None:
+                x = np.minimum(x, upper)
+            return x
+
+    else:
+        step = lambda x: np.broadcast_to(x[..., :1], x.shape)
+    window = _window(op.get("years"))
+    if window is None and kind == "hold":
+        window = slice(None)
+
+    def apply(x):
+        if isinstance(x, (RateSchedule, dict)):
+            rates = RateSchedule.coerce(x)
+            if window is not None:
+                # Extend the schedule into the window (and past a bounded one, so the unshocked
+                # rate carries on after it) before slicing it
+                horizon = (window.start or 0) + 1 if window.stop is None else window.stop + 1
+                return RateSchedule(apply(rates.annual(max(rates.years, horizon))))
+            return RateSchedule(apply(rates.annual_rates))
+        x = np.asarray(x, dtype=float)
+        if window is None:
+            return step(x)
+        if x.ndim == 0:
+            raise ValueError(f"Shock op {kind!r} on {target!r} has a year window but {target!r} is not per-year")
+        x = x.copy()
+        x[..., window] = step(x[..., window])
+        return x
+
+    return target, apply
+
+
+def compile_shock(ops: Iterable[Dict]) -> Callable[[Dict], Dict]:
+    # Operations applied in order to a dict of named values; returns a new dict with the shocked
+    # targets replaced and everything else passed through
+    steps = [_compile_op(op) for op in ops]
+
+    def apply(values: Dict) -> Dict:
+        values = dict(values)
+        for target, step in steps:
+            values[target] = step(values[target])
+        return values
+
+    return apply
+
+
+_COMPILED = {group: {name: compile_shock(ops) for name, ops in shocks.items()} for group, shocks in SHOCKS.items()}
+
+
+def apply_shock(values: Dict, group: str, name: str) -> Dict:
+    # values with the shock the group's choice name applied
+    if name not in _COMPILED[group]:
+        raise ValueError(f"Unknown {group} {name!r}, expected one of {tuple(SHOCKS[group])}")
+    return _COMPILED[group][name](values)
+
+
+def shock_targets(*groups: str) -> Tuple[str, ...]:
+    # Every variable some shock of the groups changes, in first-use order
+    return tuple(dict.fromkeys(op["target"] for group in groups for ops in SHOCKS[group].values() for op in ops))
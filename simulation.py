@@ -1,11 +1,664 @@
 # Monte Carlo simulation and sensitivity analysis logic
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
 import numpy as np
 import pandas as pd
 
-def monte_carlo_simulation(...):
-    # ...existing code...
-    pass
+from models import (
+    SCENARIO1_INPUTS,
+    SCENARIO2_INPUTS,
+    growth_schedule,
+    resolve_rate_schedule,
+    scenario1_cashflow_batch,
+    scenario1_from_inputs,
+    scenario2_cashflow_batch,
+    scenario2_from_inputs,
+)
+from rates import RateSchedule, bootstrap_rate_paths, short_rate_paths
+from sampling import norm_ppf, standard_normals
+from stats import PathStats
+from utils import apply_stress_and_macro
+
+# Inputs monte_carlo_simulation reads from the scenario inputs dict
+MONTE_CARLO_INPUTS = (
+    "pr_price",
+    "rental_price",
+    "down_pr1",
+    "down_pr2",
+    "amort_years",
+    "income_start",
+    "income_growth",
+    "heloc_loan",
+    "heloc_delta",
+    "sm_principal",
+    "pr_prop_tax_base",
+    "pr_prop_tax_yoy_increase",
+    "pr_insurance_yoy_increase",
+    "pr_maintenance_yoy_increase",
+    "rental_rent_monthly",
+    "rental_vacancy",
+    "rental_prop_tax_base",
+    "rental_prop_tax_yoy_increase",
+    "rental_insurance_base",
+    "rental_insurance_yoy_increase",
+    "rental_maintenance_base",
+    "rental_maintenance_yoy_increase",
+    "rental_purchase_year",
+    "rate_schedule",
+    "stress_test",
+    "macro_scenario",
+    "cashflow_resolution",
+    "payment_frequency",
+    "purchase_month",
+)
+
+
+# Paths are drawn in fixed blocks of MC_BLOCK_SIZE, each with one Generator per variable group
+# spawned from the run's SeedSequence. A path's draws therefore depend only on (seed, path index):
+# a run split into block-aligned chunks across processes reproduces the single-process run exactly,
+# and changing one group's parameters leaves the other groups' draws unchanged.
+MC_BLOCK_SIZE = 4096
+RNG_GROUPS = ("markets", "rental", "pr_expenses", "income", "rates")
+# Quasi-Monte Carlo samplers ("lhs", "sobol") split every block into this many independently
+# randomized point sets, so the spread of the replicate means gives an honest standard error
+QMC_REPLICATES = 8
+
+
+def seed_sequence(seed=None) -> np.random.SeedSequence:
+    # SeedSequence for an int seed, an existing SeedSequence, or fresh OS entropy for None
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+
+def _block_streams(root: np.random.SeedSequence, block: int) -> Dict[str, np.random.Generator]:
+    # Same child as root.spawn(block + 1)[block], without spawning every earlier block
+    block_seq = np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + (block,))
+    return dict(zip(RNG_GROUPS, map(np.random.default_rng, block_seq.spawn(len(RNG_GROUPS)))))
+
+
+def _normal_inputs(inputs: Dict, mc_params: Dict):
+    # (group, name, mean, std) of every independent normal input, in draw order within each group
+    rent_growth_std = mc_params["rent_growth_std"]
+    return [
+        ("rental", "rent_monthly_sim", inputs["rental_rent_monthly"], rent_growth_std),
+        ("rental", "vacancy_sim", inputs["rental_vacancy"], mc_params["vacancy_std"]),
+        (
+            "rental",
+            "prop_tax_sim",
+            inputs["rental_prop_tax_base"],
+            inputs["rental_prop_tax_base"] * inputs["rental_prop_tax_yoy_increase"],
+        ),
+        (
+            "rental",
+            "insurance_sim",
+            inputs["rental_insurance_base"],
+            inputs["rental_insurance_base"] * inputs["rental_insurance_yoy_increase"],
+        ),
+        (
+            "rental",
+            "maintenance_sim",
+            inputs["rental_maintenance_base"],
+            inputs["rental_maintenance_base"] * inputs["rental_maintenance_yoy_increase"],
+        ),
+        ("rental", "rental_prop_tax_base", inputs["rental_prop_tax_base"], mc_params["prop_tax_std"]),
+        ("rental", "rental_prop_tax_yoy", inputs["rental_prop_tax_yoy_increase"], rent_growth_std),
+        ("rental", "rental_insurance_base", inputs["rental_insurance_base"], mc_params["rental_insurance_std"]),
+        ("rental", "rental_insurance_yoy", inputs["rental_insurance_yoy_increase"], rent_growth_std),
+        ("rental", "rental_maintenance_base", inputs["rental_maintenance_base"], mc_params["rental_maintenance_std"]),
+        ("rental", "rental_maintenance_yoy", inputs["rental_maintenance_yoy_increase"], rent_growth_std),
+        ("pr_expenses", "pr_prop_tax_base", inputs["pr_prop_tax_base"], mc_params["prop_tax_std"]),
+        ("pr_expenses", "pr_prop_tax_yoy", inputs["pr_prop_tax_yoy_increase"], rent_growth_std),
+        ("pr_expenses", "pr_maintenance_base", mc_params["pr_maintenance_mean"], mc_params["pr_maintenance_std"]),
+        ("pr_expenses", "pr_maintenance_yoy", inputs["pr_maintenance_yoy_increase"], rent_growth_std),
+        ("pr_expenses", "pr_insurance_base", mc_params["pr_insurance_mean"], mc_params["pr_insurance_std"]),
+        ("pr_expenses", "pr_insurance_yoy", inputs["pr_insurance_yoy_increase"], rent_growth_std),
+        ("income", "income_growth_sim", inputs["income_growth"], mc_params["income_growth_std"]),
+        ("income", "income_start_sim", inputs["income_start"], mc_params["income_start_std"]),
+        ("income", "heloc_delta_sim", inputs["heloc_delta"], mc_params["heloc_delta_std"]),
+    ]
+
+
+def _market_params(mc_params: Dict):
+    means = np.array([mc_params["pr_app_mean"], mc_params["rental_app_mean"], mc_params["sm_return_mean"]])
+    stds = np.array([mc_params["pr_app_std"], mc_params["rental_app_std"], mc_params["sm_return_std"]])
+    return means, stds, np.asarray(mc_params["cor_matrix"], dtype=float)
+
+
+def _ar1(yearly: np.ndarray, means: np.ndarray, phi: float) -> np.ndarray:
+    # AR(1) around the means along the year axis of (paths, years, k) draws, keeping each year's
+    # marginal distribution and the cross-correlation of the iid draws: x_t - mu =
+    # phi * (x_{t-1} - mu) + sqrt(1 - phi^2) * (d_t - mu)
+    if not phi:
+        return yearly
+    shocks = (yearly - means) * np.sqrt(1 - phi**2)
+    paths = np.empty_like(yearly)
+    paths[:, 0] = yearly[:, 0] - means
+    for t in range(1, yearly.shape[1]):
+        paths[:, t] = phi * paths[:, t - 1] + shocks[:, t]
+    return paths + means
+
+
+def _mirrored(z: np.ndarray) -> np.ndarray:
+    # Antithetic pairs: rows 2k and 2k + 1 are z and -z (an odd last row is unpaired)
+    out = np.empty((2 * len(z),) + z.shape[1:])
+    out[0::2], out[1::2] = z, -z
+    return out
+
+
+def _draw_block(
+    inputs: Dict,
+    mc_params: Dict,
+    n: int,
+    streams: Dict[str, np.random.Generator],
+    sampler: str = "random",
+    antithetic: bool = False,
+) -> Dict[str, np.ndarray]:
+    # mc_params["market_paths"] picks how pr_app, rental_app and sm_return enter the scenarios:
+    # "mean" (default) collapses the correlated yearly draws to one value per path, "yearly" feeds
+    # the (paths, years) draws themselves, "ar1" makes them AR(1) with coefficient mc_params["ar1_phi"]
+    amort_years = inputs["amort_years"]
+    means, stds, cor_matrix = _market_params(mc_params)
+    market_paths = mc_params.get("market_paths", "mean")
+    normal_inputs = _normal_inputs(inputs, mc_params)
+    if sampler == "random" and not antithetic:
+        # Correlated yearly draws for pr_app, rental_app, sm_return
+        cov = np.outer(stds, stds) * cor_matrix
+        yearly = streams["markets"].multivariate_normal(means, cov, (n, amort_years))
+        draws = {name: streams[group].normal(mean, std, n) for group, name, mean, std in normal_inputs}
+    else:
+        # Standard normals over the market dimensions plus one per normal input, drawn as one
+        # randomized point set per replicate (QMC) or as antithetic pairs, with the correlation
+        # matrix applied through its Cholesky factor
+        rng = streams["markets"]
+        market_dims = 3 if market_paths == "mean" else 3 * amort_years
+        n_dims = market_dims + len(normal_inputs)
+        if sampler == "random":
+            sizes = [n]
+            z = _mirrored(standard_normals(sampler, -(-n // 2), n_dims, rng))[:n]
+            replicate = np.arange(n) // 2
+        else:
+            sizes = [len(part) for part in np.array_split(np.arange(n), min(QMC_REPLICATES, n))]
+            parts = [standard_normals(sampler, -(-size // 2) if antithetic else size, n_dims, rng) for size in sizes]
+            z = np.concatenate([(_mirrored(p) if antithetic else p)[:size] for p, size in zip(parts, sizes)])
+            replicate = np.repeat(np.arange(len(sizes)), sizes)
+        correlated = z[:, :market_dims].reshape(n, -1, 3) @ np.linalg.cholesky(cor_matrix).T
+        if market_paths == "mean":
+            # The yearly average is itself normal with covariance cov / years, so it is sampled directly
+            yearly = means + correlated * stds / np.sqrt(amort_years)
+        else:
+            yearly = means + correlated * stds
+        draws = {name: mean + std * z[:, market_dims + i] for i, (_, name, mean, std) in enumerate(normal_inputs)}
+        draws["replicate"] = replicate
+    if market_paths == "mean":
+        markets = yearly.mean(1)
+    elif market_paths in ("yearly", "ar1"):
+        markets = _ar1(yearly, means, mc_params.get("ar1_phi", 0.0) if market_paths == "ar1" else 0.0)
+    else:
+        raise ValueError(f"Unknown market_paths {market_paths!r}, expected 'mean', 'yearly' or 'ar1'")
+    draws["pr_app_sim"], draws["rental_app_sim"], draws["sm_return_sim"] = np.moveaxis(markets, -1, 0)
+    rate_paths = _draw_rate_paths(inputs, mc_params, n, streams["rates"])
+    if rate_paths is not None:
+        draws["rate_paths"] = rate_paths
+    return draws
+
+
+def _draw_rate_paths(inputs: Dict, mc_params: Dict, n: int, rng: np.random.Generator) -> Optional[np.ndarray]:
+    # (paths, years) mortgage rates for mc_params["rate_model"]: "schedule" (default) keeps the
+    # deterministic schedule; "vasicek"/"cir" mean-revert from the schedule's year-1 rate to
+    # mortgage_rate_mean with stationary std mortgage_rate_std at speed rate_reversion; "bootstrap"
+    # adds block-resampled changes of the annual rate_history to the schedule, reverting to it at
+    # speed rate_reversion. Always drawn from the pseudo-random "rates" stream, whatever the sampler.
+    rate_model = mc_params.get("rate_model", "schedule")
+    if rate_model == "schedule":
+        return None
+    amort_years = inputs["amort_years"]
+    schedule = RateSchedule.coerce(inputs["rate_schedule"], amort_years)
+    schedule = RateSchedule(schedule.annual(amort_years))
+    if rate_model == "bootstrap":
+        return bootstrap_rate_paths(
+            schedule, mc_params["rate_history"], n, rng, reversion=mc_params.get("rate_reversion", 0.3)
+        ).annual_rates
+    return short_rate_paths(
+        schedule.rate(1),
+        mc_params["mortgage_rate_mean"],
+        mc_params["mortgage_rate_std"],
+        mc_params.get("rate_reversion", 0.3),
+        n,
+        amort_years,
+        rng,
+        rate_model,
+    ).annual_rates
+
+
+def draw_monte_carlo_inputs(
+    inputs: Dict,
+    mc_params: Dict,
+    num_simulations: int,
+    seed=None,
+    first_path: int = 0,
+    sampler: str = "random",
+    antithetic: bool = False,
+) -> Dict[str, np.ndarray]:
+    # Random inputs of paths first_path .. first_path + num_simulations - 1 of the run seeded by seed;
+    # first_path must be a multiple of MC_BLOCK_SIZE. sampler is "random", "lhs" (Latin Hypercube) or
+    # "sobol" (scrambled Sobol); antithetic pairs every path with its mirror image. Both add a
+    # per-path "replicate" id of independent groups (QMC point sets or antithetic pairs).
+    if first_path % MC_BLOCK_SIZE:
+        raise ValueError(f"first_path must be a multiple of MC_BLOCK_SIZE ({MC_BLOCK_SIZE})")
+    root = seed_sequence(seed)
+    first_block = first_path // MC_BLOCK_SIZE
+    blocks = []
+    for b, start in enumerate(range(0, num_simulations, MC_BLOCK_SIZE)):
+        streams = _block_streams(root, first_block + b)
+        block = _draw_block(
+            inputs, mc_params, min(MC_BLOCK_SIZE, num_simulations - start), streams, sampler, antithetic
+        )
+        if "replicate" in block:
+            block["replicate"] = block["replicate"] + (first_block + b) * MC_BLOCK_SIZE
+        blocks.append(block)
+    if len(blocks) == 1:
+        return blocks[0]
+    return {name: np.concatenate([block[name] for block in blocks]) for name in blocks[0]}
+
+
+def _per_path(x: np.ndarray) -> np.ndarray:
+    # Per-path summary of a (paths,) value or a (paths, years) path: its mean over the years
+    return x.mean(axis=-1) if x.ndim == 2 else x
+
+
+# Expense schedules built from a drawn base and YoY increase per path
+SCHEDULE_DRAWS = ("rental_prop_tax", "rental_insurance", "rental_maintenance", "pr_prop_tax", "pr_maintenance", "pr_insurance")
+
+
+def _evaluate_draws(inputs: Dict, draws: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    # Both scenarios for per-path draws (see _draw_block): stress/macro is applied to every path at
+    # once and the batch kernels run on the stressed rates. Returns the monte_carlo_simulation dict.
+    amort_years = inputs["amort_years"]
+    n = len(draws["pr_app_sim"])
+    schedules = {
+        prefix: growth_schedule(draws[f"{prefix}_base"], draws[f"{prefix}_yoy"], amort_years) for prefix in SCHEDULE_DRAWS
+    }
+    pr_app_sim, rental_app_sim, sm_return_sim = draws["pr_app_sim"], draws["rental_app_sim"], draws["sm_return_sim"]
+    rent_monthly_sim, rental_vacancy_sim = draws["rent_monthly_sim"], draws["vacancy_sim"]
+    rental_prop_tax_sim, rental_insurance_sim = draws["prop_tax_sim"], draws["insurance_sim"]
+    rental_maintenance_sim = draws["maintenance_sim"]
+    income_growth_sim, income_start_sim = draws["income_growth_sim"], draws["income_start_sim"]
+    heloc_delta_sim = draws["heloc_delta_sim"]
+
+    # Apply stress/macro to every simulation at once
+    (
+        adj_pr_app,
+        adj_rental_app,
+        adj_sm_return,
+        adj_rent_monthly,
+        adj_vacancy,
+        adj_prop_tax,
+        adj_insurance,
+        adj_maintenance,
+        adj_rate_schedule,
+    ) = apply_stress_and_macro(
+        pr_app_sim,
+        rental_app_sim,
+        sm_return_sim,
+        rent_monthly_sim,
+        rental_vacancy_sim,
+        rental_prop_tax_sim,
+        rental_insurance_sim,
+        rental_maintenance_sim,
+        draws.get("rate_paths", inputs["rate_schedule"]),
+        inputs["stress_test"],
+        inputs["macro_scenario"],
+    )
+    annual_rates = resolve_rate_schedule(adj_rate_schedule, amort_years)
+
+    s1_equity_sim, _ = scenario1_cashflow_batch(
+        inputs["pr_price"],
+        inputs["rental_price"],
+        inputs["down_pr1"],
+        annual_rates,
+        adj_rental_app,
+        adj_pr_app,
+        inputs["heloc_delta"],
+        adj_rent_monthly,
+        adj_vacancy,
+        schedules["rental_prop_tax"],
+        schedules["rental_insurance"],
+        schedules["rental_maintenance"],
+        inputs["rental_purchase_year"],
+        schedules["pr_prop_tax"],
+        schedules["pr_insurance"],
+        schedules["pr_maintenance"],
+        resolution=inputs.get("cashflow_resolution", "annual"),
+        payment_frequency=inputs.get("payment_frequency", "monthly"),
+        purchase_month=inputs.get("purchase_month", 1),
+    )
+    s2_equity_sim, _, _ = scenario2_cashflow_batch(
+        inputs["pr_price"],
+        adj_sm_return,
+        inputs["down_pr2"],
+        annual_rates,
+        income_start_sim,
+        income_growth_sim,
+        adj_pr_app,
+        inputs["heloc_loan"],
+        heloc_delta_sim,
+        inputs["sm_principal"],
+        schedules["pr_prop_tax"],
+        schedules["pr_insurance"],
+        schedules["pr_maintenance"],
+        resolution=inputs.get("cashflow_resolution", "annual"),
+        payment_frequency=inputs.get("payment_frequency", "monthly"),
+    )
+    return {
+        "s1_equity_sim": s1_equity_sim,
+        "s2_equity_sim": s2_equity_sim,
+        "pr_app_sim": _per_path(adj_pr_app),
+        "rental_app_sim": _per_path(adj_rental_app),
+        "sm_return_sim": _per_path(adj_sm_return),
+        "rent_monthly_sim": rent_monthly_sim,
+        "vacancy_sim": rental_vacancy_sim,
+        "prop_tax_sim": rental_prop_tax_sim,
+        "insurance_sim": rental_insurance_sim,
+        "maintenance_sim": rental_maintenance_sim,
+        "mortgage_rate_sim": np.broadcast_to(adj_rate_schedule.annual(amort_years).mean(axis=-1), (n,)),
+        "income_growth_sim": income_growth_sim,
+        "income_start_sim": income_start_sim,
+        "heloc_delta_sim": heloc_delta_sim,
+    }
+
+
+def monte_carlo_simulation(
+    inputs: Dict,
+    mc_params: Dict,
+    num_simulations: int,
+    seed=None,
+    first_path: int = 0,
+    sampler: str = "random",
+    antithetic: bool = False,
+    control_variate: bool = False,
+) -> Dict[str, np.ndarray]:
+    # Run every path at once: all random inputs are drawn up front as (paths,) or (paths, years)
+    # arrays and fed through the batch scenario kernels.
+    # inputs holds the deterministic scenario inputs (sidebar values), mc_params the Monte Carlo
+    # means, std devs and the pr_app/rental_app/sm_return correlation matrix. seed (int or
+    # SeedSequence) makes the run reproducible; None draws fresh entropy, returned as "seed".
+    # first_path, sampler and antithetic select the paths and how they are drawn (see
+    # draw_monte_carlo_inputs); control_variate adds the linearized controls (see _linear_controls).
+    # Returns a dict of arrays: s1_equity_sim/s2_equity_sim are (paths, years), every other *_sim
+    # entry is the per-path value of a simulated variable; "replicate" holds the independent group
+    # of each path for QMC or antithetic runs.
+    root = seed_sequence(seed)
+    draws = draw_monte_carlo_inputs(inputs, mc_params, num_simulations, root, first_path, sampler, antithetic)
+    results = _evaluate_draws(inputs, draws)
+    results["seed"] = root.entropy
+    if "replicate" in draws:
+        results["replicate"] = draws["replicate"]
+    if control_variate:
+        results.update(_linear_controls(inputs, mc_params, draws))
+    return results
+
+
+def _linear_controls(inputs: Dict, mc_params: Dict, draws: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    # Control variates anchored on the deterministic run at the mean inputs: the first-order model
+    # c = f(mu) + grad f(mu) . (x - mu) of each scenario's final net worth in the drawn scalars x.
+    # E[c] = f(mu) exactly, so c is a valid control whatever the curvature of f; the gradient comes
+    # from central differences of +-1 std, all evaluated in one batch of 2 * dims + 1 runs. c is odd
+    # in the shocks, so it averages to f(mu) over every antithetic pair and adds nothing there.
+    means, stds, _ = _market_params(mc_params)
+    normal_inputs = _normal_inputs(inputs, mc_params)
+    # One column per drawn scalar: the market inputs have one per year when they are yearly paths
+    names = ["pr_app_sim", "rental_app_sim", "sm_return_sim"] + [name for _, name, _, _ in normal_inputs]
+    widths = [draws[name].shape[1] if draws[name].ndim == 2 else 1 for name in names]
+    mu = np.repeat(np.concatenate((means, [mean for _, _, mean, _ in normal_inputs])), widths)
+    step = np.repeat(np.concatenate((stds, [std for _, _, _, std in normal_inputs])), widths)
+    step = np.where(step > 0, step, 1.0)
+    dims = len(mu)
+    points = np.tile(mu, (2 * dims + 1, 1))
+    points[1 : dims + 1] += np.diag(step)
+    points[dims + 1 :] -= np.diag(step)
+    bounds = np.cumsum([0] + widths)
+    columns = {
+        name: points[:, lo] if width == 1 else points[:, lo:hi]
+        for name, width, lo, hi in zip(names, widths, bounds[:-1], bounds[1:])
+    }
+    deterministic = _evaluate_draws(inputs, columns)
+    x = np.column_stack([draws[name] for name in names]) - mu
+    controls = {}
+    for scenario in ("s1", "s2"):
+        final = deterministic[f"{scenario}_equity_sim"][:, -1]
+        grad = (final[1 : dims + 1] - final[dims + 1 :]) / (2 * step)
+        controls[f"{scenario}_control"] = final[0] + x @ grad
+        controls[f"{scenario}_control_mean"] = final[0]
+    return controls
+
+
+def mean_standard_error(values, replicate=None) -> float:
+    # Standard error of the mean of per-path values. With replicate ids (QMC point sets, antithetic
+    # pairs) it is the spread of the replicate means; otherwise the plain std / sqrt(paths).
+    values = np.asarray(values, dtype=float)
+    if replicate is None:
+        return float(values.std(ddof=1) / np.sqrt(len(values)))
+    counts = np.bincount(replicate)
+    used = counts > 0
+    replicate_means = np.bincount(replicate, weights=values)[used] / counts[used]
+    return float(replicate_means.std(ddof=1) / np.sqrt(len(replicate_means)))
+
+
+def control_variate_mean(values, control, control_mean: float, replicate=None) -> Tuple[float, float]:
+    # (estimate, standard error) of the mean of values with a control of known mean: the paths are
+    # adjusted by beta * (control - control_mean), beta = cov(values, control) / var(control)
+    values, control = np.asarray(values, dtype=float), np.asarray(control, dtype=float)
+    control_var = control.var()
+    beta = np.mean((values - values.mean()) * (control - control.mean())) / control_var if control_var > 0 else 0.0
+    adjusted = values - beta * (control - control_mean)
+    return float(adjusted.mean()), mean_standard_error(adjusted, replicate)
+
+
+def confidence_interval(estimate: float, standard_error: float, level: float = 0.95) -> Tuple[float, float]:
+    # Normal-approximation two-sided interval
+    half_width = float(norm_ppf(0.5 + level / 2)) * standard_error
+    return estimate - half_width, estimate + half_width
+
+
+def monte_carlo_estimates(results: Dict[str, np.ndarray], level: float = 0.95) -> Dict[str, Dict[str, float]]:
+    # Mean final net worth of "s1", "s2" and "diff" (S1 - S2) from monte_carlo_simulation results:
+    # estimate, standard error and confidence interval at level, using the control variates when
+    # the run computed them and replicate groups (QMC/antithetic) for the standard errors
+    replicate = results.get("replicate")
+    finals = {"s1": results["s1_equity_sim"][:, -1], "s2": results["s2_equity_sim"][:, -1]}
+    finals["diff"] = finals["s1"] - finals["s2"]
+    estimates = {}
+    for name, values in finals.items():
+        if "s1_control" in results:
+            if name == "diff":
+                control = results["s1_control"] - results["s2_control"]
+                control_mean = results["s1_control_mean"] - results["s2_control_mean"]
+            else:
+                control, control_mean = results[f"{name}_control"], results[f"{name}_control_mean"]
+            estimate, se = control_variate_mean(values, control, control_mean, replicate)
+        else:
+            estimate, se = float(values.mean()), mean_standard_error(values, replicate)
+        low, high = confidence_interval(estimate, se, level)
+        estimates[name] = {"mean": estimate, "standard_error": se, "ci_low": low, "ci_high": high}
+    return estimates
+
+
+def adaptive_monte_carlo(
+    inputs: Dict,
+    mc_params: Dict,
+    target_half_width: float,
+    time_budget: float = 10.0,
+    batch_size: int = MC_BLOCK_SIZE,
+    max_simulations: int = 1_000_000,
+    seed=None,
+    sampler: str = "random",
+    antithetic: bool = False,
+    control_variate: bool = False,
+    level: float = 0.95,
+    keep_paths: bool = False,
+    max_kept_paths: Optional[int] = None,
+) -> Dict:
+    # Runs block-aligned batches of the seeded simulation until the confidence interval on the mean
+    # S1 - S2 final net worth difference has half-width <= target_half_width, the time budget (in
+    # seconds) is spent or max_simulations is reached. Only final-year values (and controls) are
+    # kept between batches unless keep_paths, which also returns the concatenated "results" of the
+    # first max_kept_paths paths (default all); later batches are not stored.
+    # Returns num_simulations, converged, elapsed, the final "estimates" (see monte_carlo_estimates)
+    # and "history", the (paths, half width) after every batch.
+    root = seed_sequence(seed)
+    batch_size = max(1, -(-batch_size // MC_BLOCK_SIZE)) * MC_BLOCK_SIZE
+    start_time = time.perf_counter()
+    batches, history = [], []
+    finals = None
+    n_done = 0
+    converged = False
+    while n_done < max_simulations:
+        results = monte_carlo_simulation(
+            inputs,
+            mc_params,
+            min(batch_size, max_simulations - n_done),
+            root,
+            n_done,
+            sampler,
+            antithetic,
+            control_variate,
+        )
+        if keep_paths and (max_kept_paths is None or n_done < max_kept_paths):
+            batches.append(results)
+        finals = _append_batch(
+            finals,
+            n_done,
+            {
+                name: value[:, -1:] if name in ("s1_equity_sim", "s2_equity_sim") else value
+                for name, value in results.items()
+                if name in ("s1_equity_sim", "s2_equity_sim", "replicate") or "control" in name
+            },
+        )
+        n_done += len(results["s1_equity_sim"])
+        summary = {name: value[:n_done] if np.ndim(value) else value for name, value in finals.items()}
+        estimates = monte_carlo_estimates(summary, level)
+        half_width = (estimates["diff"]["ci_high"] - estimates["diff"]["ci_low"]) / 2
+        history.append((n_done, half_width))
+        if half_width <= target_half_width:
+            converged = True
+            break
+        if time.perf_counter() - start_time >= time_budget:
+            break
+    adaptive = {
+        "num_simulations": n_done,
+        "converged": converged,
+        "elapsed": time.perf_counter() - start_time,
+        "estimates": estimates,
+        "history": history,
+        "seed": root.entropy,
+    }
+    if keep_paths:
+        kept = _concatenate_batches(batches)
+        if max_kept_paths is not None:
+            kept = {name: value[:max_kept_paths] if np.ndim(value) else value for name, value in kept.items()}
+        adaptive["results"] = kept
+    return adaptive
+
+
+def _append_batch(buffer, n, batch):
+    # batch's rows written after the first n rows of buffer, which grows by doubling so appending
+    # every batch copies O(total rows) values; scalar entries are taken from the first batch
+    if buffer is None:
+        return {name: np.array(value) if np.ndim(value) else value for name, value in batch.items()}
+    rows = len(batch["s1_equity_sim"])
+    for name, value in batch.items():
+        if not np.ndim(value):
+            continue
+        store = buffer[name]
+        if n + rows > len(store):
+            grown = np.empty((max(2 * len(store), n + rows),) + store.shape[1:], dtype=store.dtype)
+            grown[:n] = store[:n]
+            buffer[name] = store = grown
+        store[n : n + rows] = value
+    return buffer
+
+
+def _concatenate_batches(batches):
+    # One monte_carlo_simulation-style dict from consecutive batches; scalar entries are taken once
+    if len(batches) == 1:
+        return batches[0]
+    return {
+        name: np.concatenate([batch[name] for batch in batches]) if np.ndim(value) else value
+        for name, value in batches[0].items()
+    }
+
+
+def monte_carlo_streaming(
+    inputs: Dict,
+    mc_params: Dict,
+    num_simulations: int,
+    seed=None,
+    first_path: int = 0,
+    chunk_size: int = 4 * MC_BLOCK_SIZE,
+    sampler: str = "random",
+    antithetic: bool = False,
+) -> Dict[str, PathStats]:
+    # monte_carlo_simulation evaluated chunk_size paths at a time and folded into PathStats, so
+    # memory is bounded by the chunk, not num_simulations. Same paths as monte_carlo_simulation with
+    # the same seed. Returns PathStats for "s1_equity_sim", "s2_equity_sim", their difference
+    # "diff_equity_sim" (paths, years) and every per-path variable, plus the run's "seed".
+    root = seed_sequence(seed)
+    chunk_size = max(1, chunk_size // MC_BLOCK_SIZE) * MC_BLOCK_SIZE
+    stats: Dict[str, PathStats] = {}
+    for start in range(0, num_simulations, chunk_size):
+        results = monte_carlo_simulation(
+            inputs, mc_params, min(chunk_size, num_simulations - start), root, first_path + start, sampler, antithetic
+        )
+        results["diff_equity_sim"] = results["s1_equity_sim"] - results["s2_equity_sim"]
+        for name, values in results.items():
+            if name.endswith("_sim"):
+                values = np.asarray(values)
+                stats.setdefault(name, PathStats(values.shape[-1] if values.ndim == 2 else 1)).update(values)
+    stats["seed"] = root.entropy
+    return stats
+
+
+# Inputs a sensitivity axis may vary: the numeric inputs of either scenario. The amortization term and
+# rate schedule set the shape of every batch, and the choice inputs are not numbers.
+SENSITIVITY_INPUTS = tuple(
+    name
+    for name in dict.fromkeys(SCENARIO1_INPUTS + SCENARIO2_INPUTS)
+    if name not in ("amort_years", "rate_schedule", "cashflow_resolution", "payment_frequency")
+)
+
+
+def _final_networth_over_grid(run, dependencies, inputs, names, values, chunk_size):
+    # Evaluate one scenario only over the axes it depends on, leaving size-1 dims for the others
+    dims = [i for i, name in enumerate(names) if name in dependencies]
+    mesh = np.meshgrid(*[values[i] for i in dims], indexing="ij")
+    flat = {names[i]: grid.ravel() for i, grid in zip(dims, mesh)}
+    n_cells = int(np.prod([len(values[i]) for i in dims]))
+    final_networth = np.empty(n_cells)
+    for start in range(0, n_cells, chunk_size):
+        chunk = {name: v[start : start + chunk_size] for name, v in flat.items()}
+        final_networth[start : start + chunk_size] = run({**inputs, **chunk})[0][..., -1]
+    return final_networth.reshape([len(v) if i in dims else 1 for i, v in enumerate(values)])
+
 
-def sensitivity_analysis(...):
-    # ...existing code...
-    pass
+def sensitivity_analysis(inputs: Dict, axes: Dict[str, Sequence[float]], chunk_size: int = 4096) -> Dict[str, np.ndarray]:
+    # Final net worth of both scenarios over the full grid spanned by axes ({input name: values}),
+    # one array dimension per axis in order. Each scenario is evaluated vectorized, in chunks of at
+    # most chunk_size cells, over only the axes it depends on and broadcast across the rest, e.g. an
+    # SM return axis never re-runs scenario 1.
+    names = list(axes)
+    values = []
+    for name in names:
+        if name not in SENSITIVITY_INPUTS:
+            raise ValueError(f"{name!r} cannot be used as a sensitivity axis, expected one of SENSITIVITY_INPUTS")
+        try:
+            values.append(np.asarray(axes[name], dtype=float))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Sensitivity axis {name!r} has non-numeric values {axes[name]!r}") from e
+    s1_final = _final_networth_over_grid(scenario1_from_inputs, SCENARIO1_INPUTS, inputs, names, values, chunk_size)
+    s2_final = _final_networth_over_grid(scenario2_from_inputs, SCENARIO2_INPUTS, inputs, names, values, chunk_size)
+    shape = tuple(len(v) for v in values)
+    return {
+        "s1_final": np.broadcast_to(s1_final, shape),
+        "s2_final": np.broadcast_to(s2_final, shape),
+        "diff": np.broadcast_to(s1_final - s2_final, shape),
+    }
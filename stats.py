@@ -0,0 +1,101 @@
+# Streaming, mergeable statistics for Monte Carlo paths processed in chunks
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Quantile sketch: a fixed histogram over sign(x) * log1p(|x| / SKETCH_SCALE), covering |x| up to
+# SKETCH_MAX. Bins are about 0.6% wide in relative terms, so interpolated quantiles of net worths
+# are well inside that. Fixed edges make sketches from different chunks or processes mergeable by
+# adding counts, which a P-square marker set is not.
+SKETCH_BINS = 8192
+SKETCH_SCALE = 100.0
+SKETCH_MAX = 1e13
+_SKETCH_LIMIT = np.log1p(SKETCH_MAX / SKETCH_SCALE)
+_SKETCH_WIDTH = 2 * _SKETCH_LIMIT / SKETCH_BINS
+
+
+def _to_sketch(x):
+    return np.sign(x) * np.log1p(np.abs(x) / SKETCH_SCALE)
+
+
+def _from_sketch(t):
+    return np.sign(t) * np.expm1(np.abs(t)) * SKETCH_SCALE
+
+
+class PathStats:
+    # Per-year count, mean and M2 (combined chunk by chunk with Chan et al.'s pairwise update),
+    # min/max and a quantile sketch for (paths, years) blocks, or (paths,) blocks of per-path
+    # scalars stored as one "year". Memory is O(years * SKETCH_BINS) whatever the number of paths.
+
+    def __init__(self, years: int = 1):
+        self.n = 0
+        self.mean = np.zeros(years)
+        self.m2 = np.zeros(years)
+        self.min = np.full(years, np.inf)
+        self.max = np.full(years, -np.inf)
+        self.counts = np.zeros((years, SKETCH_BINS), dtype=np.int64)
+
+    @property
+    def years(self) -> int:
+        return len(self.mean)
+
+    def update(self, paths) -> "PathStats":
+        paths = np.asarray(paths, dtype=float)
+        paths = paths.reshape(len(paths), -1)
+        if not len(paths):
+            return self
+        chunk = PathStats(self.years)
+        chunk.n = len(paths)
+        chunk.mean = paths.mean(axis=0)
+        chunk.m2 = ((paths - chunk.mean) ** 2).sum(axis=0)
+        chunk.min, chunk.max = paths.min(axis=0), paths.max(axis=0)
+        bins = np.clip(((_to_sketch(paths) + _SKETCH_LIMIT) / _SKETCH_WIDTH).astype(np.int64), 0, SKETCH_BINS - 1)
+        flat = (bins + np.arange(self.years) * SKETCH_BINS).ravel()
+        chunk.counts = np.bincount(flat, minlength=self.years * SKETCH_BINS).reshape(self.years, SKETCH_BINS)
+        return self.merge(chunk)
+
+    def merge(self, other: "PathStats") -> "PathStats":
+        # Fold other into self (in place) and return self
+        if not other.n:
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.n / n
+        self.m2 = self.m2 + other.m2 + delta**2 * self.n * other.n / n
+        self.n = n
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        self.counts = self.counts + other.counts
+        return self
+
+    @property
+    def variance(self) -> np.ndarray:
+        return self.m2 / max(self.n, 1)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+    def quantile(self, q) -> np.ndarray:
+        # Per-year quantiles q in [0, 1] from the sketch, interpolated within the bin and clipped to
+        # the exact min/max; shape q.shape + (years,)
+        q = np.asarray(q, dtype=float)
+        cum = np.cumsum(self.counts, axis=-1)
+        target = q.reshape(-1, 1) * self.n
+        out = np.empty((q.size, self.years))
+        for y in range(self.years):
+            b = np.clip(np.searchsorted(cum[y], target[:, 0], side="left"), 0, SKETCH_BINS - 1)
+            before = np.where(b > 0, cum[y][b - 1], 0)
+            frac = np.divide(target[:, 0] - before, self.counts[y, b], out=np.zeros(q.size), where=self.counts[y, b] > 0)
+            t = -_SKETCH_LIMIT + (b + np.clip(frac, 0, 1)) * _SKETCH_WIDTH
+            out[:, y] = np.clip(_from_sketch(t), self.min[y], self.max[y])
+        return out.reshape(q.shape + (self.years,))
+
+    def histogram(self, year: int = -1, bins: int = 50, value_range: Optional[Tuple[float, float]] = None):
+        # (edges, counts) of one year's values re-binned onto bins equal-width bins, each sketch bin
+        # assigned by its centre; value_range defaults to the exact min/max
+        lo, hi = value_range or (self.min[year], self.max[year])
+        edges = np.linspace(lo, hi, bins + 1)
+        centres = _from_sketch(-_SKETCH_LIMIT + (np.arange(SKETCH_BINS) + 0.5) * _SKETCH_WIDTH)
+        idx = np.clip(np.searchsorted(edges, np.clip(centres, lo, hi), side="right") - 1, 0, bins - 1)
+        return edges, np.bincount(idx, weights=self.counts[year], minlength=bins).astype(np.int64)
@@ -0,0 +1,36 @@
+# The app's modules live at the repository root
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def mc_params():
+    # Monte Carlo means, std devs and market correlations, as the app's sliders produce them
+    return dict(
+        pr_app_mean=0.03,
+        pr_app_std=0.02,
+        prop_tax_std=500,
+        pr_maintenance_mean=3000,
+        pr_maintenance_std=300,
+        pr_insurance_mean=1500,
+        pr_insurance_std=200,
+        rental_app_mean=0.05,
+        rental_app_std=0.03,
+        rental_maintenance_std=300,
+        rental_insurance_std=200,
+        rent_growth_std=0.02,
+        vacancy_std=0.02,
+        sm_return_mean=0.05,
+        sm_return_std=0.04,
+        income_start_std=20_000,
+        income_growth_std=0.02,
+        heloc_delta_std=0.0,
+        cor_matrix=np.array([[1.0, 0.6, 0.5], [0.6, 1.0, 0.4], [0.5, 0.4, 1.0]]),
+        mortgage_rate_mean=0.04,
+        mortgage_rate_std=0.01,
+    )
@@ -0,0 +1,114 @@
+# Plain per-year / per-month reference loops (the original implementations) and fixed kernel
+# inputs shared by the kernel tests
+import numpy as np
+
+from models import BC_BRACKETS, BC_RATES, FED_BRACKETS, FED_RATES
+
+RATE_SCHEDULES = ({1: 0.0395, 3: 0.0345, 5: 0.0325}, {1: 0.05}, {1: 0.02, 2: 0.07, 10: 0.045})
+AMORT_YEARS = 25
+CAPEX = [(3, 15_000), (12, 8_000)]
+PR_EXPENSES = ("pr_prop_tax_list", "pr_insurance_list", "pr_maintenance_list")
+RENTAL_EXPENSES = ("rental_prop_tax_list", "rental_insurance_list", "rental_maintenance_list")
+
+
+def growing_schedule(base, years=AMORT_YEARS, growth=0.02):
+    return [base * (1 + growth) ** i for i in range(years)]
+
+
+def reference_bracket_tax(brackets, rates, income):
+    # The original per-bracket loop: (tax, marginal rate) of one bracket table
+    tax = 0
+    for i in range(1, len(brackets)):
+        if income > brackets[i]:
+            tax += (brackets[i] - brackets[i - 1]) * rates[i - 1]
+        else:
+            tax += (income - brackets[i - 1]) * rates[i - 1]
+            break
+    else:
+        tax += (income - brackets[-1]) * rates[-1]
+    for i in range(len(brackets) - 1, 0, -1):
+        if income > brackets[i]:
+            return tax, rates[i]
+    return tax, rates[0]
+
+
+def reference_bc_tax(income):
+    # Federal + BC (total tax, marginal rate), as calculate_bc_tax computed them before the tax tables
+    fed_tax, fed_marginal = reference_bracket_tax(FED_BRACKETS, FED_RATES, income)
+    bc_tax, bc_marginal = reference_bracket_tax(BC_BRACKETS, BC_RATES, income)
+    return fed_tax + bc_tax, fed_marginal + bc_marginal
+
+
+def rate_at(rate_schedule, year):
+    return rate_schedule[max(yr for yr in rate_schedule if yr <= year)]
+
+
+def reference_balances(principal, amort_years, rate_schedule, payment_scale=1.0):
+    # End-of-month balances, the payment re-amortizing the regular balance over the remaining term at
+    # the start of each year; accelerated payments are payment_scale times the regular payment
+    regular = balance = principal
+    balances = []
+    for y in range(1, amort_years + 1):
+        r_month = rate_at(rate_schedule, y) / 12
+        pmt = regular * r_month / (1 - (1 + r_month) ** -((amort_years - y + 1) * 12))
+        for _ in range(12):
+            regular -= pmt - regular * r_month
+            balance = max(balance * (1 + r_month) - payment_scale * pmt, 0)
+            balances.append(balance)
+    return np.array(balances)
+
+
+def scenario1_args(rate_schedule, rental_purchase_year, **overrides):
+    args = dict(
+        pr_price=1_300_000,
+        rental_price=800_000,
+        down_pr1=0.1,
+        rate_schedule=rate_schedule,
+        amort_years=AMORT_YEARS,
+        rental_app=0.05,
+        pr_app=0.03,
+        heloc_delta=0.01,
+        rental_rent_monthly=4000,
+        rental_vacancy=0.05,
+        rental_prop_tax_list=growing_schedule(5000),
+        rental_insurance_list=growing_schedule(1500),
+        rental_maintenance_list=growing_schedule(2000),
+        rental_purchase_year=rental_purchase_year,
+        pr_prop_tax_list=growing_schedule(4000),
+        pr_insurance_list=growing_schedule(1200),
+        pr_maintenance_list=growing_schedule(2000),
+        capex_events=CAPEX,
+    )
+    args.update(overrides)
+    return args
+
+
+def scenario2_args(rate_schedule, **overrides):
+    args = dict(
+        pr_price=1_300_000,
+        sm_return=0.05,
+        down_pr2=0.2,
+        rate_schedule=rate_schedule,
+        amort_years=AMORT_YEARS,
+        income_start=250_000,
+        income_growth=0.03,
+        pr_app=0.03,
+        heloc_loan=250_000,
+        heloc_delta=0.01,
+        sm_principal=250_000,
+        pr_prop_tax_list=growing_schedule(4000),
+        pr_insurance_list=growing_schedule(1200),
+        pr_maintenance_list=growing_schedule(2000),
+        capex_events=CAPEX,
+    )
+    args.update(overrides)
+    return args
+
+
+def batch_args(args):
+    # Keyword arguments of the batch kernels for a reference-style argument dict
+    args = dict(args)
+    rate_schedule, amort_years = args.pop("rate_schedule"), args.pop("amort_years")
+    args = {name.removesuffix("_list"): value for name, value in args.items()}
+    args["annual_rates"] = [rate_at(rate_schedule, y) for y in range(1, amort_years + 1)]
+    return args
@@ -0,0 +1,62 @@
+# The headless batch runner: vectorized groups of scenario records against one projection per record
+import csv
+
+import numpy as np
+
+import batch
+from pipeline import SUMMARY_FIELDS, iter_projections, run_projection, scenario_inputs, stressed_inputs
+
+RECORDS = [
+    {},
+    {"rental_purchase_year": 3, "sm_return": 0.07},
+    {"pr_price": 900_000, "down_pr1": 0.3, "stress_test": "Market Crash"},
+    {"macro_scenario": "Recession", "rebalancing_action": "Reduce Debt", "drawdown_amount": 10_000},
+    {"future_tax_change": "Increase Capital Gains Tax", "rate_schedule": "1:5.0,4:4.0"},
+    {"cashflow_resolution": "monthly", "payment_frequency": "accelerated_biweekly", "rental_purchase_year": 2},
+    {"rental_app": 0.02, "pr_app": 0.06},
+]
+
+
+def expected_summary(record, stress=True):
+    # The summary fields from one unbatched projection of the record
+    inputs = scenario_inputs(record)
+    projection = run_projection(stressed_inputs(inputs) if stress else inputs)
+    s1_equity, s2_equity, s1_cashflow, s2_cashflow, tax_savings = projection
+    return {
+        "s1_final_networth": s1_equity[-1],
+        "s2_final_networth": s2_equity[-1],
+        "difference": s1_equity[-1] - s2_equity[-1],
+        "s1_total_cashflow": np.sum(s1_cashflow),
+        "s2_total_cashflow": np.sum(s2_cashflow),
+        "total_tax_savings": np.sum(tax_savings),
+    }
+
+
+def test_batched_projections_match_per_scenario():
+    pairs = list(iter_projections(RECORDS, chunk_size=3, stress=True))
+    assert [record for record, _ in pairs] == RECORDS
+    for record, result in pairs:
+        expected = expected_summary(record)
+        for field in SUMMARY_FIELDS:
+            np.testing.assert_allclose(result[field], expected[field], rtol=1e-9, atol=1e-6)
+
+
+def test_cli_writes_one_row_per_scenario(tmp_path, capsys):
+    # CSV fields arrive as strings and missing ones take the sidebar defaults
+    scenarios, output = tmp_path / "scenarios.csv", tmp_path / "results.csv"
+    fields = ["id", "pr_price", "sm_return", "rate_schedule", "stress_test"]
+    rows = [
+        ["a", "1100000", "0.06", "1:3.95,3:3.45,5:3.25", "None"],
+        ["b", "900000", "0.04", "1:5.0", "Rent Drop"],
+    ]
+    with open(scenarios, "w", newline="") as f:
+        csv.writer(f).writerows([fields] + rows)
+    batch.main([str(scenarios), "-o", str(output), "--stress"])
+    assert "2 scenarios" in capsys.readouterr().err
+    with open(output, newline="") as f:
+        results = list(csv.DictReader(f))
+    assert [row["id"] for row in results] == ["a", "b"]
+    for row, values in zip(results, rows):
+        expected = expected_summary(dict(zip(fields, values)))
+        for field in SUMMARY_FIELDS:
+            np.testing.assert_allclose(float(row[field]), expected[field], rtol=0, atol=0.01)
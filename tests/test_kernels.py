@@ -0,0 +1,175 @@
+# The vectorized and batched annual kernels against plain per-year reference loops (the original
+# implementations), on a few fixed inputs
+import numpy as np
+import pytest
+
+from models import (
+    amortization_schedule,
+    mortgage_balance_schedule,
+    scenario1_cashflow,
+    scenario1_cashflow_batch,
+    scenario2_cashflow,
+    scenario2_cashflow_batch,
+    yearly_amortization_batch,
+)
+from reference import (
+    AMORT_YEARS,
+    RATE_SCHEDULES,
+    batch_args,
+    rate_at,
+    reference_balances,
+    reference_bc_tax,
+    scenario1_args,
+    scenario2_args,
+)
+
+
+def _reference_scenario1(
+    pr_price, rental_price, down_pr1, rate_schedule, amort_years, rental_app, pr_app, heloc_delta,
+    rental_rent_monthly, rental_vacancy, rental_prop_tax_list, rental_insurance_list, rental_maintenance_list,
+    rental_purchase_year, pr_prop_tax_list, pr_insurance_list, pr_maintenance_list, capex_events=(), rent_growth=0.03,
+):
+    capex = dict(capex_events)
+    pr_loan = pr_price * (1 - down_pr1)
+    rental_down_payment = rental_price * 0.2
+    rental_loan = rental_price - rental_down_payment
+    pr_bal = reference_balances(pr_loan, amort_years, rate_schedule)
+    rental_bal = reference_balances(rental_loan, amort_years, rate_schedule)
+    last = len(pr_bal) - 1
+
+    def payment(loan, bal, i):
+        start = bal[min((i - 1) * 12, last)] if i > 0 else loan
+        principal = start - bal[min(i * 12 if i > 0 else 12, last)]
+        interest = sum(bal[j] * rate_at(rate_schedule, i + 1) / 12 for j in range(i * 12, (i + 1) * 12))
+        return principal + interest
+
+    if rental_purchase_year > 0:
+        months_paid = rental_purchase_year * 12
+        principal_paid = pr_loan - pr_bal[months_paid - 1] if months_paid <= len(pr_bal) else pr_loan
+    else:
+        principal_paid = 0
+    heloc_used = min(principal_paid, rental_down_payment)
+    equity, cashflow = [], []
+    for year in range(1, amort_years + 1):
+        i = year - 1
+        rent_income = rental_rent_monthly * (1 + rent_growth) ** i * 12 * (1 - rental_vacancy)
+        expenses = (
+            pr_prop_tax_list[i] + pr_insurance_list[i] + pr_maintenance_list[i]
+            + rental_prop_tax_list[i] + rental_insurance_list[i] + rental_maintenance_list[i] + capex.get(year, 0)
+        )
+        net = rent_income - expenses - payment(pr_loan, pr_bal, i) - payment(rental_loan, rental_bal, i)
+        heloc_interest = heloc_used * (rate_at(rate_schedule, year) + heloc_delta)
+        if year == rental_purchase_year:
+            net -= rental_down_payment - heloc_used + heloc_interest
+        elif year > rental_purchase_year and heloc_used > 0:
+            net -= heloc_interest
+        cashflow.append(net)
+        equity.append(
+            pr_price * (1 + pr_app) ** year - pr_bal[min(i * 12, last)]
+            + rental_price * (1 + rental_app) ** year - rental_bal[min(i * 12, last)]
+            + sum(cashflow)
+        )
+    return np.array(equity), np.array(cashflow)
+
+
+def _reference_scenario2(
+    pr_price, sm_return, down_pr2, rate_schedule, amort_years, income_start, income_growth, pr_app,
+    heloc_loan, heloc_delta, sm_principal, pr_prop_tax_list, pr_insurance_list, pr_maintenance_list, capex_events=(),
+):
+    capex = dict(capex_events)
+    pr_loan = pr_price * (1 - down_pr2)
+    pr_bal = reference_balances(pr_loan, amort_years, rate_schedule)
+    last = len(pr_bal) - 1
+    equity, cashflow, tax_savings = [], [], []
+    heloc_balance = 0.0
+    for year in range(1, amort_years + 1):
+        _, marginal_tax_rate = reference_bc_tax(income_start * (1 + income_growth) ** year)
+        if year > 1:
+            heloc_balance += pr_bal[min((year - 2) * 12, last)] - pr_bal[min((year - 1) * 12, last)]
+        else:
+            heloc_balance = pr_loan - pr_bal[min(12, last)]
+        savings = heloc_balance * (rate_at(rate_schedule, year) + heloc_delta) * marginal_tax_rate
+        tax_savings.append(savings)
+        expenses = pr_prop_tax_list[year - 1] + pr_insurance_list[year - 1] + pr_maintenance_list[year - 1]
+        cashflow.append(savings - capex.get(year, 0) - expenses)
+        equity.append(
+            pr_price * (1 + pr_app) ** year - pr_bal[min((year - 1) * 12, last)]
+            + sm_principal * (1 + sm_return) ** year + sum(cashflow)
+        )
+    return np.array(equity), np.array(cashflow), np.array(tax_savings)
+
+
+@pytest.mark.parametrize("rate_schedule", RATE_SCHEDULES)
+@pytest.mark.parametrize("payment_frequency", ["monthly", "accelerated_biweekly"])
+def test_amortization_matches_loop(rate_schedule, payment_frequency):
+    scale = {"monthly": 1.0, "accelerated_biweekly": 13 / 12}[payment_frequency]
+    balances, interest, principal = amortization_schedule(500_000, AMORT_YEARS, rate_schedule, payment_frequency)
+    expected = reference_balances(500_000, AMORT_YEARS, rate_schedule, scale)
+    np.testing.assert_allclose(balances, expected, rtol=1e-9, atol=1e-6)
+    opening = np.concatenate(([500_000], expected[:-1]))
+    np.testing.assert_allclose(principal, opening - expected, rtol=1e-9, atol=1e-6)
+    monthly_rates = np.repeat([rate_at(rate_schedule, y) / 12 for y in range(1, AMORT_YEARS + 1)], 12)
+    np.testing.assert_allclose(interest, opening * monthly_rates, rtol=1e-9, atol=1e-6)
+    _, legacy = mortgage_balance_schedule(500_000, AMORT_YEARS, rate_schedule)
+    np.testing.assert_allclose(legacy, reference_balances(500_000, AMORT_YEARS, rate_schedule), rtol=1e-9, atol=1e-6)
+
+
+@pytest.mark.parametrize("rate_schedule", RATE_SCHEDULES)
+def test_yearly_amortization_matches_loop(rate_schedule):
+    # The amortization tables' columns, as the app computed them with per-year comprehensions
+    annual_rates = np.array([rate_at(rate_schedule, y) for y in range(1, AMORT_YEARS + 1)])
+    flat_rate = annual_rates[-1]
+    loans = [900_000, 640_000]
+    monthly, eoy, principal, interest = yearly_amortization_batch(loans, annual_rates, np.full(AMORT_YEARS, flat_rate))
+    for i, loan in enumerate(loans):
+        balances = reference_balances(loan, AMORT_YEARS, rate_schedule)
+        last = len(balances) - 1
+        np.testing.assert_allclose(monthly[i], balances, rtol=1e-9, atol=1e-6)
+        np.testing.assert_allclose(eoy[i], [balances[min(y * 12, last)] for y in range(AMORT_YEARS)], rtol=1e-9)
+        expected_principal = [
+            balances[min((y - 1) * 12, last)] - balances[min(y * 12, last)] if y > 0 else loan - balances[12]
+            for y in range(AMORT_YEARS)
+        ]
+        np.testing.assert_allclose(principal[i], expected_principal, rtol=1e-9, atol=1e-6)
+        expected_interest = [sum(balances[y * 12 : (y + 1) * 12]) * flat_rate / 12 for y in range(AMORT_YEARS)]
+        np.testing.assert_allclose(interest[i], expected_interest, rtol=1e-9, atol=1e-6)
+
+
+@pytest.mark.parametrize("rate_schedule", RATE_SCHEDULES)
+@pytest.mark.parametrize("rental_purchase_year", [0, 1, 4, AMORT_YEARS + 2])
+def test_scenario1_matches_loop(rate_schedule, rental_purchase_year):
+    args = scenario1_args(rate_schedule, rental_purchase_year)
+    for actual, expected in zip(scenario1_cashflow(**args), _reference_scenario1(**args)):
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-4)
+
+
+@pytest.mark.parametrize("rate_schedule", RATE_SCHEDULES)
+def test_scenario2_matches_loop(rate_schedule):
+    args = scenario2_args(rate_schedule)
+    for actual, expected in zip(scenario2_cashflow(**args), _reference_scenario2(**args)):
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-4)
+
+
+def test_batch_kernels_match_loop_per_path():
+    # Per-path scalars and per-path rate paths: every row equals the loop on that path's inputs
+    rng = np.random.default_rng(0)
+    paths = 6
+    rates = rng.uniform(0.02, 0.07, (paths, AMORT_YEARS))
+    pr_app, rental_app = rng.uniform(0, 0.06, paths), rng.uniform(0, 0.08, paths)
+    purchase_years = np.array([0, 1, 2, 5, 10, 30])
+    s1_args = batch_args(scenario1_args(RATE_SCHEDULES[0], purchase_years, pr_app=pr_app, rental_app=rental_app))
+    s1_args["annual_rates"] = rates
+    s1_equity, s1_cashflow = scenario1_cashflow_batch(**s1_args)
+    s2_args = batch_args(scenario2_args(RATE_SCHEDULES[0], pr_app=pr_app, sm_return=rental_app))
+    s2_args["annual_rates"] = rates
+    s2_equity, s2_cashflow, s2_tax = scenario2_cashflow_batch(**s2_args)
+    for p in range(paths):
+        schedule = {y + 1: rate for y, rate in enumerate(rates[p])}
+        expected = _reference_scenario1(
+            **scenario1_args(schedule, purchase_years[p], pr_app=pr_app[p], rental_app=rental_app[p])
+        )
+        np.testing.assert_allclose(s1_equity[p], expected[0], rtol=1e-9, atol=1e-4)
+        np.testing.assert_allclose(s1_cashflow[p], expected[1], rtol=1e-9, atol=1e-4)
+        expected = _reference_scenario2(**scenario2_args(schedule, pr_app=pr_app[p], sm_return=rental_app[p]))
+        for actual, ref in zip((s2_equity[p], s2_cashflow[p], s2_tax[p]), expected):
+            np.testing.assert_allclose(actual, ref, rtol=1e-9, atol=1e-4)
@@ -0,0 +1,121 @@
+# The monthly-resolution engine and its annual rollups against plain month-by-month reference loops
+import numpy as np
+import pytest
+
+from models import (
+    annual_rollup,
+    scenario1_cashflow_batch,
+    scenario1_cashflow_monthly,
+    scenario2_cashflow_batch,
+    scenario2_cashflow_monthly,
+)
+from reference import (
+    PR_EXPENSES,
+    RATE_SCHEDULES,
+    RENTAL_EXPENSES,
+    batch_args,
+    rate_at,
+    reference_balances,
+    reference_bc_tax,
+    scenario1_args,
+    scenario2_args,
+)
+
+
+def _reference_scenario1_monthly(args, payment_scale, purchase_month):
+    # Month-by-month loop: (annual cash flow, December equity)
+    rate_schedule, amort_years = args["rate_schedule"], args["amort_years"]
+    pr_loan = args["pr_price"] * (1 - args["down_pr1"])
+    rental_down_payment = args["rental_price"] * 0.2
+    loan = pr_loan + args["rental_price"] - rental_down_payment
+    balances = reference_balances(1.0, amort_years, rate_schedule, payment_scale)
+    capex = dict(args["capex_events"])
+    purchase_idx = (args["rental_purchase_year"] - 1) * 12 + purchase_month - 1
+    if args["rental_purchase_year"] <= 0:
+        heloc_used, purchase_idx = 0.0, amort_years * 12
+    else:
+        heloc_used = min(pr_loan * (1 - balances[purchase_idx - 1]) if purchase_idx > 0 else 0, rental_down_payment)
+    cashflow, equity, total = np.zeros(amort_years), np.zeros(amort_years), 0.0
+    opening = 1.0
+    for m in range(amort_years * 12):
+        y, k = divmod(m, 12)
+        rate = rate_at(rate_schedule, y + 1)
+        flow = args["rental_rent_monthly"] * (1 + 0.03) ** y * (1 - args["rental_vacancy"])
+        flow -= sum(args[name][y] for name in PR_EXPENSES + RENTAL_EXPENSES) / 12
+        flow -= capex.get(y + 1, 0) if k == 0 else 0
+        flow -= loan * (opening * rate / 12 + opening - balances[m])
+        if m == purchase_idx:
+            flow -= rental_down_payment - heloc_used
+        if m >= purchase_idx:
+            flow -= heloc_used * (rate + args["heloc_delta"]) / 12
+        opening = balances[m]
+        total += flow
+        cashflow[y] += flow
+        if k == 11:
+            equity[y] = (
+                args["pr_price"] * (1 + args["pr_app"]) ** (y + 1)
+                + args["rental_price"] * (1 + args["rental_app"]) ** (y + 1)
+                - loan * balances[m]
+                + total
+            )
+    return equity, cashflow
+
+
+def _reference_scenario2_monthly(args, payment_scale):
+    # Month-by-month loop: (annual cash flow, annual tax savings, December equity)
+    rate_schedule, amort_years = args["rate_schedule"], args["amort_years"]
+    pr_loan = args["pr_price"] * (1 - args["down_pr2"])
+    balances = reference_balances(pr_loan, amort_years, rate_schedule, payment_scale)
+    capex = dict(args["capex_events"])
+    cashflow, tax_savings, equity = np.zeros(amort_years), np.zeros(amort_years), np.zeros(amort_years)
+    heloc_balance, total, opening = 0.0, 0.0, pr_loan
+    for m in range(amort_years * 12):
+        y, k = divmod(m, 12)
+        _, marginal_tax_rate = reference_bc_tax(args["income_start"] * (1 + args["income_growth"]) ** (y + 1))
+        savings = heloc_balance * (rate_at(rate_schedule, y + 1) + args["heloc_delta"]) / 12 * marginal_tax_rate
+        flow = savings - sum(args[name][y] for name in PR_EXPENSES) / 12
+        flow -= capex.get(y + 1, 0) if k == 0 else 0
+        heloc_balance += opening - balances[m]
+        opening = balances[m]
+        total += flow
+        cashflow[y] += flow
+        tax_savings[y] += savings
+        if k == 11:
+            equity[y] = (
+                args["pr_price"] * (1 + args["pr_app"]) ** (y + 1)
+                - balances[m]
+                + args["sm_principal"] * (1 + args["sm_return"]) ** (y + 1)
+                + total
+            )
+    return equity, cashflow, tax_savings
+
+
+@pytest.mark.parametrize("payment_frequency", ["monthly", "accelerated_biweekly"])
+@pytest.mark.parametrize("rental_purchase_year,purchase_month", [(0, 1), (1, 1), (3, 7), (5, 12)])
+def test_scenario1_monthly_matches_loop(payment_frequency, rental_purchase_year, purchase_month):
+    scale = {"monthly": 1.0, "accelerated_biweekly": 13 / 12}[payment_frequency]
+    args = scenario1_args(RATE_SCHEDULES[2], rental_purchase_year)
+    expected_equity, expected_cashflow = _reference_scenario1_monthly(args, scale, purchase_month)
+    kwargs = dict(batch_args(args), payment_frequency=payment_frequency, purchase_month=purchase_month)
+    monthly = scenario1_cashflow_monthly(**kwargs)
+    rolled_up = (annual_rollup(monthly["equity"], "last").reshape(-1), annual_rollup(monthly["cashflow"]).reshape(-1))
+    np.testing.assert_allclose(rolled_up[0], expected_equity, rtol=1e-9, atol=1e-4)
+    np.testing.assert_allclose(rolled_up[1], expected_cashflow, rtol=1e-9, atol=1e-4)
+    # The factored annual rollup the batch kernel uses
+    equity, cashflow = scenario1_cashflow_batch(**kwargs, resolution="monthly")
+    np.testing.assert_allclose(cashflow.reshape(-1), expected_cashflow, rtol=1e-9, atol=1e-4)
+    np.testing.assert_allclose(equity.reshape(-1), expected_equity, rtol=1e-9, atol=1e-4)
+
+
+@pytest.mark.parametrize("payment_frequency", ["monthly", "accelerated_biweekly"])
+def test_scenario2_monthly_matches_loop(payment_frequency):
+    scale = {"monthly": 1.0, "accelerated_biweekly": 13 / 12}[payment_frequency]
+    args = scenario2_args(RATE_SCHEDULES[2])
+    expected = _reference_scenario2_monthly(args, scale)
+    kwargs = dict(batch_args(args), payment_frequency=payment_frequency)
+    monthly = scenario2_cashflow_monthly(**kwargs)
+    np.testing.assert_allclose(annual_rollup(monthly["equity"], "last").reshape(-1), expected[0], rtol=1e-9, atol=1e-4)
+    np.testing.assert_allclose(annual_rollup(monthly["cashflow"]).reshape(-1), expected[1], rtol=1e-9, atol=1e-4)
+    np.testing.assert_allclose(annual_rollup(monthly["tax_savings"]).reshape(-1), expected[2], rtol=1e-9, atol=1e-4)
+    for actual, ref in zip(scenario2_cashflow_batch(**kwargs, resolution="monthly"), expected):
+        np.testing.assert_allclose(actual.reshape(-1), ref, rtol=1e-9, atol=1e-4)
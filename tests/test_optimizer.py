@@ -0,0 +1,121 @@
+# Decision-input optimizer and Pareto fronts
+import numpy as np
+import pytest
+
+from optimizer import (
+    PARETO_RANKS,
+    decision_lattice,
+    objective_vectors,
+    optimize_scenario,
+    pareto_front,
+    pareto_frontier,
+    pareto_ranks,
+    scenario_variables,
+)
+from pipeline import scenario_inputs, stressed_inputs
+from utils import SCORE_OBJECTIVES
+
+
+def dominated(values):
+    # O(n^2) reference: rows some other row beats in one objective without losing in any
+    values = np.asarray(values, dtype=float)
+    geq = (values[:, None, :] >= values[None, :, :]).all(axis=-1)
+    gt = (values[:, None, :] > values[None, :, :]).any(axis=-1)
+    return (geq & gt).any(axis=0)
+
+
+def brute_force(inputs, scenario, names):
+    # Objective vectors of every plan on the lattice of names
+    lattice = [decision_lattice(name, inputs["amort_years"]) for name in names]
+    grid = np.meshgrid(*lattice, indexing="ij")
+    candidates = {name: values.ravel() for name, values in zip(names, grid)}
+    return candidates, objective_vectors(inputs, scenario, candidates)
+
+
+@pytest.mark.parametrize("scenario", ["Scenario 1", "Scenario 2"])
+@pytest.mark.parametrize("optimize_for", [("Net Worth",), ("Net Worth", "Risk"), ("Liquidity",)])
+def test_optimize_scenario_finds_the_lattice_optimum(scenario, optimize_for):
+    inputs = scenario_inputs({})
+    result = optimize_scenario(inputs, scenario, optimize_for)
+    names = scenario_variables(scenario)
+    assert list(result["best"]) == names
+    candidates, objectives = brute_force(inputs, scenario, names)
+    weights = np.array([name in optimize_for for name in SCORE_OBJECTIVES], dtype=float)
+    scores = objectives @ weights
+    assert result["best_score"] == pytest.approx(scores.max(), rel=1e-12)
+    best = np.argmax(scores)
+    assert result["best"] == pytest.approx({name: values[best] for name, values in candidates.items()})
+    # Coordinate descent from the coarse grid evaluates a fraction of the lattice
+    assert result["evaluations"] < len(scores) / 4
+    assert result["history"] == sorted(result["history"])
+    assert result["history"][-1] == result["best_score"]
+
+
+def test_optimize_scenario_reports_every_evaluated_candidate():
+    inputs = scenario_inputs({})
+    result = optimize_scenario(inputs, "Scenario 1", ("Net Worth", "Liquidity"), stress=True)
+    expected = objective_vectors(stressed_inputs(inputs), "Scenario 1", result["candidates"])
+    objectives = np.column_stack([result["objectives"][name] for name in SCORE_OBJECTIVES])
+    np.testing.assert_allclose(objectives, expected, rtol=1e-12)
+    np.testing.assert_allclose(result["scores"], expected[:, 0] + expected[:, 2], rtol=1e-12)
+    assert len(result["scores"]) == result["evaluations"]
+    assert result["best_score"] == result["scores"].max()
+    for name, values in result["candidates"].items():
+        assert np.isin(values, decision_lattice(name, inputs["amort_years"])).all()
+
+
+def test_optimize_scenario_rejects_bad_requests():
+    inputs = scenario_inputs({})
+    with pytest.raises(ValueError, match="optimize_for"):
+        optimize_scenario(inputs, optimize_for=("Return",))
+    with pytest.raises(ValueError, match="Unknown scenario"):
+        optimize_scenario(inputs, scenario="Scenario 3")
+
+
+@pytest.mark.parametrize("k", [1, 2, 3, 4])
+@pytest.mark.parametrize("n", [0, 1, 7, 600])
+def test_pareto_front_matches_pairwise_dominance(n, k):
+    rng = np.random.default_rng(n * 10 + k)
+    # Few distinct levels per objective, so ties and duplicate rows are common
+    values = rng.integers(0, 6, (n, k)).astype(float)
+    if n:
+        values = np.concatenate((values, values[: n // 3]))
+    front = pareto_front(values)
+    np.testing.assert_array_equal(front, np.flatnonzero(~dominated(values)))
+
+
+def test_pareto_front_on_continuous_objectives_spans_blocks():
+    # Anti-correlated objectives put many rows on the front, across several PARETO_BLOCK blocks
+    rng = np.random.default_rng(3)
+    x = rng.standard_normal((3000, 3))
+    values = x - x.mean(axis=1, keepdims=True) + 0.1 * rng.standard_normal((3000, 3))
+    front = pareto_front(values)
+    assert len(front) > 256
+    np.testing.assert_array_equal(front, np.flatnonzero(~dominated(values)))
+
+
+def test_pareto_ranks_peel_successive_fronts():
+    values = np.random.default_rng(4).integers(0, 10, (300, 3)).astype(float)
+    ranks = pareto_ranks(values)
+    remaining = np.arange(len(values))
+    rank = 0
+    while len(remaining):
+        front = remaining[~dominated(values[remaining])]
+        assert (ranks[front] == rank).all()
+        remaining = np.setdiff1d(remaining, front)
+        rank += 1
+    capped = pareto_ranks(values, max_rank=2)
+    np.testing.assert_array_equal(capped, np.minimum(ranks, 2))
+
+
+def test_pareto_frontier_enumerates_small_lattices():
+    inputs = scenario_inputs({})
+    names = ["down_pr1", "rental_purchase_year"]
+    result = pareto_frontier(inputs, "Scenario 1", variables=names)
+    candidates, objectives = brute_force(inputs, "Scenario 1", names)
+    for name in names:
+        np.testing.assert_array_equal(result["candidates"][name], candidates[name])
+    np.testing.assert_array_equal(result["pareto"], np.flatnonzero(~dominated(objectives)))
+    np.testing.assert_array_equal(result["ranks"], pareto_ranks(objectives, max_rank=PARETO_RANKS))
+    sampled = pareto_frontier(inputs, "Scenario 1", num_plans=500, variables=names, seed=0)
+    assert len(sampled["candidates"]["down_pr1"]) == 500
@@ -0,0 +1,48 @@
+# The multi-process backend against the serial runners it shards
+import numpy as np
+
+import batch
+from parallel import chunk_sizes, iter_projections_parallel, monte_carlo_parallel
+from pipeline import SUMMARY_FIELDS, scenario_inputs
+from simulation import MC_BLOCK_SIZE, monte_carlo_streaming
+from test_batch import RECORDS, expected_summary
+
+
+def test_chunk_sizes_cover_the_total():
+    assert chunk_sizes(10, 4) == [4, 4, 2]
+    assert chunk_sizes(8, 4) == [4, 4]
+    assert chunk_sizes(0, 4) == []
+
+
+def test_parallel_monte_carlo_matches_serial(mc_params):
+    inputs = scenario_inputs({"rental_purchase_year": 2})
+    n = 2 * MC_BLOCK_SIZE + 100
+    serial = monte_carlo_streaming(inputs, mc_params, n, seed=7)
+    parallel = monte_carlo_parallel(inputs, mc_params, n, workers=2, seed=7, chunk_size=MC_BLOCK_SIZE)
+    for name in ("s1_equity_sim", "s2_equity_sim", "diff_equity_sim", "pr_app_sim"):
+        assert parallel[name].n == serial[name].n == n
+        np.testing.assert_allclose(parallel[name].mean, serial[name].mean, rtol=1e-9, atol=1e-6)
+        np.testing.assert_allclose(parallel[name].std, serial[name].std, rtol=1e-6)
+        np.testing.assert_array_equal(parallel[name].min, serial[name].min)
+        np.testing.assert_array_equal(parallel[name].counts, serial[name].counts)
+
+
+def test_parallel_projections_match_per_scenario():
+    pairs = list(iter_projections_parallel(RECORDS, chunk_size=3, workers=2, stress=True))
+    assert [record for record, _ in pairs] == RECORDS
+    for record, result in pairs:
+        expected = expected_summary(record)
+        for field in SUMMARY_FIELDS:
+            np.testing.assert_allclose(result[field], expected[field], rtol=1e-9, atol=1e-6)
+
+
+def test_cli_output_does_not_depend_on_workers(tmp_path):
+    scenarios = tmp_path / "scenarios.jsonl"
+    scenarios.write_text("".join(f'{{"id": {i}, "sm_return": {0.03 + 0.005 * i}}}\n' for i in range(10)))
+    outputs = []
+    for workers in ("1", "2"):
+        output = tmp_path / f"results_{workers}.jsonl"
+        batch.main([str(scenarios), "-o", str(output), "--chunk-size", "3", "--workers", workers, "--yearly"])
+        outputs.append(output.read_text())
+    assert outputs[0] == outputs[1]
+    assert len(outputs[0].splitlines()) == 10
@@ -0,0 +1,110 @@
+# Stage graph behind the app's projection and the stress matrix
+import itertools
+
+import numpy as np
+import pytest
+
+from pipeline import SUMMARY_FIELDS, StageGraph, projection_graph, run_projection, scenario_inputs, stress_matrix
+from test_batch import expected_summary
+from utils import MACRO_SCENARIOS, REBALANCING_ACTIONS, STRESS_TESTS, TAX_CHANGES
+
+ALL_STAGES = ["scenario1", "scenario2", "rebalancing", "drawdown", "tax_change", "projection"]
+
+
+def assert_projection_equal(actual, expected):
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        np.testing.assert_array_equal(a, e)
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        {},
+        {"rebalancing_action": "Sell Rental Property", "drawdown_amount": 20_000},
+        {"future_tax_change": "Increase Capital Gains Tax", "rental_purchase_year": 3},
+    ],
+)
+def test_projection_graph_matches_run_projection(record):
+    inputs = scenario_inputs(record)
+    values = projection_graph().evaluate(inputs)
+    assert_projection_equal(values["projection"], run_projection(inputs))
+
+
+def test_projection_graph_recomputes_only_downstream_stages():
+    graph = projection_graph()
+    inputs = scenario_inputs({})
+    graph.evaluate(inputs)
+    assert graph.recomputed == ALL_STAGES
+    graph.evaluate(dict(inputs))
+    assert graph.recomputed == []
+
+    taxed = dict(inputs, future_tax_change="Increase Property Tax")
+    values = graph.evaluate(taxed)
+    assert graph.recomputed == ["tax_change", "projection"]
+    assert_projection_equal(values["projection"], run_projection(taxed))
+
+    rebalanced = dict(taxed, rebalancing_action="Refinance PR")
+    graph.evaluate(rebalanced)
+    assert graph.recomputed == ["rebalancing", "drawdown", "tax_change", "projection"]
+
+    # sm_principal only feeds scenario 2
+    invested = dict(rebalanced, sm_principal=rebalanced["sm_principal"] + 50_000)
+    values = graph.evaluate(invested)
+    assert graph.recomputed == ["scenario2", "rebalancing", "drawdown", "tax_change", "projection"]
+    assert_projection_equal(values["projection"], run_projection(invested))
+
+    # Earlier inputs are still cached
+    values = graph.evaluate(taxed)
+    assert graph.recomputed == []
+    assert_projection_equal(values["projection"], run_projection(taxed))
+
+
+def test_stage_graph_evaluates_only_the_targets_ancestors():
+    graph = projection_graph()
+    inputs = scenario_inputs({})
+    values = graph.evaluate(inputs, "rebalancing")
+    assert set(values) == {"scenario1", "scenario2", "rebalancing"}
+    graph.evaluate(inputs)
+    assert graph.recomputed == ["drawdown", "tax_change", "projection"]
+
+
+def test_stage_graph_evicts_least_recently_used_results():
+    calls = []
+
+    def double(x):
+        calls.append(x)
+        return 2 * x
+
+    graph = StageGraph(max_entries=2).add("double", double, ("x",)).add("plus_one", lambda d: d + 1, stages=("double",))
+    assert graph.evaluate({"x": 1})["plus_one"] == 3
+    graph.evaluate({"x": 2})
+    graph.evaluate({"x": 1})
+    graph.evaluate({"x": 3})
+    assert calls == [1, 2, 3]
+    # x=2 was the least recently used when x=3 came in
+    graph.evaluate({"x": 2})
+    assert calls == [1, 2, 3, 2]
+    with pytest.raises(ValueError, match="unknown stage"):
+        graph.add("bad", lambda y: y, stages=("missing",))
+
+
+def test_stress_matrix_matches_one_projection_per_combination():
+    record = {"rental_purchase_year": 2, "drawdown_amount": 10_000, "rate_schedule": {1: 0.05, 4: 0.04}}
+    matrix = stress_matrix(scenario_inputs(record))
+    assert matrix["axes"] == {
+        "stress_test": STRESS_TESTS,
+        "macro_scenario": MACRO_SCENARIOS,
+        "rebalancing_action": REBALANCING_ACTIONS,
+        "future_tax_change": TAX_CHANGES,
+    }
+    shape = (len(STRESS_TESTS), len(MACRO_SCENARIOS), len(REBALANCING_ACTIONS), len(TAX_CHANGES))
+    assert np.prod(shape) == 600
+    combinations = itertools.product(*(enumerate(choices) for choices in matrix["axes"].values()))
+    for combination in combinations:
+        index = tuple(i for i, _ in combination)
+        choices = dict(zip(matrix["axes"], (choice for _, choice in combination)))
+        expected = expected_summary({**record, **choices})
+        for field in SUMMARY_FIELDS:
+            assert matrix[field].shape == shape
+            assert matrix[field][index] == pytest.approx(expected[field], rel=1e-9, abs=1e-6), (field, choices)
@@ -0,0 +1,82 @@
+# Stochastic mortgage rate paths: mean-reverting short-rate models and the historical bootstrap
+import io
+
+import numpy as np
+import pytest
+
+from rates import (
+    MIN_RATE,
+    MIN_RATE_HISTORY,
+    RateSchedule,
+    bootstrap_rate_paths,
+    load_rate_history,
+    short_rate_paths,
+)
+
+# Annual 5-year fixed mortgage rates (%), a long decline with a couple of spikes
+HISTORY = np.array([
+    10.5, 11.2, 12.1, 13.3, 18.4, 17.9, 13.2, 12.9, 11.2, 10.3, 10.9, 12.1, 13.3, 11.1, 9.5, 8.4, 7.9,
+    9.5, 8.4, 7.4, 7.1, 6.9, 7.0, 8.4, 6.9, 6.4, 5.8, 6.1, 5.9, 5.6, 6.3, 6.5, 7.1, 6.0, 5.6, 5.4,
+    5.0, 4.6, 4.9, 4.7, 4.8, 4.7, 4.6, 5.1, 5.3, 4.9, 4.3, 5.6, 6.6, 6.5,
+]) / 100
+SCHEDULE = RateSchedule.from_dict({1: 0.0395, 3: 0.0345, 5: 0.0325}, 30)
+
+
+@pytest.mark.parametrize("model", ["vasicek", "cir"])
+def test_short_rate_paths_revert_to_long_run_moments(model):
+    paths = short_rate_paths(0.06, 0.04, 0.01, 0.5, 20000, 30, np.random.default_rng(0), model=model)
+    rates = paths.annual_rates
+    assert rates.shape == (20000, 30)
+    np.testing.assert_array_equal(rates[:, 0], 0.06)
+    assert rates.min() >= MIN_RATE
+    # After 29 years at speed 0.5 the start is forgotten: the stationary mean and std remain
+    np.testing.assert_allclose(rates[:, -1].mean(), 0.04, atol=5e-4)
+    np.testing.assert_allclose(rates[:, -1].std(), 0.01, rtol=0.05)
+    # Halfway back to the mean after ln(2) / 0.5 years
+    np.testing.assert_allclose(rates[:, 1].mean(), 0.04 + 0.02 * np.exp(-0.5), atol=5e-4)
+
+
+def test_short_rate_paths_start_per_path_and_reject_unknown_models():
+    r0 = np.linspace(0.03, 0.07, 5)
+    paths = short_rate_paths(r0, 0.05, 0.01, 0.3, 5, 3, np.random.default_rng(0))
+    np.testing.assert_array_equal(paths.annual_rates[:, 0], r0)
+    with pytest.raises(ValueError, match="Unknown rate model"):
+        short_rate_paths(0.05, 0.05, 0.01, 0.3, 5, 3, np.random.default_rng(0), model="hull-white")
+
+
+def test_bootstrap_paths_stay_centred_on_the_schedule():
+    paths = bootstrap_rate_paths(SCHEDULE, HISTORY, 20000, np.random.default_rng(0)).annual_rates
+    np.testing.assert_array_equal(paths[:, 0], SCHEDULE.annual_rates[0])
+    assert paths.min() >= MIN_RATE
+    # Demeaned shifts are centred on zero; only the MIN_RATE floor lifts the mean, by a few basis points
+    bias = paths.mean(axis=0) - SCHEDULE.annual_rates
+    assert np.all(np.abs(bias) < 0.001)
+    # The reverting shift's spread levels off instead of growing with the horizon
+    spread = paths.std(axis=0)
+    assert spread[-1] < 1.1 * spread[9]
+
+
+def test_bootstrap_without_reversion_is_a_cumulative_walk():
+    # Far above the floor, the shifts are the running sums of resampled historical changes
+    schedule = RateSchedule(np.full(12, 0.5))
+    paths = bootstrap_rate_paths(schedule, HISTORY, 200, np.random.default_rng(0), reversion=0.0).annual_rates
+    changes = np.diff(HISTORY) - np.diff(HISTORY).mean()
+    steps = np.diff(paths, axis=1)
+    assert np.all(np.isclose(steps[..., None], changes).any(axis=-1))
+    # Consecutive steps within a block are consecutive historical changes
+    following = np.roll(changes, -1)
+    pairs = np.isclose(steps[:, :1], changes) & np.isclose(steps[:, 1:2], following)
+    assert pairs.any(axis=1).all()
+
+
+def test_bootstrap_rejects_a_short_history():
+    with pytest.raises(ValueError, match="too short"):
+        bootstrap_rate_paths(SCHEDULE, HISTORY[: MIN_RATE_HISTORY - 1], 10, np.random.default_rng(0))
+    bootstrap_rate_paths(SCHEDULE, HISTORY[:MIN_RATE_HISTORY], 10, np.random.default_rng(0))
+
+
+def test_load_rate_history_reads_percent_and_fractions():
+    percent = load_rate_history(io.StringIO("year,rate\n2020,5.5\n2021,4.25\n"))
+    np.testing.assert_allclose(percent, [0.055, 0.0425])
+    fractions = load_rate_history(b"0.055\n0.0425\n")
+    np.testing.assert_allclose(fractions, [0.055, 0.0425])
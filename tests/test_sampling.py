@@ -0,0 +1,58 @@
+# Quasi-Monte Carlo point sets and their use as Monte Carlo samplers
+import sys
+from statistics import NormalDist
+
+import numpy as np
+import pytest
+
+from pipeline import scenario_inputs
+from sampling import latin_hypercube, norm_ppf, sobol_available, standard_normals
+from simulation import monte_carlo_simulation
+
+
+def test_norm_ppf_matches_exact_quantiles():
+    u = np.concatenate(([1e-12, 1e-6, 0.001, 0.02425], np.linspace(0.01, 0.99, 99), [0.97575, 0.999, 1 - 1e-6]))
+    expected = [NormalDist().inv_cdf(p) for p in u]
+    np.testing.assert_allclose(norm_ppf(u), expected, rtol=1e-8, atol=1e-9)
+
+
+def test_latin_hypercube_has_one_point_per_stratum():
+    u = latin_hypercube(64, 5, np.random.default_rng(0))
+    assert u.shape == (64, 5)
+    for column in u.T:
+        np.testing.assert_array_equal(np.sort(np.floor(column * 64)), np.arange(64))
+
+
+@pytest.mark.parametrize("sampler", ["random", "lhs", "sobol"])
+def test_standard_normals_are_standard(sampler):
+    if sampler == "sobol":
+        pytest.importorskip("scipy.stats.qmc")
+    z = standard_normals(sampler, 4096, 4, np.random.default_rng(1))
+    assert z.shape == (4096, 4)
+    tolerance = 0.05 if sampler == "random" else 0.01
+    np.testing.assert_allclose(z.mean(axis=0), 0, atol=tolerance)
+    np.testing.assert_allclose(z.std(axis=0), 1, atol=tolerance)
+
+
+def test_unknown_sampler_raises():
+    with pytest.raises(ValueError, match="Unknown sampler"):
+        standard_normals("halton", 8, 2, np.random.default_rng(0))
+
+
+def test_sobol_available_tracks_scipy(monkeypatch):
+    monkeypatch.setitem(sys.modules, "scipy.stats.qmc", None)
+    assert not sobol_available()
+
+
+def test_lhs_narrows_the_spread_of_the_mean(mc_params):
+    # Spread over seeds of the mean S1 - S2 final net worth: stratifying the draws must cut it
+    inputs = scenario_inputs({})
+
+    def spread(sampler):
+        means = []
+        for seed in range(12):
+            results = monte_carlo_simulation(inputs, mc_params, 512, seed=seed, sampler=sampler)
+            means.append(np.mean(results["s1_equity_sim"][:, -1] - results["s2_equity_sim"][:, -1]))
+        return np.std(means)
+
+    assert spread("lhs") < 0.5 * spread("random")
@@ -0,0 +1,100 @@
+# Declarative shocks: operations, year windows and the shock registry
+import importlib
+
+import numpy as np
+import pytest
+
+import config
+import shocks
+from rates import RateSchedule
+from shocks import SHOCKS, add, apply_shock, clip, compile_shock, hold, scale, shock_targets
+
+
+def test_ops_on_scalars_and_batches():
+    shock = compile_shock([scale("a", 2), add("b", -1), clip("c", lower=0, upper=1)])
+    values = {"a": 3.0, "b": np.array([1.0, 2.0]), "c": np.array([-0.5, 0.5, 1.5]), "d": "untouched"}
+    shocked = shock(values)
+    assert shocked["a"] == 6
+    np.testing.assert_array_equal(shocked["b"], [0, 1])
+    np.testing.assert_array_equal(shocked["c"], [0, 0.5, 1])
+    assert shocked["d"] == "untouched"
+    # The input dict is left as it was
+    assert values["a"] == 3.0
+
+
+def test_ops_apply_in_order():
+    np.testing.assert_allclose(compile_shock([add("x", 1), scale("x", 2)])({"x": 1.0})["x"], 4)
+    np.testing.assert_allclose(compile_shock([scale("x", 2), add("x", 1)])({"x": 1.0})["x"], 3)
+    np.testing.assert_allclose(compile_shock([add("x", 0.5), clip("x", upper=1)])({"x": 0.7})["x"], 1)
+
+
+def test_windows_on_per_year_values():
+    equity = np.arange(1.0, 9.0)
+    batch = np.stack([equity, 10 * equity])
+    shock = compile_shock([scale("e", 0, (3, 4)), add("f", 100, (6, None)), hold("g", (2, 5)), hold("h")])
+    shocked = shock({"e": batch, "f": batch, "g": batch, "h": batch})
+    np.testing.assert_array_equal(shocked["e"][0], [1, 2, 0, 0, 5, 6, 7, 8])
+    np.testing.assert_array_equal(shocked["f"][1], [10, 20, 30, 40, 50, 160, 170, 180])
+    np.testing.assert_array_equal(shocked["g"][0], [1, 2, 2, 2, 2, 6, 7, 8])
+    np.testing.assert_array_equal(shocked["h"][1], np.full(8, 10))
+    np.testing.assert_array_equal(batch[0], equity)
+
+
+def test_rate_windows_extend_short_schedules():
+    schedule = RateSchedule.from_dict({1: 0.05, 2: 0.04})
+    # Open-ended from year 5: the schedule is carried to year 5 and the shocked rate carries on
+    opened = compile_shock([add("rate_schedule", 0.01, (5, None))])({"rate_schedule": schedule})["rate_schedule"]
+    np.testing.assert_allclose(opened.annual_rates, [0.05, 0.04, 0.04, 0.04, 0.05])
+    np.testing.assert_allclose(opened.annual(30)[-1], 0.05)
+    # Bounded past the schedule: the unshocked rate resumes after the window
+    bounded = compile_shock([add("rate_schedule", 0.01, (2, 3))])({"rate_schedule": {1: 0.05}})["rate_schedule"]
+    np.testing.assert_allclose(bounded.annual_rates, [0.05, 0.06, 0.06, 0.05])
+    # Without a window every year moves
+    spiked = apply_shock({"rate_schedule": schedule}, "stress_test", "Interest Rate Spike")["rate_schedule"]
+    np.testing.assert_allclose(spiked.annual_rates, [0.07, 0.06])
+
+
+@pytest.mark.parametrize("years", [(0, 3), (4, 2), (-1, None)])
+def test_invalid_windows_raise(years):
+    with pytest.raises(ValueError, match="Invalid shock years"):
+        compile_shock([scale("x", 2, years)])
+
+
+def test_invalid_ops_raise():
+    with pytest.raises(ValueError, match="Unknown shock op 'multiply'"):
+        compile_shock([{"op": "multiply", "target": "x", "value": 2}])
+    with pytest.raises(ValueError, match="needs a target"):
+        compile_shock([{"op": "scale", "value": 2}])
+    with pytest.raises(ValueError, match="is not per-year"):
+        compile_shock([add("x", 1, (2, None))])({"x": 1.0})
+
+
+def test_registry_choices():
+    inputs = {"rental_vacancy": 0.9, "pr_app": 0.04, "rental_app": 0.05, "sm_return": 0.06}
+    assert apply_shock(inputs, "stress_test", "High Vacancy")["rental_vacancy"] == 1
+    assert apply_shock(inputs, "stress_test", "None") == inputs
+    crashed = apply_shock(inputs, "stress_test", "Market Crash")
+    assert crashed["pr_app"] == pytest.approx(0.02)
+    assert crashed["rental_vacancy"] == 0.9
+    with pytest.raises(ValueError, match="Unknown stress_test 'Asteroid'"):
+        apply_shock(inputs, "stress_test", "Asteroid")
+    assert shock_targets("future_tax_change") == ("s1_equity", "s2_equity")
+    assert list(SHOCKS) == ["stress_test", "macro_scenario", "rebalancing_action", "future_tax_change"]
+
+
+def test_custom_shocks_extend_the_registry(monkeypatch):
+    try:
+        monkeypatch.setattr(config, "CUSTOM_SHOCKS", {"stress_test": {"Rent Freeze": [hold("rent_path", (3, None))]}})
+        importlib.reload(shocks)
+        frozen = shocks.apply_shock({"rent_path": np.arange(1.0, 6.0)}, "stress_test", "Rent Freeze")
+        np.testing.assert_array_equal(frozen["rent_path"], [1, 2, 3, 3, 3])
+        monkeypatch.setattr(config, "CUSTOM_SHOCKS", {"weather": {"Flood": [scale("pr_app", 0.5)]}})
+        with pytest.raises(ValueError, match="Unknown shock group 'weather' in CUSTOM_SHOCKS"):
+            importlib.reload(shocks)
+        monkeypatch.setattr(config, "CUSTOM_SHOCKS", {"stress_test": {"Flood": [{"op": "drop", "target": "x"}]}})
+        with pytest.raises(ValueError, match="Unknown shock op 'drop'"):
+            importlib.reload(shocks)
+    finally:
+        monkeypatch.undo()
+        importlib.reload(shocks)
+    assert "Rent Freeze" not in shocks.SHOCKS["stress_test"]
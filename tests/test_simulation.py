@@ -0,0 +1,122 @@
+# Sensitivity grids and Monte Carlo estimators
+import numpy as np
+import pytest
+
+from models import scenario1_from_inputs, scenario2_from_inputs
+from pipeline import scenario_inputs
+from simulation import (
+    MC_BLOCK_SIZE,
+    adaptive_monte_carlo,
+    confidence_interval,
+    control_variate_mean,
+    draw_monte_carlo_inputs,
+    mean_standard_error,
+    monte_carlo_estimates,
+    monte_carlo_simulation,
+    sensitivity_analysis,
+)
+
+
+def test_sensitivity_grid_matches_one_run_per_cell():
+    inputs = scenario_inputs({"rental_purchase_year": 2})
+    axes = {"rental_app": [0.02, 0.05, 0.08], "sm_return": [0.03, 0.07], "pr_price": [1_000_000, 1_300_000]}
+    grid = sensitivity_analysis(inputs, axes, chunk_size=4)
+    assert grid["diff"].shape == (3, 2, 2)
+    for i, rental_app in enumerate(axes["rental_app"]):
+        for j, sm_return in enumerate(axes["sm_return"]):
+            for k, pr_price in enumerate(axes["pr_price"]):
+                cell = {**inputs, "rental_app": rental_app, "sm_return": sm_return, "pr_price": pr_price}
+                s1_final = scenario1_from_inputs(cell)[0][-1]
+                s2_final = scenario2_from_inputs(cell)[0][-1]
+                assert grid["s1_final"][i, j, k] == pytest.approx(s1_final, rel=1e-12)
+                assert grid["s2_final"][i, j, k] == pytest.approx(s2_final, rel=1e-12)
+                assert grid["diff"][i, j, k] == pytest.approx(s1_final - s2_final, rel=1e-9)
+
+
+@pytest.mark.parametrize("name", ["stress_test", "cashflow_resolution", "payment_frequency", "amort_years", "rent"])
+def test_sensitivity_rejects_non_numeric_axes(name):
+    with pytest.raises(ValueError, match=f"'{name}' cannot be used as a sensitivity axis"):
+        sensitivity_analysis(scenario_inputs({}), {"sm_return": [0.05], name: ["monthly"]})
+
+
+def test_sensitivity_rejects_non_numeric_values():
+    with pytest.raises(ValueError, match="Sensitivity axis 'sm_return' has non-numeric values"):
+        sensitivity_analysis(scenario_inputs({}), {"sm_return": ["5%"]})
+
+
+def test_adaptive_run_matches_one_fixed_run(mc_params):
+    # Batches are block-aligned slices of one seeded run, so the estimates equal the fixed run's
+    inputs = scenario_inputs({})
+    n = 3 * MC_BLOCK_SIZE
+    adaptive = adaptive_monte_carlo(
+        inputs,
+        mc_params,
+        0.0,
+        time_budget=60,
+        max_simulations=n,
+        seed=11,
+        control_variate=True,
+        keep_paths=True,
+        max_kept_paths=5000,
+    )
+    assert adaptive["num_simulations"] == n and not adaptive["converged"]
+    assert [paths for paths, _ in adaptive["history"]] == [MC_BLOCK_SIZE, 2 * MC_BLOCK_SIZE, n]
+    fixed = monte_carlo_simulation(inputs, mc_params, n, seed=11, control_variate=True)
+    for name, estimate in monte_carlo_estimates(fixed).items():
+        for field, value in estimate.items():
+            assert adaptive["estimates"][name][field] == pytest.approx(value, rel=1e-9)
+    # Only the first max_kept_paths paths are returned, and later batches are never stored
+    kept = adaptive["results"]
+    assert len(kept["s1_equity_sim"]) == len(kept["pr_app_sim"]) == 5000
+    np.testing.assert_array_equal(kept["s1_equity_sim"], fixed["s1_equity_sim"][:5000])
+
+
+def test_adaptive_run_stops_at_target_or_budget(mc_params):
+    inputs = scenario_inputs({})
+    loose = adaptive_monte_carlo(inputs, mc_params, 1e9, max_simulations=10 * MC_BLOCK_SIZE, seed=1)
+    assert loose["converged"] and loose["num_simulations"] == MC_BLOCK_SIZE
+    assert "results" not in loose
+    half_width = loose["history"][-1][1]
+    tight = adaptive_monte_carlo(inputs, mc_params, half_width / 1.5, max_simulations=10 * MC_BLOCK_SIZE, seed=1)
+    # Half-width falls like 1 / sqrt(paths), so a target 1.5x tighter needs about 2.25x the paths
+    assert tight["converged"] and 2 * MC_BLOCK_SIZE <= tight["num_simulations"] <= 4 * MC_BLOCK_SIZE
+    assert tight["history"][-1][1] <= half_width / 1.5 < tight["history"][-2][1]
+    out_of_time = adaptive_monte_carlo(inputs, mc_params, 0.0, time_budget=0, seed=1)
+    assert not out_of_time["converged"] and out_of_time["num_simulations"] == MC_BLOCK_SIZE
+
+
+def test_antithetic_pairs_mirror_every_draw(mc_params):
+    inputs = scenario_inputs({})
+    draws = draw_monte_carlo_inputs(inputs, mc_params, 101, seed=3, antithetic=True)
+    for name, mean in (("income_start_sim", inputs["income_start"]), ("pr_app_sim", mc_params["pr_app_mean"])):
+        np.testing.assert_allclose(draws[name][0:100:2] + draws[name][1:100:2], 2 * mean, rtol=1e-12)
+        assert draws[name][0:100:2].std() > 0
+    np.testing.assert_array_equal(draws["replicate"][0:100:2], draws["replicate"][1:100:2])
+    # The odd last path is a pair of its own
+    assert len(set(draws["replicate"])) == 51
+
+
+def test_control_variate_mean_removes_the_linear_part():
+    rng = np.random.default_rng(5)
+    control = rng.normal(10, 2, 2000)
+    values = 3 * control + rng.normal(0, 0.5, 2000)
+    estimate, standard_error = control_variate_mean(values, control, 10.0)
+    beta = np.cov(values, control, bias=True)[0, 1] / control.var()
+    assert estimate == pytest.approx(values.mean() - beta * (control.mean() - 10.0))
+    assert standard_error == pytest.approx(mean_standard_error(values - beta * control))
+    assert standard_error < 0.3 * mean_standard_error(values)
+    low, high = confidence_interval(estimate, standard_error)
+    assert (high - low) / 2 == pytest.approx(1.959964 * standard_error, rel=1e-6)
+
+
+def test_control_variate_narrows_the_monte_carlo_estimate(mc_params):
+    inputs = scenario_inputs({"rental_purchase_year": 2})
+    results = monte_carlo_simulation(inputs, mc_params, MC_BLOCK_SIZE, seed=9, control_variate=True)
+    plain = monte_carlo_estimates({name: results[name] for name in ("s1_equity_sim", "s2_equity_sim")})
+    controlled = monte_carlo_estimates(results)
+    reference = monte_carlo_estimates(monte_carlo_simulation(inputs, mc_params, 8 * MC_BLOCK_SIZE, seed=10))
+    for name in ("s1", "s2", "diff"):
+        assert controlled[name]["standard_error"] < 0.5 * plain[name]["standard_error"]
+        # Both estimate the same mean: within 4 standard errors of an independent, larger run
+        combined = np.hypot(controlled[name]["standard_error"], reference[name]["standard_error"])
+        assert abs(controlled[name]["mean"] - reference[name]["mean"]) < 4 * combined
@@ -0,0 +1,45 @@
+# Streaming statistics: PathStats chunk by chunk against the same statistics of all paths at once
+import numpy as np
+
+from pipeline import scenario_inputs
+from simulation import MC_BLOCK_SIZE, monte_carlo_simulation, monte_carlo_streaming
+from stats import PathStats
+
+
+def test_merged_chunks_match_one_update():
+    paths = np.random.default_rng(3).lognormal(13, 0.5, (100_000, 4)) - 300_000
+    whole = PathStats(4).update(paths)
+    chunked = PathStats(4)
+    for part in np.array_split(paths, [10, 40_000, 40_001]):
+        chunked.merge(PathStats(4).update(part))
+    assert chunked.n == whole.n == 100_000
+    np.testing.assert_allclose(chunked.mean, paths.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(chunked.std, paths.std(axis=0), rtol=1e-9)
+    np.testing.assert_allclose(whole.std, paths.std(axis=0), rtol=1e-9)
+    np.testing.assert_array_equal(chunked.min, paths.min(axis=0))
+    np.testing.assert_array_equal(chunked.max, paths.max(axis=0))
+    np.testing.assert_array_equal(chunked.counts, whole.counts)
+    # Sketch quantiles are within a bin (about 0.6%) of the exact ones, negative values included
+    q = [0.01, 0.25, 0.5, 0.9]
+    np.testing.assert_allclose(chunked.quantile(q), np.quantile(paths, q, axis=0), rtol=0.01)
+    edges, counts = chunked.histogram(year=0, bins=20)
+    assert len(edges) == 21 and counts.sum() == 100_000
+
+
+def test_streaming_matches_full_run(mc_params):
+    inputs = scenario_inputs({"rental_purchase_year": 2})
+    n = 2 * MC_BLOCK_SIZE + 100
+    full_run = monte_carlo_simulation(inputs, mc_params, n, seed=7)
+    stats = monte_carlo_streaming(inputs, mc_params, n, seed=7, chunk_size=MC_BLOCK_SIZE)
+    assert stats["seed"] == full_run["seed"]
+    for name in ("s1_equity_sim", "s2_equity_sim"):
+        paths = full_run[name]
+        assert stats[name].n == n
+        np.testing.assert_allclose(stats[name].mean, paths.mean(axis=0), rtol=1e-9)
+        np.testing.assert_allclose(stats[name].std, paths.std(axis=0), rtol=1e-6)
+        np.testing.assert_array_equal(stats[name].min, paths.min(axis=0))
+        np.testing.assert_array_equal(stats[name].max, paths.max(axis=0))
+        np.testing.assert_allclose(stats[name].quantile(0.5), np.quantile(paths, 0.5, axis=0), rtol=0.01)
+    diff = full_run["s1_equity_sim"] - full_run["s2_equity_sim"]
+    np.testing.assert_allclose(stats["diff_equity_sim"].mean, diff.mean(axis=0), rtol=1e-9, atol=1e-6)
+    np.testing.assert_allclose(stats["pr_app_sim"].mean, [full_run["pr_app_sim"].mean()], rtol=1e-9)
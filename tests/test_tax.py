@@ -0,0 +1,66 @@
+# The searchsorted tax engine against the original per-bracket loop
+import json
+
+import numpy as np
+import pytest
+
+from models import (
+    BC_BRACKETS,
+    DEFAULT_TAX_YEAR,
+    FED_BRACKETS,
+    TAX_TABLES,
+    calculate_bc_tax,
+    calculate_bc_tax_array,
+    load_tax_tables,
+)
+from reference import reference_bc_tax, reference_bracket_tax
+
+# Every bracket start, a dollar either side of it, and incomes inside, below and above the tables
+INCOMES = sorted(
+    {b + d for b in FED_BRACKETS + BC_BRACKETS for d in (-1, 0, 1)}
+    | {0.0, 1.0, 25_000.5, 99_999.0, 150_000.0, 250_000.0, 1_000_000.0, 5_000_000.0}
+)
+
+
+@pytest.mark.parametrize("income", INCOMES)
+def test_scalar_matches_loop(income):
+    total_tax, marginal_rate = calculate_bc_tax(income)
+    expected_tax, expected_rate = reference_bc_tax(income)
+    assert total_tax == pytest.approx(expected_tax, rel=1e-12, abs=1e-6)
+    assert marginal_rate == pytest.approx(expected_rate, rel=1e-12)
+
+
+def test_array_matches_loop():
+    income = np.array(INCOMES)[::-1].reshape(1, -1)
+    total_tax, marginal_rate = calculate_bc_tax_array(income)
+    assert total_tax.shape == marginal_rate.shape == income.shape
+    expected = np.vectorize(reference_bc_tax)(income)
+    np.testing.assert_allclose(total_tax, expected[0], rtol=1e-12, atol=1e-6)
+    np.testing.assert_allclose(marginal_rate, expected[1], rtol=1e-12)
+
+
+def test_bracket_start_is_taxed_at_the_lower_rate():
+    # An income exactly on a bracket start has not entered that bracket yet
+    _, at_start = calculate_bc_tax(FED_BRACKETS[2])
+    _, above = calculate_bc_tax(FED_BRACKETS[2] + 1)
+    assert above - at_start == pytest.approx(0.26 - 0.205)
+
+
+def test_loaded_tax_year_matches_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr("models.TAX_TABLES", dict(TAX_TABLES))
+    tables = {
+        "2030": {
+            "federal": {"brackets": [0, 60_000, 120_000], "rates": [0.14, 0.22, 0.3]},
+            "bc": {"brackets": [0, 50_000], "rates": [0.05, 0.1]},
+        }
+    }
+    path = tmp_path / "tax_tables.json"
+    path.write_text(json.dumps(tables))
+    load_tax_tables(str(path))
+    for income in (0, 49_999, 50_000, 60_000, 75_000, 120_000, 300_000):
+        fed = reference_bracket_tax(tables["2030"]["federal"]["brackets"], tables["2030"]["federal"]["rates"], income)
+        bc = reference_bracket_tax(tables["2030"]["bc"]["brackets"], tables["2030"]["bc"]["rates"], income)
+        total_tax, marginal_rate = calculate_bc_tax(income, tax_year=2030)
+        assert total_tax == pytest.approx(fed[0] + bc[0], abs=1e-6)
+        assert marginal_rate == pytest.approx(fed[1] + bc[1])
+    assert calculate_bc_tax(75_000) == calculate_bc_tax(75_000, DEFAULT_TAX_YEAR)
@@ -1,6 +1,19 @@
 # Utility functions for stress testing, rebalancing, drawdown, tax law changes, scoring
+import hashlib
+import json
+
 import numpy as np
 
+from rates import RateSchedule
+from shocks import SHOCKS, apply_shock
+
+
+# Choices of the scenario selectboxes, in sidebar order, including config.CUSTOM_SHOCKS
+STRESS_TESTS = tuple(SHOCKS["stress_test"])
+MACRO_SCENARIOS = tuple(SHOCKS["macro_scenario"])
+REBALANCING_ACTIONS = tuple(SHOCKS["rebalancing_action"])
+TAX_CHANGES = tuple(SHOCKS["future_tax_change"])
+
 
 def apply_stress_and_macro(
     pr_app,
@@ -15,91 +28,48 @@ def apply_stress_and_macro(
     stress_test,
     macro_scenario,
 ):
-    # Stress Test
-    if stress_test == "Interest Rate Spike":
-        rate_schedule = {yr: rate + 0.02 for yr, rate in rate_schedule.items()}
-    elif stress_test == "Market Crash":
-        pr_app *= 0.5
-        rental_app *= 0.5
-        sm_return *= 0.5
-    elif stress_test == "Rent Drop":
-        rental_rent_monthly *= 0.7
-    elif stress_test == "High Vacancy":
-        rental_vacancy = min(1, rental_vacancy + 0.15)
-    elif stress_test == "Combined Shock":
-        rate_schedule = {yr: rate + 0.02 for yr, rate in rate_schedule.items()}
-        pr_app *= 0.5
-        rental_app *= 0.5
-        sm_return *= 0.5
-        rental_rent_monthly *= 0.7
-        rental_vacancy = min(1, rental_vacancy + 0.15)
-    # Macro Scenario
-    if macro_scenario == "Recession":
-        pr_app *= 0.7
-        rental_app *= 0.7
-        sm_return *= 0.7
-        rental_rent_monthly *= 0.9
-        rental_vacancy = min(1, rental_vacancy + 0.05)
-    elif macro_scenario == "Inflation":
-        rental_prop_tax *= 1.2
-        rental_insurance *= 1.2
-        rental_maintenance *= 1.2
-        rate_schedule = {yr: rate + 0.01 for yr, rate in rate_schedule.items()}
-    elif macro_scenario == "Housing Boom":
-        pr_app *= 1.5
-        rental_app *= 1.5
-        rental_rent_monthly *= 1.2
-    elif macro_scenario == "Housing Bust":
-        pr_app *= 0.5
-        rental_app *= 0.5
-        rental_rent_monthly *= 0.8
-        rental_vacancy = min(1, rental_vacancy + 0.10)
-    return (
-        pr_app,
-        rental_app,
-        sm_return,
-        rental_rent_monthly,
-        rental_vacancy,
-        rental_prop_tax,
-        rental_insurance,
-        rental_maintenance,
-        rate_schedule,
-    )
+    # The stress test's then the macro scenario's shocks on these variables (scalars or per-path
+    # arrays); the rental expenses stand in for their *_base inputs. Shocks on other inputs are
+    # left to pipeline.stressed_inputs.
+    values = {
+        "pr_app": pr_app,
+        "rental_app": rental_app,
+        "sm_return": sm_return,
+        "rental_rent_monthly": rental_rent_monthly,
+        "rental_vacancy": rental_vacancy,
+        "rental_prop_tax_base": rental_prop_tax,
+        "rental_insurance_base": rental_insurance,
+        "rental_maintenance_base": rental_maintenance,
+        "rate_schedule": RateSchedule.coerce(rate_schedule),
+    }
+    values = apply_shock(apply_shock(values, "stress_test", stress_test), "macro_scenario", macro_scenario)
+    return tuple(values.values())
 
 
 def apply_rebalancing(s1_equity, s2_equity, s1_cashflow, s2_cashflow, rebalancing_action):
-    if rebalancing_action == "Sell Rental Property":
-        s1_equity = s1_equity[:5] + [s1_equity[5] for _ in range(len(s1_equity) - 5)]
-        s1_cashflow = s1_cashflow[:5] + [0 for _ in range(len(s1_cashflow) - 5)]
-    elif rebalancing_action == "Refinance PR":
-        s1_cashflow = s1_cashflow[:5] + [c + 50_000 for c in s1_cashflow[5:]]
-    elif rebalancing_action == "Increase Investment":
-        s2_equity = s2_equity[:5] + [e * 1.1 for e in s2_equity[5:]]
-    elif rebalancing_action == "Reduce Debt":
-        s1_equity = s1_equity[:5] + [e + 25_000 for e in s1_equity[5:]]
-        s2_equity = s2_equity[:5] + [e + 25_000 for e in s2_equity[5:]]
-    return s1_equity, s2_equity, s1_cashflow, s2_cashflow
+    # Inputs are per-year arrays or (paths, years) batches
+    values = {
+        "s1_equity": np.array(s1_equity, dtype=float),
+        "s2_equity": np.array(s2_equity, dtype=float),
+        "s1_cashflow": np.array(s1_cashflow, dtype=float),
+        "s2_cashflow": np.array(s2_cashflow, dtype=float),
+    }
+    return tuple(apply_shock(values, "rebalancing_action", rebalancing_action).values())
 
 
 def apply_drawdown(s1_equity, s2_equity, s1_cashflow, s2_cashflow, drawdown_amount, years):
     if drawdown_amount > 0:
-        s1_cashflow = [c - drawdown_amount for c in s1_cashflow]
-        s2_cashflow = [c - drawdown_amount for c in s2_cashflow]
-        s1_equity = [e - drawdown_amount * years for e in s1_equity]
-        s2_equity = [e - drawdown_amount * years for e in s2_equity]
+        s1_cashflow = np.asarray(s1_cashflow) - drawdown_amount
+        s2_cashflow = np.asarray(s2_cashflow) - drawdown_amount
+        s1_equity = np.asarray(s1_equity) - drawdown_amount * years
+        s2_equity = np.asarray(s2_equity) - drawdown_amount * years
     return s1_equity, s2_equity, s1_cashflow, s2_cashflow
 
 
 def apply_tax_change(s1_equity, s2_equity, future_tax_change):
-    if future_tax_change == "Increase Capital Gains Tax":
-        s1_equity = [e * 0.85 for e in s1_equity]
-        s2_equity = [e * 0.85 for e in s2_equity]
-    elif future_tax_change == "Increase Property Tax":
-        s1_equity = [e - 5000 for e in s1_equity]
-        s2_equity = [e - 5000 for e in s2_equity]
-    elif future_tax_change == "Remove Mortgage Interest Deductibility":
-        s2_equity = [e * 0.95 for e in s2_equity]
-    return s1_equity, s2_equity
+    values = {"s1_equity": s1_equity, "s2_equity": s2_equity}
+    values = apply_shock(values, "future_tax_change", future_tax_change)
+    return values["s1_equity"], values["s2_equity"]
 
 
 def score_scenarios(s1_equity, s2_equity, s1_cashflow, s2_cashflow, optimize_for, risk_tolerance, discipline):
@@ -120,3 +90,45 @@ def score_scenarios(s1_equity, s2_equity, s1_cashflow, s2_cashflow, optimize_for
         scores["Scenario 1"] += risk_tolerance * 10000 + discipline * 10000
         scores["Scenario 2"] += risk_tolerance * 10000 + discipline * 10000
     return scores
+
+
+# The objectives score_scenarios adds up (Lifestyle is a constant), all higher-is-better
+SCORE_OBJECTIVES = ("Net Worth", "Risk", "Liquidity", "Stress Resilience")
+
+
+def scenario_objectives(equity, cashflow):
+    # score_scenarios' objectives for one scenario, vectorized: equity/cashflow are (years,) or
+    # (K, years) batches and each objective is a scalar or a (K,) array
+    equity, cashflow = np.asarray(equity, dtype=float), np.asarray(cashflow, dtype=float)
+    return {
+        "Net Worth": equity.mean(axis=-1),
+        "Risk": -equity.std(axis=-1),
+        "Liquidity": cashflow.sum(axis=-1),
+        "Stress Resilience": equity.min(axis=-1),
+    }
+
+
+def _normalize(value):
+    # JSON-ready form where equal inputs compare equal: all numbers become floats, containers are
+    # ordered, rate schedules become their dense per-year rates
+    if isinstance(value, RateSchedule):
+        return {"rate_schedule": _normalize(value.annual_rates)}
+    if isinstance(value, np.ndarray):
+        return _normalize(value.tolist())
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    return value
+
+
+def canonical_key(inputs, names=None) -> str:
+    # Stable hash of an inputs dict (or just the named entries), used as a cache key
+    if names is not None:
+        inputs = {name: inputs[name] for name in names}
+    payload = json.dumps(_normalize(inputs), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()